@@ -1,8 +1,18 @@
+import logging
+
 from flask import Flask
 from flask_cors import CORS
+from config.config import Config
+
+# Sin handlers hasta que create_app configure el logging: los modelos no escriben nada
+logging.getLogger(__name__).addHandler(logging.NullHandler())
 
 def create_app():
     app = Flask(__name__)
+    app.config.from_object(Config)
+    
+    from app.utils.logger import setup_logging
+    setup_logging(app.config)
     
     CORS(app, resources={
         r"/api/*": {
@@ -13,8 +23,17 @@ def create_app():
     })
     
     from app.routes import game_routes
+    game_routes.init_game_store(app.config)
     app.register_blueprint(game_routes.bp, url_prefix='/api/game')
     
+    if app.config.get('METRICS_ENABLED', True):
+        from app.utils.metrics import setup_metrics
+        setup_metrics(app, gauges=lambda: [
+            ('poker_games_active', 'Partidas en el almacen', len(game_routes.active_games)),
+            ('poker_stream_subscribers', 'Streams abiertos de /api/game/stream',
+             game_routes.event_hub.stats()['subscribers'])
+        ])
+    
     @app.route('/')
     def index():
         return {'message': 'Poker Místico API', 'status': 'running'}
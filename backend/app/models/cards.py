@@ -0,0 +1,61 @@
+"""
+Representación compacta de cartas.
+
+Internamente cada carta es un entero 0-51 (``palo * 13 + valor``), el mismo
+orden en que se crea el mazo ordenado, y los montones se guardan en
+``array('B')``. Las cadenas de 2 caracteres ("AH", "0S") solo se usan en la
+frontera JSON (como lista o empaquetadas en una sola cadena: "AH0S...").
+"""
+from array import array
+
+SUITS = ('H', 'D', 'C', 'S')
+VALUES = ('A', '2', '3', '4', '5', '6', '7', '8', '9', '0', 'J', 'Q', 'K')
+
+DECK_SIZE = len(SUITS) * len(VALUES)
+
+CARD_NAMES = tuple(f"{value}{suit}" for suit in SUITS for value in VALUES)
+CARD_INDEX = {name: index for index, name in enumerate(CARD_NAMES)}
+
+# Tablas precalculadas: carta -> índice de valor / palo / montón
+RANK_OF = bytes(card % len(VALUES) for card in range(DECK_SIZE))
+SUIT_OF = bytes(card // len(VALUES) for card in range(DECK_SIZE))
+PILE_OF = tuple(VALUES[card % len(VALUES)] for card in range(DECK_SIZE))
+
+PILE_INDEX = {value: index for index, value in enumerate(VALUES)}
+
+
+def new_pile(cards=()):
+    """Crear un montón compacto de cartas"""
+    return array('B', cards)
+
+
+def card_from_str(name):
+    """Convertir "AH" -> 0"""
+    return CARD_INDEX[name]
+
+
+def card_to_str(card):
+    """Convertir 0 -> "AH" (None se mantiene)"""
+    if card is None:
+        return None
+    return CARD_NAMES[card]
+
+
+def cards_to_str(cards):
+    """Convertir una secuencia de cartas a lista de cadenas"""
+    return [CARD_NAMES[card] for card in cards]
+
+
+def cards_to_packed(cards):
+    """Convertir una secuencia de cartas a una cadena de 2 caracteres por carta ("AH2H...")"""
+    return ''.join([CARD_NAMES[card] for card in cards])
+
+
+def cards_from_packed(packed):
+    """Convertir "AH2H..." -> montón compacto"""
+    if len(packed) % 2:
+        raise ValueError(f'Cadena de cartas de longitud impar: {len(packed)}')
+    try:
+        return new_pile(CARD_INDEX[packed[i:i + 2]] for i in range(0, len(packed), 2))
+    except KeyError as e:
+        raise ValueError(f'Carta desconocida: {e.args[0]}') from None
@@ -1,12 +1,177 @@
+import struct
+from functools import lru_cache
+
+from app.models.cards import DECK_SIZE, new_pile
+
+
+PERMUTATION_CACHE_SIZE = 4096
+SEED_PERIOD = 1000
+
+# Snapshot binario (to_bytes): magic, versión, flags (bit 0 = hay semilla), shuffle_count,
+# initial_seed, número de cartas; siguen las cartas (un byte cada una) y, desde la versión 2,
+# el número de cortes ('<H') y los cortes aplicados
+SNAPSHOT_MAGIC = b'DK'
+SNAPSHOT_VERSION = 2
+_SNAPSHOT_HEADER = struct.Struct('<2sBBIQB')
+_CUTS_COUNT = struct.Struct('<H')
+_HAS_SEED = 0x01
+
+# Cortes que caben en el snapshot y en el registro de eventos (el número va en '<H');
+# /shuffle no permite más
+MAX_CUTS = 0xFFFF
+
+
+def _should_take_from_left(position, left_size, right_size, left_used, right_used, cut_pt, shuffle_cnt, initial_seed):
+    """Decide determinísticamente de qué montón tomar la siguiente carta"""
+    if left_used >= left_size:
+        return False
+    if right_used >= right_size:
+        return True
+    
+    left_progress = left_used / left_size if left_size > 0 else 1.0
+    right_progress = right_used / right_size if right_size > 0 else 1.0
+    
+    seed_base = (position * 7) + (cut_pt * 13) + (shuffle_cnt * 31)
+    if initial_seed is not None:
+        seed_base += (initial_seed * 97)
+        seed_base += ((initial_seed % 1000) * position)
+    determinism = (seed_base % 1000) / 1000.0
+    
+    progress_diff = abs(left_progress - right_progress)
+    
+    if progress_diff < 0.2:
+        return determinism < 0.5
+    else:
+        base_preference = left_progress < right_progress
+        
+        change_threshold = 0.15 + (determinism * 0.2)
+        
+        if progress_diff < change_threshold:
+            if determinism < 0.5:
+                return not base_preference
+            else:
+                return base_preference
+        else:
+            determinism_modifier = (determinism - 0.5) * 0.3
+            return (left_progress + determinism_modifier) < (right_progress - determinism_modifier)
+
+
+def _seed_key(initial_seed):
+    """
+    La semilla solo entra en el barajeo módulo 1000: ``seed * 97`` y
+    ``(seed % 1000) * position`` se reducen con ``% 1000``. Normalizarla así
+    hace que todas las semillas compartan las mismas entradas de caché.
+    """
+    if initial_seed is None:
+        return None
+    return initial_seed % SEED_PERIOD
+
+
+@lru_cache(maxsize=PERMUTATION_CACHE_SIZE)
+def riffle_permutation(deck_size, cut_point, shuffle_count, initial_seed):
+    """
+    Permutación de índices del Riffle Shuffle: la posición i del mazo barajeado
+    recibe la carta que estaba en la posición permutation[i] del mazo original.
+    """
+    left_size = min(cut_point, deck_size)
+    right_size = deck_size - left_size
+    
+    permutation = []
+    left_index = 0
+    right_index = 0
+    
+    while left_index < left_size or right_index < right_size:
+        take_from_left = _should_take_from_left(
+            len(permutation),
+            left_size,
+            right_size,
+            left_index,
+            right_index,
+            cut_point,
+            shuffle_count,
+            initial_seed
+        )
+        
+        if take_from_left and left_index < left_size:
+            permutation.append(left_index)
+            left_index += 1
+        elif right_index < right_size:
+            permutation.append(left_size + right_index)
+            right_index += 1
+        elif left_index < left_size:
+            permutation.append(left_index)
+            left_index += 1
+    
+    return tuple(permutation)
+
+
+def _riffle_permutations_many(np, cut_points, shuffle_count, seeds):
+    """
+    Versión vectorizada de ``riffle_permutation`` para mazos completos: una fila
+    por (corte, semilla) con el mismo shuffle_count. Replica bit a bit las
+    operaciones de ``_should_take_from_left``.
+    """
+    rows = cut_points.shape[0]
+    left_size = cut_points
+    right_size = DECK_SIZE - cut_points
+    left_used = np.zeros(rows, dtype=np.int64)
+    right_used = np.zeros(rows, dtype=np.int64)
+    permutation = np.empty((rows, DECK_SIZE), dtype=np.uint8)
+    
+    seed_constant = (cut_points * 13) + (shuffle_count * 31) + (seeds * 97)
+    seed_step = 7 + (seeds % 1000)
+    
+    for position in range(DECK_SIZE):
+        left_progress = left_used / left_size
+        right_progress = right_used / right_size
+        
+        seed_base = seed_constant + (seed_step * position)
+        determinism = (seed_base % 1000) / 1000.0
+        
+        progress_diff = np.abs(left_progress - right_progress)
+        base_preference = left_progress < right_progress
+        change_threshold = 0.15 + (determinism * 0.2)
+        determinism_modifier = (determinism - 0.5) * 0.3
+        low_determinism = determinism < 0.5
+        
+        take_from_left = np.where(
+            progress_diff < 0.2,
+            low_determinism,
+            np.where(
+                progress_diff < change_threshold,
+                base_preference ^ low_determinism,
+                (left_progress + determinism_modifier) < (right_progress - determinism_modifier)
+            )
+        )
+        take_from_left = (take_from_left | (right_used >= right_size)) & (left_used < left_size)
+        
+        permutation[:, position] = np.where(take_from_left, left_used, left_size + right_used)
+        left_used += take_from_left
+        right_used += ~take_from_left
+    
+    return permutation
+
+
+@lru_cache(maxsize=8)
+def _riffle_permutation_table(shuffle_count):
+    """Todas las permutaciones de un shuffle_count: fila (corte - 1) * 1000 + semilla % 1000"""
+    import numpy as np
+    
+    cut_points = np.repeat(np.arange(1, 52, dtype=np.int64), SEED_PERIOD)
+    seed_keys = np.tile(np.arange(SEED_PERIOD, dtype=np.int64), 51)
+    table = _riffle_permutations_many(np, cut_points, shuffle_count, seed_keys)
+    table.setflags(write=False)
+    return table
+
+
 class DeckShuffle:
     """Mazo de cartas con barajeo Riffle Shuffle Determinista"""
     
     def __init__(self, initial_seed=None, start_ordered=True):
-        self.suits = ['H', 'D', 'C', 'S']
-        self.values = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '0', 'J', 'Q', 'K']
         self.deck = self._create_deck()
         self.shuffle_count = 0
         self.initial_seed = initial_seed
+        self.cuts = new_pile()  # Cortes aplicados, en orden (ver app.models.replay)
         
         if initial_seed is not None and not start_ordered:
             self._initial_shuffle(initial_seed)
@@ -24,10 +189,10 @@ class DeckShuffle:
         Esto asegura que cada nuevo juego tenga un mazo diferente.
         """
         cut_point = ((seed % 50) + 1)
-        top_half = self.deck[:cut_point].copy()
-        bottom_half = self.deck[cut_point:].copy()
+        top_half = self.deck[:cut_point]
+        bottom_half = self.deck[cut_point:]
         
-        shuffled = []
+        shuffled = new_pile()
         left_index = 0
         right_index = 0
         
@@ -58,91 +223,127 @@ class DeckShuffle:
         self.deck = shuffled
         
     def _create_deck(self):
-        """Crear mazo ordenado de 52 cartas"""
-        return [f"{value}{suit}" for suit in self.suits for value in self.values]
+        """Crear mazo ordenado de 52 cartas (enteros 0-51, ver app.models.cards)"""
+        return new_pile(range(DECK_SIZE))
     
     def cut_and_shuffle(self, cut_point):
         """
         Cortar y barajear usando Riffle Shuffle Determinista.
         Simula cómo un humano baraja cartas dividiendo el mazo en dos y entrelazándolas.
         Sin usar random - 100% determinista basado en cut_point y shuffle_count.
+
+        La decisión de cada posición no depende de qué carta hay en ella, así que
+        el barajeo es una permutación fija de índices: se calcula una vez por
+        (tamaño, corte, shuffle_count, semilla) y se aplica en una sola pasada.
         """
         if cut_point < 1 or cut_point > 51:
             cut_point = 26
         
-        top_half = self.deck[:cut_point].copy()
-        bottom_half = self.deck[cut_point:].copy()
+        permutation = riffle_permutation(len(self.deck), cut_point, self.shuffle_count, _seed_key(self.initial_seed))
+        deck = self.deck
+        self.deck = new_pile([deck[i] for i in permutation])
+        self.shuffle_count += 1
+        self.cuts.append(cut_point)
         
-        shuffled = []
-        left_index = 0
-        right_index = 0
+        return self.deck
+    
+    @staticmethod
+    def shuffle_many(seeds, cut_sequences):
+        """
+        Barajear en lote: un mazo ordenado por semilla, aplicando su secuencia de cortes.
+        Equivale bit a bit a ``DeckShuffle(initial_seed=seed)`` + ``cut_and_shuffle`` por corte.
         
-        def should_take_from_left(position, left_size, right_size, left_used, right_used, cut_pt, shuffle_cnt):
-            """Decide determinísticamente de qué montón tomar la siguiente carta"""
-            if left_used >= left_size:
-                return False
-            if right_used >= right_size:
-                return True
-            
-            left_progress = left_used / left_size if left_size > 0 else 1.0
-            right_progress = right_used / right_size if right_size > 0 else 1.0
-            
-            seed_base = (position * 7) + (cut_pt * 13) + (shuffle_cnt * 31)
-            if self.initial_seed is not None:
-                seed_base += (self.initial_seed * 97)
-                seed_base += ((self.initial_seed % 1000) * position)
-            seed = seed_base
-            determinism = (seed % 1000) / 1000.0
-            
-            progress_diff = abs(left_progress - right_progress)
-            
-            
-            if progress_diff < 0.2:
-                return determinism < 0.5
-            else:
-                base_preference = left_progress < right_progress
-                
-                change_threshold = 0.15 + (determinism * 0.2)
-                
-                if progress_diff < change_threshold:
-                    if determinism < 0.5:
-                        return not base_preference
-                    else:
-                        return base_preference
-                else:
-                    determinism_modifier = (determinism - 0.5) * 0.3
-                    return (left_progress + determinism_modifier) < (right_progress - determinism_modifier)
+        seeds: N semillas enteras (p. ej. el hash del game_id)
+        cut_sequences: array (N, k) con los cortes de cada mazo, o una secuencia de k cortes común
+        Devuelve un array NumPy (N, 52) uint8 con el orden final de cada mazo.
+        """
+        import numpy as np
         
-        while left_index < len(top_half) or right_index < len(bottom_half):
-            current_position = len(shuffled)
-            
-            take_from_left = should_take_from_left(
-                current_position,
-                len(top_half),
-                len(bottom_half),
-                left_index,
-                right_index,
-                cut_point,
-                self.shuffle_count
-            )
-            
-            if take_from_left and left_index < len(top_half):
-                shuffled.append(top_half[left_index])
-                left_index += 1
-            elif right_index < len(bottom_half):
-                shuffled.append(bottom_half[right_index])
-                right_index += 1
-            elif left_index < len(top_half):
-                shuffled.append(top_half[left_index])
-                left_index += 1
+        decks = None
+        for decks in DeckShuffle.iter_shuffle_many(seeds, cut_sequences):
+            pass
+        if decks is None:  # Secuencias vacías: los mazos siguen ordenados
+            count = np.asarray(seeds).reshape(-1).shape[0]
+            decks = np.broadcast_to(np.arange(DECK_SIZE, dtype=np.uint8), (count, DECK_SIZE))
+        return np.ascontiguousarray(decks)
+    
+    @staticmethod
+    def iter_shuffle_many(seeds, cut_sequences):
+        """
+        Como ``shuffle_many`` pero produce el lote (N, 52) tras cada barajeo,
+        para analizar 1..k barajeos sin repetir los anteriores. Los arrays
+        producidos no deben modificarse.
+        """
+        import numpy as np
         
-        self.deck = shuffled
-        self.shuffle_count += 1
+        seeds = np.asarray(seeds, dtype=np.int64).reshape(-1)
+        cuts = np.asarray(cut_sequences, dtype=np.int64)
+        if cuts.ndim == 1:
+            cuts = np.broadcast_to(cuts, (seeds.shape[0], cuts.shape[0]))
+        if cuts.ndim != 2 or cuts.shape[0] != seeds.shape[0]:
+            raise ValueError(f'cut_sequences debe ser (N, k) o (k,), llegó {cuts.shape}')
         
-        return self.deck
+        cuts = np.where((cuts < 1) | (cuts > 51), 26, cuts)
+        seed_keys = seeds % SEED_PERIOD
+        decks = np.broadcast_to(np.arange(DECK_SIZE, dtype=np.uint8), (seeds.shape[0], DECK_SIZE))
+        
+        for shuffle_count in range(cuts.shape[1]):
+            if seeds.shape[0] > 51 * SEED_PERIOD:
+                # Con muchos mazos sale más barato calcular las 51 x 1000 permutaciones posibles
+                table = _riffle_permutation_table(shuffle_count)
+                permutation = table[(cuts[:, shuffle_count] - 1) * SEED_PERIOD + seed_keys]
+            else:
+                permutation = _riffle_permutations_many(np, cuts[:, shuffle_count], shuffle_count, seed_keys)
+            decks = np.take_along_axis(decks, permutation, axis=1)
+            yield decks
     
     def get_shuffle_count(self):
         return self.shuffle_count
     
     def get_deck(self):
-        return self.deck.copy()
+        return self.deck[:]
+    
+    def to_bytes(self):
+        """
+        Snapshot binario compacto del mazo (17 bytes + uno por carta y por corte).
+        ValueError si no es serializable (p. ej. más de ``MAX_CUTS`` cortes).
+        """
+        if len(self.cuts) > MAX_CUTS:
+            raise ValueError(f'Mazo no serializable: {len(self.cuts)} cortes (máximo {MAX_CUTS})')
+        flags = 0 if self.initial_seed is None else _HAS_SEED
+        try:
+            header = _SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags, self.shuffle_count,
+                self.initial_seed or 0, len(self.deck)
+            )
+        except struct.error as e:
+            raise ValueError(f'Mazo no serializable: {e}') from e
+        return b''.join((header, self.deck.tobytes(), _CUTS_COUNT.pack(len(self.cuts)), self.cuts.tobytes()))
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """Reconstruir un mazo a partir de ``to_bytes``"""
+        try:
+            magic, version, flags, shuffle_count, initial_seed, count = _SNAPSHOT_HEADER.unpack_from(data, 0)
+        except struct.error as e:
+            raise ValueError(f'Snapshot de mazo no válido: {e}') from e
+        if magic != SNAPSHOT_MAGIC or version not in (1, SNAPSHOT_VERSION):
+            raise ValueError(f'Snapshot de mazo no válido (magic {magic!r}, versión {version})')
+        
+        end = _SNAPSHOT_HEADER.size + count
+        cuts = new_pile()
+        if version >= 2:
+            if len(data) < end + _CUTS_COUNT.size:
+                raise ValueError('Snapshot de mazo truncado')
+            (cuts_count,) = _CUTS_COUNT.unpack_from(data, end)
+            cuts = new_pile(data[end + _CUTS_COUNT.size:])
+            end += _CUTS_COUNT.size + cuts_count
+        if len(data) != end:
+            raise ValueError('Snapshot de mazo truncado')
+        
+        deck = cls.__new__(cls)
+        deck.deck = new_pile(data[_SNAPSHOT_HEADER.size:_SNAPSHOT_HEADER.size + count])
+        deck.cuts = cuts
+        deck.shuffle_count = shuffle_count
+        deck.initial_seed = initial_seed if flags & _HAS_SEED else None
+        return deck
@@ -1,295 +1,288 @@
+import logging
+import os
+import struct
+
+from app.models.cards import CARD_NAMES, PILE_INDEX, PILE_OF, RANK_OF, VALUES, card_to_str, new_pile
+from app.models.deck import DeckShuffle
+from app.models.rules import GAME_RULES, KING, move_conditions, rule_table
+
+CARDS_PER_PILE = 4
+
+# Snapshot binario (to_bytes), little-endian:
+#   cabecera  magic b'PG', versión, flags (bits 0-1 status, bits 2-7 índice en GAME_RULES), kings_revealed,
+#             current_card, current_card_source (índice de montón), número de jugadas (0xFF = None)
+#             y, desde la versión 2, state_id ('<I') y mutaciones ('<H')
+#   contadores un byte por montón: boca abajo << 4 | boca arriba
+#   cartas    boca abajo y boca arriba montón a montón, jugadas, y el snapshot del mazo
+SNAPSHOT_MAGIC = b'PG'
+SNAPSHOT_VERSION = 2
+STATUSES = ('waiting', 'playing', 'won', 'lost')
+_SNAPSHOT_HEADERS = {1: struct.Struct('<2sBBBBBB'), 2: struct.Struct('<2sBBBBBBIH')}
+_NONE = 0xFF
+
+logger = logging.getLogger(__name__)
+
+
 class PokerGame:
     """Lógica del juego con AMBAS variantes de reglas"""
     
     def __init__(self, deck_shuffle, game_rules='original'):
         self.deck = deck_shuffle
-        self.piles = {v: [] for v in ['A', '2', '3', '4', '5', '6', '7', '8', '9', '0', 'J', 'Q', 'K']}
-        self.face_down_cards = {v: [] for v in ['A', '2', '3', '4', '5', '6', '7', '8', '9', '0', 'J', 'Q', 'K']}
-        self.current_card = None
+        self.piles = {v: new_pile() for v in VALUES}
+        self.face_down_cards = {v: new_pile() for v in VALUES}  # La siguiente carta a voltear está al final
+        self.current_card = None  # Entero 0-51 (ver app.models.cards) o None
         self.current_card_source = None
         self.kings_revealed = 0
-        self.moves = []
+        self.moves = new_pile()  # Cartas colocadas, en orden (el montón es PILE_OF[carta])
         self.status = 'waiting'
-        self.game_rules = game_rules  # 'original' o 'alternative'
-        
+        self.game_rules = game_rules  # 'original', 'alternative' u otra variante de app.models.rules
+        self._rules = rule_table(game_rules)  # Tabla de transiciones de la variante
+        
+        # Contadores incrementales para que cada jugada y consulta sea O(1)
+        self._face_down_total = 0
+        self._face_down_mask = 0  # Bit i = el montón VALUES[i] tiene cartas boca abajo
+        self._complete_piles = 0
+        
+        # Versión del estado (ver ``version``): cada montón recuerda la versión en que cambió,
+        # y ``state_id`` distingue esta partida de otra con el mismo game_id
+        self.state_id = int.from_bytes(os.urandom(4), 'little')
+        self._mutations = 0
+        self._pile_versions = [0] * len(VALUES)
+        
+        # Valores derivados del estado (dict de get_game_state, JSON de /state...) válidos
+        # mientras la versión no cambie; _sync_counters los invalida
+        self._cache = {}
+        self._cache_version = None
+        
+    @property
+    def version(self):
+        """Número de cambios de estado: jugadas, reparto y barajeos (crece siempre)"""
+        return self._mutations + self.deck.shuffle_count
+    
+    @property
+    def state_token(self):
+        """Identificador opaco de la versión actual (ETag de /state y ``since`` de los deltas)"""
+        return f'{self.state_id:08x}-{self.version}'
+    
+    def _touch(self, pile):
+        self._mutations += 1
+        self._pile_versions[PILE_INDEX[pile]] = self._mutations + self.deck.shuffle_count
+    
+    def _sync_counters(self):
+        """Recalcular los contadores a partir de los montones (tras modificarlos directamente)"""
+        self._face_down_total = sum(len(cards) for cards in self.face_down_cards.values())
+        self._face_down_mask = 0
+        for pile, cards in self.face_down_cards.items():
+            if cards:
+                self._face_down_mask |= 1 << PILE_INDEX[pile]
+        self._complete_piles = sum(1 for cards in self.piles.values() if len(cards) == CARDS_PER_PILE)
+        self._cache_version = None
+    
+    def cached(self, key, build):
+        """
+        Valor derivado del estado actual: ``build()`` solo se llama la primera vez
+        para cada versión. El valor se comparte entre llamadas: no modificarlo.
+        """
+        version = self.version
+        if self._cache_version != version:
+            self._cache.clear()
+            self._cache_version = version
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = build()
+        return value
+    
     def start_game(self):
-        """Iniciar juego - Repartir 4 cartas boca abajo a CADA montón"""
+        """Iniciar juego - Repartir 4 cartas boca abajo a CADA montón (ValueError si ya se repartió)"""
+        if self.status != 'waiting':
+            raise ValueError(f'El juego ya se inició (status: {self.status})')
         self.status = 'playing'
         
-        piles_order = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '0', 'J', 'Q', 'K']
-        
-        for pile in piles_order:
-            for i in range(4):
-                if self.deck.deck:
-                    card = self.deck.deck.pop(0)
-                    self.face_down_cards[pile].append(card)
+        deck = self.deck.deck
+        for index, pile in enumerate(VALUES):
+            cards = deck[index * CARDS_PER_PILE:(index + 1) * CARDS_PER_PILE]
+            cards.reverse()
+            self.face_down_cards[pile] = cards
+        del deck[:len(VALUES) * CARDS_PER_PILE]
+        self._sync_counters()
+        self._mutations += 1
+        self._pile_versions = [self.version] * len(VALUES)
         
-        print(f"🎮 JUEGO INICIADO - Reglas: {self.game_rules}")
-        for pile in piles_order:
-            print(f"   {pile}: {len(self.face_down_cards[pile])} cartas")
+        logger.debug("Juego iniciado - reglas: %s, cartas boca abajo: %d", self.game_rules, self._face_down_total)
         
         return self.get_game_state()
     
     def flip_card_from_pile(self, pile):
         """Voltear carta de un montón específico"""
         if not self.face_down_cards[pile]:
-            print(f"❌ FLIP: No hay cartas en {pile}")
+            logger.debug("FLIP: no hay cartas en %s", pile)
             return None
         
-        count_before = len(self.face_down_cards[pile])
+        cards = self.face_down_cards[pile]
         
-        self.current_card = self.face_down_cards[pile].pop(0)
+        self.current_card = cards.pop()
         self.current_card_source = pile
+        self._touch(pile)
         
-        count_after = len(self.face_down_cards[pile])
+        self._face_down_total -= 1
+        if not cards:
+            self._face_down_mask &= ~(1 << PILE_INDEX[pile])
         
-        print(f"🔄 FLIP: {self.current_card} desde {pile}")
-        print(f"   ANTES: {count_before} → DESPUÉS: {count_after}")
+        logger.debug("FLIP: %s desde %s (quedan %d)", CARD_NAMES[self.current_card], pile, len(cards))
         
         return self.current_card
     
     def _has_face_down_cards(self):
         """Verificar si quedan cartas boca abajo en CUALQUIER montón"""
-        return any(len(cards) > 0 for cards in self.face_down_cards.values())
+        return self._face_down_total > 0
     
     def _is_complete(self):
         """Verificar si todos los montones tienen 4 cartas boca arriba"""
-        return all(len(pile) == 4 for pile in self.piles.values())
+        return self._complete_piles == len(VALUES)
     
     def _get_next_flip_pile(self):
         """Determinar desde qué pila voltear siguiente carta"""
-        if self.current_card:
+        if self.current_card is not None:
             return None
         
         if self.current_card_source and len(self.face_down_cards[self.current_card_source]) > 0:
             return self.current_card_source
         
-        piles_order = ['K', 'Q', 'J', '0', '9', '8', '7', '6', '5', '4', '3', '2', 'A']
-        for pile in piles_order:
-            if len(self.face_down_cards[pile]) > 0:
-                return pile
+        # Primer montón con cartas de K a A = bit más alto de la máscara
+        if self._face_down_mask:
+            return VALUES[self._face_down_mask.bit_length() - 1]
         
         return None
     
     def place_card(self, target_pile):
-        """Colocar carta - Delega a la variante de reglas correspondiente"""
-        if self.game_rules == 'original':
-            return self._place_card_original(target_pile)
-        else:
-            return self._place_card_alternative(target_pile)
-    
-    def _place_card_original(self, target_pile):
-        """
-        REGLAS ORIGINALES (del video del docente) - CORREGIDAS:
-        - Pierdes si completas una pila (4/4) desde su mismo montón Y no quedan cartas boca abajo en ESA pila
-        - EXCEPCIÓN: Si ese movimiento completa TODO el juego (todas 4/4 + sin cartas boca abajo), GANAS
-        """
-        if not self.current_card:
+        """Colocar carta - El resultado lo decide la tabla de reglas de ``game_rules`` (ver app.models.rules)"""
+        if self.current_card is None:
             return {'success': False, 'message': 'No hay carta'}
         
         if self.status in ['won', 'lost']:
             return {'success': False, 'message': 'El juego ya terminó'}
         
-        card_value = self.current_card[0]
+        card = self.current_card
+        card_value = PILE_OF[card]
         
         if card_value != target_pile:
-            return {'success': False, 'message': f'❌ {self.current_card} debe ir en {card_value}'}
+            return {'success': False, 'message': f'❌ {card_to_str(card)} debe ir en {card_value}'}
         
-        print(f"\n📍 PLACE (ORIGINAL): {self.current_card} en {target_pile} (origen: {self.current_card_source})")
+        logger.debug("PLACE (%s): %s en %s (origen: %s)", self.game_rules, CARD_NAMES[card], target_pile, self.current_card_source)
         
         # Colocar carta
-        self.piles[target_pile].append(self.current_card)
-        self.moves.append({'card': self.current_card, 'pile': target_pile})
-        
-        # ✨ VERIFICACIÓN: ¿Completó una pila desde su propio montón?
-        if len(self.piles[target_pile]) == 4:
-            if self.current_card_source == target_pile and len(self.face_down_cards[target_pile]) == 0:
-                # Completó desde su propio montón Y no quedan cartas en esa pila
-                
-                # ✨ VERIFICAR: ¿Es el movimiento final que completa TODO?
-                all_complete = all(len(self.piles[p]) == 4 for p in self.piles)
-                no_face_down = not self._has_face_down_cards()
-                
-                self.current_card_source = target_pile
-                self.current_card = None
-                
-                if all_complete and no_face_down:
-                    # ✅ ES EL MOVIMIENTO FINAL → VICTORIA
-                    self.status = 'won'
-                    print(f"   ✅ VICTORIA: Todas las pilas completas y sin cartas boca abajo")
-                    return {
-                        'success': True,
-                        'message': '🎉 ¡GANASTE! Completaste todas las pilas',
-                        'game_over': True,
-                        'won': True
-                    }
-                else:
-                    # ❌ NO es movimiento final → DERROTA
-                    self.status = 'lost'
-                    print(f"   ❌ DERROTA: Completaste {target_pile} desde su montón (no es movimiento final)")
-                    return {
-                        'success': True,
-                        'message': f'💀 ¡Perdiste! Completaste {target_pile} desde su propio montón',
-                        'game_over': True,
-                        'won': False
-                    }
-        
-        # Lógica de reyes
-        if card_value == 'K':
+        pile = self.piles[target_pile]
+        pile.append(card)
+        self.moves.append(card)
+        fills = len(pile) == CARDS_PER_PILE
+        if fills:
+            self._complete_piles += 1
+        
+        transition = self._rules[move_conditions(
+            fills,
+            self.current_card_source == target_pile,
+            not self.face_down_cards[target_pile],
+            RANK_OF[card] == KING,
+            self.kings_revealed,
+            self._face_down_total == 0,
+            self._complete_piles == len(VALUES)
+        )]
+        if transition.kings:
             self.kings_revealed += 1
-            print(f"   👑 Rey #{self.kings_revealed} revelado")
-            
-            if self.kings_revealed == 4:
-                self.current_card_source = target_pile
-                self.current_card = None
-                
-                if self._has_face_down_cards():
-                    self.status = 'lost'
-                    return {
-                        'success': True,
-                        'message': '💀 ¡Perdiste! Salió el 4to Rey antes de completar todo',
-                        'game_over': True,
-                        'won': False
-                    }
-                else:
-                    self.status = 'won'
-                    return {
-                        'success': True,
-                        'message': '🎉 ¡GANASTE!',
-                        'game_over': True,
-                        'won': True
-                    }
-        
-        # Verificar victoria (todas completas y sin cartas boca abajo)
-        if self._is_complete() and not self._has_face_down_cards():
-            self.current_card_source = target_pile
-            self.current_card = None
-            self.status = 'won'
+            logger.debug("Rey #%d revelado", self.kings_revealed)
+        
+        self.current_card_source = target_pile
+        self.current_card = None
+        self._touch(target_pile)
+        
+        if transition.status is not None:
+            self.status = transition.status
+            logger.debug("FIN (%s): %s en %s", transition.status, transition.reason, target_pile)
             return {
                 'success': True,
-                'message': '🎉 ¡GANASTE!',
+                'message': transition.message.format(pile=target_pile),
                 'game_over': True,
-                'won': True
+                'won': transition.status == 'won'
             }
         
-        self.current_card_source = target_pile
-        self.current_card = None
-        
         return {
             'success': True,
             'kings_revealed': self.kings_revealed,
             'next_flip_pile': self._get_next_flip_pile()
         }
     
-    def _place_card_alternative(self, target_pile):
+    def play_turn(self, pile=None):
         """
-        REGLAS ALTERNATIVAS (implementación anterior):
-        - Pierdes si completas una pila desde su mismo montón 
-        - EXCEPCIÓN: Si ese movimiento completa TODO el juego, ganas
+        Turno completo en un paso: voltear de ``pile`` (por defecto ``_get_next_flip_pile``)
+        y colocar la carta en su montón. Si ya hay una carta volteada, solo la coloca.
+        Devuelve el resultado de ``place_card`` más ``card`` y ``from`` (montón de origen).
         """
-        if not self.current_card:
-            return {'success': False, 'message': 'No hay carta'}
-        
-        if self.status in ['won', 'lost']:
-            return {'success': False, 'message': 'El juego ya terminó'}
-        
-        card_value = self.current_card[0]
-        
-        if card_value != target_pile:
-            return {'success': False, 'message': f'❌ {self.current_card} debe ir en {card_value}'}
-        
-        print(f"\n📍 PLACE (ALTERNATIVE): {self.current_card} en {target_pile} (origen: {self.current_card_source})")
-        
-        # REGLA DE PÉRDIDA (con excepción de victoria)
-        if len(self.piles[target_pile]) == 3 and self.current_card_source == target_pile:
-            would_complete_all = all(
-                (len(self.piles[p]) + (1 if p == target_pile else 0)) == 4
-                for p in self.piles
-            ) and not self._has_face_down_cards()
-
-            self.piles[target_pile].append(self.current_card)
-            self.moves.append({'card': self.current_card, 'pile': target_pile})
-            
-            self.current_card_source = target_pile
-            self.current_card = None
-
-            if would_complete_all:
-                self.status = 'won'
-                return {
-                    'success': True,
-                    'message': f'🎉 ¡GANASTE!',
-                    'game_over': True,
-                    'won': True
-                }
-
-            self.status = 'lost'
-            return {
-                'success': True,
-                'message': f'💀 ¡Perdiste! Completaste {target_pile} desde su propio montón',
-                'game_over': True,
-                'won': False
-            }
-        
-        # COLOCAR CARTA
-        self.piles[target_pile].append(self.current_card)
-        self.moves.append({'card': self.current_card, 'pile': target_pile})
-        
-        # Lógica de reyes
-        if card_value == 'K':
-            self.kings_revealed += 1
-            print(f"   👑 Rey #{self.kings_revealed} revelado")
-            
-            if self.kings_revealed == 4:
-                self.current_card_source = target_pile
-                self.current_card = None
-                
-                if self._has_face_down_cards():
-                    self.status = 'lost'
-                    return {
-                        'success': True,
-                        'message': '💀 ¡Perdiste! Salió el 4to Rey antes de completar todo',
-                        'game_over': True,
-                        'won': False
-                    }
-                else:
-                    self.status = 'won'
-                    return {
-                        'success': True,
-                        'message': '🎉 ¡GANASTE!',
-                        'game_over': True,
-                        'won': True
-                    }
-        
-        # Verificar victoria
-        if self._is_complete() and not self._has_face_down_cards():
-            self.current_card_source = target_pile
-            self.current_card = None
-            self.status = 'won'
-            return {
-                'success': True,
-                'message': '🎉 ¡GANASTE!',
-                'game_over': True,
-                'won': True
-            }
+        if self.status != 'playing':
+            return {'success': False, 'message': f'El juego no está en curso (status: {self.status})'}
         
-        self.current_card_source = target_pile
-        self.current_card = None
+        if self.current_card is None:
+            pile = pile or self._get_next_flip_pile()
+            if pile is None or self.flip_card_from_pile(pile) is None:
+                return {'success': False, 'message': f'No hay cartas boca abajo en {pile}'}
         
-        return {
-            'success': True,
-            'kings_revealed': self.kings_revealed,
-            'next_flip_pile': self._get_next_flip_pile()
-        }
+        card, source = self.current_card, self.current_card_source
+        result = self.place_card(PILE_OF[card])
+        return {**result, 'card': card, 'from': source}
+    
+    def autoplay(self, max_turns=None):
+        """Jugar turnos automáticos hasta terminar; devuelve ([(carta, origen)...], último resultado)"""
+        turns = []
+        result = {'success': False, 'message': f'El juego no está en curso (status: {self.status})'}
+        while self.status == 'playing' and (max_turns is None or len(turns) < max_turns):
+            result = self.play_turn()
+            if not result['success']:
+                break
+            turns.append((result['card'], result['from']))
+        return turns, result
     
     def get_game_state(self):
-        """Obtener estado del juego"""
+        """
+        Obtener estado del juego (cartas como enteros, ver app.models.cards).
+        Se reutiliza mientras no haya cambios: tratarlo como solo lectura.
+        """
+        if self._cache_version == self.version:
+            state = self._cache.get('state')
+            if state is not None:
+                return state
+        return self.cached('state', self._build_full_state)
+    
+    def _build_full_state(self):
+        return self._build_state(VALUES)
+    
+    def get_state_delta(self, since):
+        """
+        Estado con solo los montones que cambiaron desde ``since`` (un ``state_token``
+        anterior); los campos escalares van siempre. Si el token no es de esta partida
+        devuelve el estado completo. ``full`` indica cuál de los dos es.
+        """
+        version = self._token_version(since)
+        if version is None:
+            return {**self.get_game_state(), 'full': True}
+        changed = [pile for pile, changed_at in zip(VALUES, self._pile_versions) if changed_at > version]
+        return {**self._build_state(changed), 'full': False}
+    
+    def _token_version(self, token):
+        """Versión de un ``state_token`` de esta partida, o None si no lo es"""
+        try:
+            state_id, version = token.split('-')
+            state_id, version = int(state_id, 16), int(version)
+        except (AttributeError, ValueError):
+            return None
+        if state_id != self.state_id or version > self.version:
+            return None
+        return version
+    
+    def _build_state(self, piles):
         piles_copy = {}
-        for k, v in self.piles.items():
-            piles_copy[k] = list(v)
-        
         face_down_copy = {}
-        for k, v in self.face_down_cards.items():
-            face_down_copy[k] = len(v)
+        for pile in piles:
+            piles_copy[pile] = self.piles[pile].tolist()
+            face_down_copy[pile] = len(self.face_down_cards[pile])
         
         state = {
             'status': self.status,
@@ -305,4 +298,80 @@ class PokerGame:
             'game_rules': self.game_rules
         }
         
-        return state
\ No newline at end of file
+        return state
+    
+    def to_bytes(self):
+        """
+        Snapshot binario compacto de la partida completa (100-150 bytes más uno por
+        corte). ValueError si no es serializable (ver ``DeckShuffle.to_bytes``).
+        """
+        try:
+            flags = STATUSES.index(self.status) | (GAME_RULES.index(self.game_rules) << 2)
+        except ValueError as e:
+            raise ValueError(f'Partida no serializable: {e}') from e
+        
+        counts = bytearray()
+        face_down = bytearray()
+        face_up = bytearray()
+        for pile in VALUES:
+            down, up = self.face_down_cards[pile], self.piles[pile]
+            if len(down) > 0x0F or len(up) > 0x0F:
+                raise ValueError(f'Partida no serializable: demasiadas cartas en {pile}')
+            counts.append(len(down) << 4 | len(up))
+            face_down += down.tobytes()
+            face_up += up.tobytes()
+        
+        header = _SNAPSHOT_HEADERS[SNAPSHOT_VERSION].pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags, self.kings_revealed,
+            _NONE if self.current_card is None else self.current_card,
+            _NONE if self.current_card_source is None else PILE_INDEX[self.current_card_source],
+            len(self.moves), self.state_id, self._mutations
+        )
+        return b''.join((header, counts, face_down, face_up, self.moves.tobytes(), self.deck.to_bytes()))
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """Reconstruir una partida a partir de ``to_bytes``"""
+        data = memoryview(data)
+        header = _SNAPSHOT_HEADERS.get(data[2] if len(data) > 2 else None)
+        if bytes(data[:2]) != SNAPSHOT_MAGIC or header is None:
+            raise ValueError(f'Snapshot de partida no válido (magic {bytes(data[:2])!r})')
+        try:
+            magic, version, flags, kings, current, source, moves_count, *extra = header.unpack_from(data, 0)
+        except struct.error as e:
+            raise ValueError(f'Snapshot de partida no válido: {e}') from e
+        # La versión 1 no guarda state_id ni mutaciones: los clientes recibirán el estado completo
+        state_id, mutations = extra or (int.from_bytes(os.urandom(4), 'little'), 0)
+        
+        offset = header.size
+        counts = data[offset:offset + len(VALUES)]
+        offset += len(VALUES)
+        
+        game = cls.__new__(cls)
+        game._cache = {}
+        game.face_down_cards = {}
+        for pile, count in zip(VALUES, counts):
+            game.face_down_cards[pile] = new_pile(data[offset:offset + (count >> 4)])
+            offset += count >> 4
+        game.piles = {}
+        for pile, count in zip(VALUES, counts):
+            game.piles[pile] = new_pile(data[offset:offset + (count & 0x0F)])
+            offset += count & 0x0F
+        game.moves = new_pile(data[offset:offset + moves_count])
+        offset += moves_count
+        
+        game.deck = DeckShuffle.from_bytes(data[offset:])
+        game.status = STATUSES[flags & 0b11]
+        try:
+            game.game_rules = GAME_RULES[flags >> 2]
+        except IndexError:
+            raise ValueError(f'Snapshot de partida no válido (reglas {flags >> 2})') from None
+        game._rules = rule_table(game.game_rules)
+        game.kings_revealed = kings
+        game.current_card = None if current == _NONE else current
+        game.current_card_source = None if source == _NONE else VALUES[source]
+        game._sync_counters()
+        game.state_id = state_id
+        game._mutations = mutations
+        game._pile_versions = [game.version] * len(VALUES)  # Sin historial: cualquier delta los incluye
+        return game
@@ -0,0 +1,146 @@
+"""
+Predictor directo del resultado de una partida.
+
+Con el juego automático (voltear siempre desde ``_get_next_flip_pile`` y
+colocar cada carta en su montón) el resultado queda fijado por el orden del
+mazo. Aquí se simula en una sola pasada O(52) sobre enteros, sin crear
+objetos ``PokerGame`` ni copiar diccionarios, con la misma tabla de reglas
+que la partida (``app.models.rules``).
+"""
+from app.models.cards import DECK_SIZE, PILE_OF, RANK_OF, VALUES
+from app.models.game import CARDS_PER_PILE
+from app.models.rules import KING, REASON_FOURTH_KING, REASON_OWN_PILE, move_conditions, rule_table
+
+PILE_COUNT = len(VALUES)
+
+
+def _simulate(face_down, fill, source, kings, pending_card, game_rules):
+    """
+    Simular hasta el final desde un estado dado.
+
+    face_down: lista de 13 secuencias con las cartas boca abajo (la primera se voltea antes)
+    fill: lista de 13 contadores de cartas boca arriba (se modifica)
+    source: índice del montón de la última carta o None
+    pending_card: carta volteada pendiente de colocar o None
+    """
+    table = rule_table(game_rules)
+    quiet = table.quiet
+    positions = [0] * PILE_COUNT
+    remaining = [len(cards) for cards in face_down]
+    total_face_down = sum(remaining)
+    complete = sum(1 for count in fill if count == CARDS_PER_PILE)
+    top = PILE_COUNT - 1
+    moves = 0
+    card = pending_card
+
+    while True:
+        if card is None:
+            if source is not None and remaining[source]:
+                pile = source
+            else:
+                while top >= 0 and not remaining[top]:
+                    top -= 1
+                if top < 0:
+                    return {'status': 'won' if complete == PILE_COUNT else 'lost',
+                            'reason': None, 'card': None, 'moves_count': moves,
+                            'kings_revealed': kings}
+                pile = top
+            card = face_down[pile][positions[pile]]
+            positions[pile] += 1
+            remaining[pile] -= 1
+            total_face_down -= 1
+        else:
+            pile = source
+
+        rank = RANK_OF[card]
+        moves += 1
+        before = fill[rank]
+        fill[rank] = before + 1
+        fills = before + 1 == CARDS_PER_PILE
+        if fills:
+            complete += 1
+
+        king = rank == KING
+        if fills or king or not quiet:
+            # move_conditions en línea: este bucle es el camino caliente de cut_study
+            transition = table[
+                fills | ((rank == pile) << 1) | ((not remaining[rank]) << 2) | (king << 3)
+                | ((king and kings == 3) << 4) | ((total_face_down == 0) << 5) | ((complete == PILE_COUNT) << 6)
+            ]
+            kings += transition.kings
+            if transition.status is not None:
+                return {'status': transition.status, 'reason': transition.reason, 'card': card,
+                        'moves_count': moves, 'kings_revealed': kings}
+
+        source = rank
+        card = None
+
+
+def predict_outcome(deck_order, game_rules='original'):
+    """
+    Predecir el resultado de repartir ``deck_order`` (52 enteros) y jugar en automático.
+
+    Devuelve un dict con:
+    - status: 'won' o 'lost'
+    - reason: None, 'own_pile' (completó un montón desde sí mismo) o 'fourth_king'
+    - card: carta del movimiento final (la que hace perder o ganar)
+    - moves_count: número de cartas colocadas
+    - kings_revealed: reyes revelados al terminar
+    """
+    if len(deck_order) != DECK_SIZE:
+        raise ValueError(f'Se necesitan {DECK_SIZE} cartas, hay {len(deck_order)}')
+
+    face_down = [deck_order[i:i + CARDS_PER_PILE] for i in range(0, DECK_SIZE, CARDS_PER_PILE)]
+    return _simulate(face_down, [0] * PILE_COUNT, None, 0, None, game_rules)
+
+
+def _finished_reason(game):
+    """
+    Motivo de la derrota de una partida terminada (None si ganó).
+
+    La partida no guarda la transición final, pero el estado final fija la
+    máscara de la última jugada salvo si la carta salió de su propio montón
+    (los reyes previos son los del montón K sin ella). Se prueban ambos casos
+    con la tabla de reglas: vale el que pierde y deja ``kings_revealed`` como está.
+    """
+    if game.status != 'lost' or not game.moves:
+        return None
+    card = game.moves[-1]
+    pile = PILE_OF[card]
+    king = RANK_OF[card] == KING
+    kings_before = len(game.piles[VALUES[KING]]) - king
+    table = rule_table(game.game_rules)
+    reasons = set()
+    for own_source in (False, True):
+        transition = table[move_conditions(
+            len(game.piles[pile]) == CARDS_PER_PILE,
+            own_source,
+            not game.face_down_cards[pile],
+            king,
+            kings_before,
+            not any(game.face_down_cards[v] for v in VALUES),
+            all(len(game.piles[v]) == CARDS_PER_PILE for v in VALUES)
+        )]
+        if transition.status == 'lost' and kings_before + transition.kings == game.kings_revealed:
+            reasons.add(transition.reason)
+    return reasons.pop() if len(reasons) == 1 else None
+
+
+def predict_game(game):
+    """
+    Predecir el resultado de una partida viva (``PokerGame``) sin modificarla.
+    Antes de iniciar usa el orden actual del mazo; en juego parte del estado actual.
+    """
+    if game.status == 'waiting':
+        return predict_outcome(game.deck.deck, game.game_rules)
+
+    if game.status in ['won', 'lost']:
+        return {'status': game.status, 'reason': _finished_reason(game), 'card': None,
+                'moves_count': len(game.moves), 'kings_revealed': game.kings_revealed}
+
+    face_down = [game.face_down_cards[v][::-1] for v in VALUES]
+    fill = [len(game.piles[v]) for v in VALUES]
+    source = VALUES.index(game.current_card_source) if game.current_card_source else None
+    prediction = _simulate(face_down, fill, source, game.kings_revealed, game.current_card, game.game_rules)
+    prediction['moves_count'] += len(game.moves)
+    return prediction
@@ -0,0 +1,149 @@
+"""
+Registro compacto de eventos de una partida y reproducción determinista.
+
+Una partida queda determinada por la semilla del mazo, los cortes aplicados
+(``DeckShuffle.cuts``), las reglas y las cartas colocadas (``PokerGame.moves``):
+tras repartir, cada carta tiene un montón de origen fijo, así que la secuencia
+de jugadas indica también qué montón se volteó en cada turno. Ambas listas
+solo crecen, de modo que el registro es append-only y sirve de auditoría.
+
+Formato (little-endian):
+    cabecera   '<2sBBQH'  magic b'PL', versión, flags, initial_seed, número de cortes
+               flags: bit 0 hay semilla, bit 2 iniciada, bit 3 hay carta volteada sin
+               colocar, bits 4-7 índice de las reglas en ``GAME_RULES`` (en la versión 1,
+               bit 1 = reglas 'alternative')
+    cortes     un byte por corte (1-51)
+    jugadas    '<B' número de jugadas y una carta (0-51) por jugada
+    pendiente  la carta volteada (solo con el bit 3)
+"""
+import struct
+
+from app.models.cards import DECK_SIZE, PILE_OF, VALUES, card_to_str
+from app.models.deck import DeckShuffle
+from app.models.game import CARDS_PER_PILE, PokerGame
+from app.models.rules import GAME_RULES
+
+LOG_MAGIC = b'PL'
+LOG_VERSION = 2
+
+_HEADER = struct.Struct('<2sBBQH')
+_HAS_SEED = 0x01
+_ALTERNATIVE = 0x02  # Solo versión 1
+_STARTED = 0x04
+_PENDING = 0x08
+_RULES_SHIFT = 4
+_MAX_RULES = 1 << (8 - _RULES_SHIFT)
+
+
+def encode_log(game):
+    """Registro de eventos de una partida (unas decenas de bytes); ValueError con más de ``MAX_CUTS`` cortes"""
+    deck = game.deck
+    flags = 0
+    if deck.initial_seed is not None:
+        flags |= _HAS_SEED
+    try:
+        rules_index = GAME_RULES.index(game.game_rules)
+    except ValueError:
+        raise ValueError(f'Partida no serializable: reglas {game.game_rules!r} no registradas') from None
+    if rules_index >= _MAX_RULES:
+        raise ValueError(f'Partida no serializable: el registro admite {_MAX_RULES} reglas como mucho')
+    flags |= rules_index << _RULES_SHIFT
+    if game.status != 'waiting':
+        flags |= _STARTED
+    if game.current_card is not None:
+        flags |= _PENDING
+
+    try:
+        header = _HEADER.pack(LOG_MAGIC, LOG_VERSION, flags, deck.initial_seed or 0, len(deck.cuts))
+    except struct.error as e:
+        raise ValueError(f'Partida no serializable: {e}') from e
+    parts = [header, deck.cuts.tobytes(), bytes((len(game.moves),)), game.moves.tobytes()]
+    if game.current_card is not None:
+        parts.append(bytes((game.current_card,)))
+    return b''.join(parts)
+
+
+def decode_log(data):
+    """Leer un registro: devuelve los argumentos de ``replay``"""
+    try:
+        magic, version, flags, initial_seed, cuts_count = _HEADER.unpack_from(data, 0)
+    except struct.error as e:
+        raise ValueError(f'Registro no válido: {e}') from e
+    if magic != LOG_MAGIC or version not in (1, LOG_VERSION):
+        raise ValueError(f'Registro no válido (magic {magic!r}, versión {version})')
+    if version == 1:
+        game_rules = 'alternative' if flags & _ALTERNATIVE else 'original'
+    elif flags >> _RULES_SHIFT < len(GAME_RULES):
+        game_rules = GAME_RULES[flags >> _RULES_SHIFT]
+    else:
+        raise ValueError(f'Registro no válido (reglas {flags >> _RULES_SHIFT})')
+
+    offset = _HEADER.size
+    cuts = bytes(data[offset:offset + cuts_count])
+    offset += cuts_count
+    if len(cuts) != cuts_count or offset >= len(data):
+        raise ValueError('Registro truncado')
+    moves_count = data[offset]
+    moves = bytes(data[offset + 1:offset + 1 + moves_count])
+    offset += 1 + moves_count
+    current_card = None
+    if flags & _PENDING:
+        if offset >= len(data):
+            raise ValueError('Registro truncado')
+        current_card = data[offset]
+        offset += 1
+    if len(moves) != moves_count or offset != len(data):
+        raise ValueError('Registro truncado')
+
+    return {
+        'initial_seed': initial_seed if flags & _HAS_SEED else None,
+        'cuts': cuts,
+        'game_rules': game_rules,
+        'started': bool(flags & _STARTED),
+        'moves': moves,
+        'current_card': current_card
+    }
+
+
+def deal_sources(deck_order):
+    """Montón en el que se reparte cada carta (índice = carta) para un mazo de 52"""
+    sources = [None] * DECK_SIZE
+    for position, card in enumerate(deck_order):
+        sources[card] = VALUES[position // CARDS_PER_PILE]
+    return sources
+
+
+def _flip(game, sources, card):
+    if card >= DECK_SIZE:
+        raise ValueError(f'Registro no válido: carta {card}')
+    if game.status != 'playing' or game.flip_card_from_pile(sources[card]) != card:
+        raise ValueError(f'Registro no válido: {card_to_str(card)} no es la siguiente carta a voltear')
+
+
+def replay(initial_seed, cuts, game_rules='original', started=True, moves=(), current_card=None):
+    """Reconstruir una partida jugando de nuevo sus cortes y jugadas"""
+    deck = DeckShuffle(initial_seed=initial_seed)
+    for cut_point in cuts:
+        if cut_point < 1 or cut_point > 51:
+            raise ValueError(f'Registro no válido: corte {cut_point}')
+        deck.cut_and_shuffle(cut_point)
+    game = PokerGame(deck, game_rules=game_rules)
+    if not started:
+        if moves or current_card is not None:
+            raise ValueError('Registro no válido: jugadas en una partida sin iniciar')
+        return game
+
+    sources = deal_sources(deck.deck)
+    game.start_game()
+    for card in moves:
+        _flip(game, sources, card)
+        if not game.place_card(PILE_OF[card])['success']:
+            raise ValueError(f'Registro no válido: no se pudo colocar {card_to_str(card)}')
+    if current_card is not None:
+        _flip(game, sources, current_card)
+    return game
+
+
+def game_from_log(data):
+    """Partida reconstruida a partir de ``encode_log``"""
+    return replay(**decode_log(data))
@@ -0,0 +1,161 @@
+"""
+Motor de reglas declarativo compartido por todas las variantes del juego.
+
+Una variante es una lista ordenada de reglas sobre las condiciones de la
+jugada que acaba de colocarse (el montón se completa, la carta se volteó de
+ese mismo montón, le quedan cartas boca abajo, es el 4to Rey...). La primera
+regla cuyas condiciones se cumplen termina la partida; si ninguna se cumple,
+sigue en juego.
+
+``compile_rules`` evalúa la lista una sola vez para las 2^7 combinaciones de
+condiciones y deja una tupla de ``Transition``: en cada jugada basta calcular
+la máscara con ``move_conditions`` e indexar la tabla, así que añadir una
+variante no cuesta nada por jugada. La usan ``PokerGame.place_card``, el
+predictor (``app.models.predictor``) y el simulador en lote
+(``app.services.batch_simulator``).
+"""
+from app.models.cards import VALUES
+
+KING = len(VALUES) - 1
+
+# Condiciones de una jugada, con la carta ya colocada (bits de la máscara)
+FILLS = 1 << 0  # El montón destino llegó a 4 cartas
+OWN_SOURCE = 1 << 1  # La carta se volteó del mismo montón en que se coloca
+SOURCE_EMPTY = 1 << 2  # Al montón destino no le quedan cartas boca abajo
+IS_KING = 1 << 3  # La carta es un Rey
+FOURTH_KING = 1 << 4  # Es un Rey y ya se habían revelado 3
+NO_FACE_DOWN = 1 << 5  # No quedan cartas boca abajo en ningún montón
+BOARD_FULL = 1 << 6  # Los 13 montones tienen sus 4 cartas
+CONDITION_COUNT = 7
+
+REASON_OWN_PILE = 'own_pile'
+REASON_FOURTH_KING = 'fourth_king'
+
+# Paso especial de una variante: a partir de aquí, si la carta es un Rey, cuenta como revelado
+REVEAL_KING = 'reveal_king'
+
+WON_MESSAGE = '🎉 ¡GANASTE!'
+
+
+class Rule:
+    """Termina la partida si se cumplen todas las condiciones ``when``; gana si además se cumplen ``wins_if``"""
+
+    __slots__ = ('name', 'when', 'wins_if', 'reason', 'won_message', 'lost_message')
+
+    def __init__(self, name, when, wins_if=0, reason=None, won_message=WON_MESSAGE, lost_message=None):
+        self.name = name
+        self.when = when
+        self.wins_if = wins_if
+        self.reason = reason
+        self.won_message = won_message
+        self.lost_message = lost_message  # Puede usar {pile}: el montón destino
+
+
+class Transition:
+    """Efecto precompilado de una jugada: reyes que suma y, si termina, status, razón y mensaje"""
+
+    __slots__ = ('kings', 'status', 'reason', 'message')
+
+    def __init__(self, kings=0, status=None, reason=None, message=None):
+        self.kings = kings
+        self.status = status  # None = la partida sigue
+        self.reason = reason
+        self.message = message
+
+    def __repr__(self):
+        return f'Transition(kings={self.kings}, status={self.status!r}, reason={self.reason!r})'
+
+
+class RuleTable(tuple):
+    """
+    Tupla de ``Transition`` indexada por máscara. ``quiet``: las jugadas que ni
+    completan un montón ni son un Rey nunca cambian nada (los bucles calientes
+    pueden saltarse la consulta).
+    """
+
+    quiet = False
+
+
+def move_conditions(fills, own_source, source_empty, king, kings_before, no_face_down, board_full):
+    """
+    Máscara de condiciones de una jugada. Acepta booleanos o arrays booleanos
+    de NumPy (el simulador en lote calcula todas las filas a la vez).
+    """
+    return (
+        fills
+        | (own_source << 1)
+        | (source_empty << 2)
+        | (king << 3)
+        | ((king & (kings_before == 3)) << 4)
+        | (no_face_down << 5)
+        | (board_full << 6)
+    )
+
+
+def compile_rules(steps):
+    """``RuleTable`` con la ``Transition`` de cada máscara de ``move_conditions``"""
+    table = []
+    for mask in range(1 << CONDITION_COUNT):
+        kings = 0
+        transition = None
+        for step in steps:
+            if step == REVEAL_KING:
+                kings = 1 if mask & IS_KING else 0
+            elif mask & step.when == step.when:
+                won = mask & step.wins_if == step.wins_if
+                transition = Transition(
+                    kings,
+                    'won' if won else 'lost',
+                    None if won else step.reason,
+                    step.won_message if won else step.lost_message
+                )
+                break
+        table.append(transition or Transition(kings))
+    table = RuleTable(table)
+    # Sin completar montón ni Rey, BOARD_FULL y FOURTH_KING no pueden cumplirse
+    table.quiet = all(
+        transition.status is None and not transition.kings
+        for mask, transition in enumerate(table) if not mask & (FILLS | IS_KING | BOARD_FULL | FOURTH_KING)
+    )
+    return table
+
+
+_FOURTH_KING_RULE = Rule(
+    'fourth_king', when=FOURTH_KING, wins_if=NO_FACE_DOWN, reason=REASON_FOURTH_KING,
+    lost_message='💀 ¡Perdiste! Salió el 4to Rey antes de completar todo'
+)
+_BOARD_CLEAR_RULE = Rule('board_clear', when=BOARD_FULL | NO_FACE_DOWN)
+_OWN_PILE_LOST = '💀 ¡Perdiste! Completaste {pile} desde su propio montón'
+
+RULE_SETS = {
+    # Reglas originales (del video del docente): pierdes si completas un montón desde
+    # sí mismo y no le quedan cartas boca abajo, salvo que sea la jugada que completa todo
+    'original': (
+        Rule('own_pile', when=FILLS | OWN_SOURCE | SOURCE_EMPTY, wins_if=BOARD_FULL | NO_FACE_DOWN,
+             reason=REASON_OWN_PILE, won_message='🎉 ¡GANASTE! Completaste todas las pilas',
+             lost_message=_OWN_PILE_LOST),
+        REVEAL_KING,
+        _FOURTH_KING_RULE,
+        _BOARD_CLEAR_RULE,
+    ),
+    # Reglas alternativas (implementación anterior): pierdes si completas un montón
+    # desde sí mismo aunque le queden cartas, salvo que sea la jugada que completa todo
+    'alternative': (
+        Rule('own_pile', when=FILLS | OWN_SOURCE, wins_if=BOARD_FULL | NO_FACE_DOWN,
+             reason=REASON_OWN_PILE, lost_message=_OWN_PILE_LOST),
+        REVEAL_KING,
+        _FOURTH_KING_RULE,
+        _BOARD_CLEAR_RULE,
+    ),
+}
+
+RULE_TABLES = {name: compile_rules(steps) for name, steps in RULE_SETS.items()}
+GAME_RULES = tuple(RULE_SETS)
+
+
+def rule_table(game_rules):
+    """Tabla compilada de una variante (ValueError si no existe)"""
+    try:
+        return RULE_TABLES[game_rules]
+    except KeyError:
+        raise ValueError(f'Reglas desconocidas: {game_rules!r} (disponibles: {", ".join(GAME_RULES)})') from None
@@ -1,10 +1,132 @@
-from flask import Blueprint, request, jsonify
-from app.models.deck import DeckShuffle
+import json
+import logging
+
+from flask import Blueprint, current_app, request, jsonify
+from app.models.deck import MAX_CUTS, DeckShuffle
 from app.models.game import PokerGame
+from app.models.predictor import predict_game
+from app.models.replay import deal_sources, encode_log, replay
+from app.models.cards import CARD_NAMES, card_to_str, cards_to_packed, cards_to_str
+from app.models.rules import GAME_RULES
+from app.services.game_events import GameEventHub, format_event
+from app.services.cut_table_cache import BUILDING, CutTableCache
+from app.services.game_store import GameStore, VersionConflict, create_game_store
+from app.utils.metrics import admin_authorized, model_timer
+
+try:
+    import msgpack
+except ImportError:  # Opcional: solo para clientes que piden application/msgpack
+    msgpack = None
 
 bp = Blueprint('game', __name__)
+logger = logging.getLogger(__name__)
+
+active_games = GameStore()
+event_hub = GameEventHub()
+cut_tables = None  # CutTableCache de /best-cuts (se crea en init_game_store)
+
+# Formatos de respuesta (cabecera Accept). Los compactos envían cada secuencia de cartas
+# (mazos, montones) empaquetada: cadena de 2 caracteres por carta o bytes con los índices 0-51
+JSON = 'application/json'
+COMPACT_JSON = 'application/vnd.poker.compact+json'
+MSGPACK = 'application/msgpack'
+
+_CARD_SEQUENCES = {
+    JSON: cards_to_str,
+    COMPACT_JSON: cards_to_packed,
+    MSGPACK: bytes
+}
+
+
+def init_game_store(config):
+    """Crear el almacén de partidas según la configuración de la app (GAME_BACKEND)"""
+    global active_games, event_hub, cut_tables
+    active_games = create_game_store(config)
+    event_hub = GameEventHub(queue_size=config.get('EVENTS_QUEUE_SIZE', 8))
+    if cut_tables is not None:
+        cut_tables.close()
+    cut_tables = CutTableCache.from_config(config)
+    active_games.on_change = _publish_change
+    return active_games
+
+
+def _serialize_game_state(game_state, wire=JSON):
+    """Convertir las cartas (enteros) del estado a cadenas (o bytes) para la respuesta"""
+    cards = _CARD_SEQUENCES[wire]
+    return {
+        **game_state,
+        'current_card': card_to_str(game_state['current_card']),
+        'piles': {k: cards(v) for k, v in game_state['piles'].items()}
+    }
+
+
+def _json_bytes(data):
+    """Cuerpo exacto que generaría jsonify (para cachearlo)"""
+    return jsonify(data).get_data()
+
+
+def _game_state_json(game, since=None, wire=JSON):
+    """Estado para el JSON con su ``version``; con ``since`` solo los montones cambiados desde esa versión"""
+    game_state = game.get_game_state() if since is None else game.get_state_delta(since)
+    return {**_serialize_game_state(game_state, wire), 'version': game.state_token}
+
+
+def _wire_format():
+    """Formato de respuesta pedido en ``Accept``: JSON (por defecto), COMPACT_JSON o MSGPACK"""
+    offered = [JSON, COMPACT_JSON] + ([MSGPACK] if msgpack is not None else [])
+    return request.accept_mimetypes.best_match(offered, default=JSON)
+
+
+def _encode(data, wire):
+    """Cuerpo de la respuesta en el formato negociado (los compactos omiten ``message``)"""
+    if wire == JSON:
+        return _json_bytes(data)
+    data = {k: v for k, v in data.items() if k != 'message'}
+    if wire == MSGPACK:
+        return msgpack.packb(data)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def _respond(data, status, wire):
+    response = current_app.response_class(_encode(data, wire), status=status, mimetype=wire)
+    response.vary.add('Accept')
+    return response
+
+
+def _serialize_turns(turns, wire):
+    """Jugadas de /autoplay: ``[[carta, origen], ...]`` o, compacto, 3 caracteres por jugada ("KSK...")"""
+    if wire == JSON:
+        return [[card_to_str(card), source] for card, source in turns]
+    return ''.join([CARD_NAMES[card] + source for card, source in turns])
+
+
+def _state_event(game_id, game, since=None):
+    """Evento SSE ``state`` (completo) o ``delta`` (desde ``since``) con ``id`` = versión"""
+    game_state = _game_state_json(game, since)
+    event = 'state' if game_state.get('full', True) else 'delta'
+    return format_event(event, {'game_id': game_id, 'game_state': game_state}, game.state_token)
+
+
+def _publish_change(game_id, game, previous):
+    """Hook ``on_change`` del almacén: enviar el cambio a los streams abiertos de la partida"""
+    if not event_hub.has_subscribers(game_id):
+        return
+    try:
+        previous_version = None if previous is None else int(previous.rsplit('-', 1)[1])
+        event_hub.publish(game_id, (game.state_id, previous_version, game.version,
+                                    _state_event(game_id, game, previous)))
+    except Exception:
+        # Un stream roto no debe tumbar la jugada que ya se aplicó
+        logger.exception("Error al publicar el cambio de %s", game_id)
+
+
+def stream_snapshot(game_id, since=None):
+    """Estado actual para un stream: ``(state_id, version, evento)`` o None si la partida no existe"""
+    with active_games.locked(game_id) as game:
+        if game is None:
+            return None
+        return game.state_id, game.version, _state_event(game_id, game, since)
 
-active_games = {}
 
 @bp.route('/new', methods=['POST'])
 def create_game():
@@ -13,10 +135,16 @@ def create_game():
         data = request.get_json()
         game_id = data.get('game_id', 'default')
         game_rules = data.get('game_rules', 'original')  # ✨ NUEVO - Recibir reglas
+        wire = _wire_format()
+        
+        if game_rules not in GAME_RULES:
+            return jsonify({
+                'success': False,
+                'error': f'Reglas desconocidas: {game_rules} (disponibles: {", ".join(GAME_RULES)})'
+            }), 400
         
-        if game_id in active_games:
-            print(f"🔄 Eliminando juego anterior: {game_id}")
-            del active_games[game_id]
+        if active_games.discard(game_id):
+            logger.debug("Eliminando juego anterior: %s", game_id)
         
         import hashlib
         game_id_hash = int(hashlib.md5(game_id.encode()).hexdigest()[:8], 16)
@@ -25,29 +153,17 @@ def create_game():
         
         active_games[game_id] = game
         
-        deck_order = deck.get_deck()
-        expected_start = ['AH', '2H', '3H', '4H', '5H', '6H', '7H', '8H', '9H', '0H']
-        is_ordered = deck_order[:10] == expected_start
-        
-        print(f"✨ Juego creado: {game_id}")
-        print(f"   Reglas: {game_rules}")  # ✨ LOG DE REGLAS
-        print(f"   Mazo inicial ordenado: {is_ordered}")
-        print(f"   Primeras 10 cartas: {deck_order[:10]}")
-        print(f"   Shuffle count: {deck.get_shuffle_count()}")
-        print(f"   Initial seed (hash): {game_id_hash}")
-        print(f"   Total de cartas: {len(deck_order)}")
+        logger.info("Juego creado: %s (reglas: %s, seed: %s)", game_id, game_rules, game_id_hash)
         
-        return jsonify({
+        return _respond({
             'success': True,
             'game_id': game_id,
             'message': f'Juego creado exitosamente con reglas {game_rules}',  # ✨ MENSAJE CON REGLAS
-            'game_state': game.get_game_state()
-        }), 201
+            'game_state': _game_state_json(game, wire=wire)
+        }, 201, wire)
         
     except Exception as e:
-        print(f"❌ Error al crear juego: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al crear juego")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -58,40 +174,51 @@ def shuffle_deck():
         data = request.get_json()
         game_id = data.get('game_id', 'default')
         cut_point = data.get('cut_point')
-        
-        if game_id not in active_games:
-            return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
-        
-        if not cut_point or cut_point < 1 or cut_point > 51:
-            return jsonify({'success': False, 'error': 'cut_point debe ser 1-51'}), 400
-        
-        game = active_games[game_id]
-        
-        deck_before = game.deck.get_deck()
-        
-        game.deck.cut_and_shuffle(cut_point)
-        
-        deck_after = game.deck.get_deck()
-        
-        print(f"🔀 BARAJEO #{game.deck.get_shuffle_count()}")
-        print(f"   Punto de corte: {cut_point}")
-        print(f"   Initial seed: {game.deck.initial_seed}")
-        print(f"   Deck antes (primeras 10): {deck_before[:10]}")
-        print(f"   Deck después (primeras 10): {deck_after[:10]}")
-        print(f"   ¿Son diferentes?: {deck_before != deck_after}")
-        print(f"   Últimas 10 cartas después: {deck_after[-10:]}")
-        
-        return jsonify({
-            'success': True, 
-            'shuffle_count': game.deck.get_shuffle_count(),
-            'message': f'Mazo barajeado en posición {cut_point}',
-            'deck_before': deck_before,
-            'deck_after': deck_after,
-            'cut_point': cut_point
-        }), 200
-        
+        include_deck_before = data.get('deck_before', True) is not False
+        wire = _wire_format()
+        cards = _CARD_SEQUENCES[wire]
+        
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+            
+            if not cut_point or cut_point < 1 or cut_point > 51:
+                return jsonify({'success': False, 'error': 'cut_point debe ser 1-51'}), 400
+            
+            if game.deck.get_shuffle_count() >= MAX_CUTS:
+                return jsonify({'success': False, 'error': f'Máximo {MAX_CUTS} barajeos por partida'}), 400
+            
+            deck_before = game.deck.get_deck()
+            
+            with model_timer('cut_and_shuffle'):
+                game.deck.cut_and_shuffle(cut_point)
+            
+            deck_after = game.deck.get_deck()
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Barajeo #%d de %s: corte %d, seed %s, primeras 10 %s -> %s",
+                    game.deck.get_shuffle_count(), game_id, cut_point, game.deck.initial_seed,
+                    cards_to_str(deck_before[:10]), cards_to_str(deck_after[:10])
+                )
+            
+            response = {
+                'success': True, 
+                'shuffle_count': game.deck.get_shuffle_count(),
+                'message': f'Mazo barajeado en posición {cut_point}',
+                'deck_after': cards(deck_after),
+                'cut_point': cut_point
+            }
+            # El cliente ya tiene el mazo anterior (deck_after del barajeo previo): puede omitirlo
+            if include_deck_before:
+                response['deck_before'] = cards(deck_before)
+            
+            return _respond(response, 200, wire)
+        
+    except VersionConflict as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
     except Exception as e:
-        print(f"❌ Error al barajear: {str(e)}")
+        logger.exception("Error al barajear")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -102,32 +229,38 @@ def start_game():
         data = request.get_json()
         game_id = data.get('game_id', 'default')
         
-        if game_id not in active_games:
-            return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
-        
-        game = active_games[game_id]
-        
-        if game.deck.get_shuffle_count() == 0:
-            return jsonify({
-                'success': False, 
-                'error': 'Debes barajear las cartas primero'
-            }), 400
-        
-        game_state = game.start_game()
-        
-        print(f"🚀 Juego iniciado: {game_id}")
-        print(f"   Estado: {game.status}")
-        print(f"   Reglas: {game.game_rules}")  # ✨ LOG DE REGLAS
-        print(f"   Cartas repartidas en cada montón: 4")
-        
-        return jsonify({
-            'success': True,
-            'game_state': game_state,
-            'message': 'Juego iniciado exitosamente'
-        }), 200
-        
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+            
+            if game.status != 'waiting':
+                return jsonify({
+                    'success': False,
+                    'error': f'El juego ya se inició (status: {game.status})'
+                }), 400
+            
+            if game.deck.get_shuffle_count() == 0:
+                return jsonify({
+                    'success': False, 
+                    'error': 'Debes barajear las cartas primero'
+                }), 400
+            
+            with model_timer('start_game'):
+                game.start_game()
+            
+            logger.info("Juego iniciado: %s (reglas: %s)", game_id, game.game_rules)
+            
+            wire = _wire_format()
+            return _respond({
+                'success': True,
+                'game_state': _game_state_json(game, data.get('since'), wire),
+                'message': 'Juego iniciado exitosamente'
+            }, 200, wire)
+        
+    except VersionConflict as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
     except Exception as e:
-        print(f"❌ Error al iniciar juego: {str(e)}")
+        logger.exception("Error al iniciar juego")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -139,41 +272,46 @@ def flip_card():
         game_id = data.get('game_id', 'default')
         pile = data.get('pile')
         
-        if game_id not in active_games:
-            return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
-        
-        if not pile:
-            return jsonify({'success': False, 'error': 'Debe especificar el montón'}), 400
-        
-        game = active_games[game_id]
-        
-        if game.status != 'playing':
-            return jsonify({
-                'success': False, 
-                'error': f'El juego no está en curso (status: {game.status})'
-            }), 400
-        
-        card = game.flip_card_from_pile(pile)
-        
-        if not card:
-            return jsonify({
-                'success': False, 
-                'error': f'No hay cartas boca abajo en {pile}'
-            }), 400
-        
-        print(f"🎴 Carta volteada: {card} desde montón {pile}")
-        
-        return jsonify({
-            'success': True,
-            'card': card,
-            'pile': pile,
-            'game_state': game.get_game_state()
-        }), 200
-        
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+            
+            if not pile:
+                return jsonify({'success': False, 'error': 'Debe especificar el montón'}), 400
+            
+            if game.status != 'playing':
+                return jsonify({
+                    'success': False, 
+                    'error': f'El juego no está en curso (status: {game.status})'
+                }), 400
+            
+            if game.current_card is not None:
+                return jsonify({
+                    'success': False,
+                    'error': 'Ya hay una carta volteada: colócala antes de voltear otra'
+                }), 400
+            
+            with model_timer('flip_card_from_pile'):
+                card = game.flip_card_from_pile(pile)
+            
+            if card is None:
+                return jsonify({
+                    'success': False, 
+                    'error': f'No hay cartas boca abajo en {pile}'
+                }), 400
+            
+            wire = _wire_format()
+            return _respond({
+                'success': True,
+                'card': card_to_str(card),
+                'pile': pile,
+                'game_state': _game_state_json(game, data.get('since'), wire)
+            }, 200, wire)
+        
+    except VersionConflict as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
     except Exception as e:
-        print(f"❌ Error en flip_card: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error en flip_card")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -185,42 +323,115 @@ def place_card():
         game_id = data.get('game_id', 'default')
         pile = data.get('pile')
         
-        if game_id not in active_games:
-            return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
-        
-        if not pile:
-            return jsonify({'success': False, 'error': 'Debe especificar el montón'}), 400
-        
-        game = active_games[game_id]
-        
-        if game.status not in ['playing']:
-            return jsonify({
-                'success': False, 
-                'error': f'El juego no está en curso (status: {game.status})'
-            }), 400
-        
-        if not game.current_card:
-            return jsonify({
-                'success': False, 
-                'error': 'No hay carta actual para colocar'
-            }), 400
-        
-        print(f"📍 Intentando colocar {game.current_card} en montón {pile}")
-        print(f"   Reglas activas: {game.game_rules}")  # ✨ LOG DE REGLAS
-        
-        result = game.place_card(pile)
-        
-        game_state = game.get_game_state()
-        
-        return jsonify({
-            **result,
-            'game_state': game_state
-        }), 200
-        
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+            
+            if not pile:
+                return jsonify({'success': False, 'error': 'Debe especificar el montón'}), 400
+            
+            if game.status not in ['playing']:
+                return jsonify({
+                    'success': False, 
+                    'error': f'El juego no está en curso (status: {game.status})'
+                }), 400
+            
+            if game.current_card is None:
+                return jsonify({
+                    'success': False, 
+                    'error': 'No hay carta actual para colocar'
+                }), 400
+            
+            with model_timer('place_card'):
+                result = game.place_card(pile)
+            
+            wire = _wire_format()
+            game_state = _game_state_json(game, data.get('since'), wire)
+            
+            return _respond({
+                **result,
+                'game_state': game_state
+            }, 200, wire)
+        
+    except VersionConflict as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
     except Exception as e:
-        print(f"❌ Error en place_card: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error en place_card")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bp.route('/play-turn', methods=['POST'])
+def play_turn():
+    """Voltear y colocar en una sola petición (turno completo)"""
+    try:
+        data = request.get_json()
+        game_id = data.get('game_id', 'default')
+        pile = data.get('pile')  # Opcional: por defecto next_flip_pile
+        
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+            
+            with model_timer('play_turn'):
+                result = game.play_turn(pile)
+            if not result['success']:
+                return jsonify({'success': False, 'error': result['message']}), 400
+            
+            wire = _wire_format()
+            return _respond({
+                **result,
+                'card': card_to_str(result['card']),
+                'game_state': _game_state_json(game, data.get('since'), wire)
+            }, 200, wire)
+        
+    except VersionConflict as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        logger.exception("Error en play_turn")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bp.route('/autoplay', methods=['POST'])
+def autoplay():
+    """Jugar en el servidor hasta terminar (o ``max_turns``) y devolver las jugadas"""
+    try:
+        data = request.get_json()
+        game_id = data.get('game_id', 'default')
+        max_turns = data.get('max_turns')
+        if max_turns is not None and (
+                isinstance(max_turns, bool) or not isinstance(max_turns, int) or max_turns < 0):
+            return jsonify({'success': False, 'error': 'max_turns debe ser un entero >= 0'}), 400
+        
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+            
+            if game.status != 'playing':
+                return jsonify({
+                    'success': False,
+                    'error': f'El juego no está en curso (status: {game.status})'
+                }), 400
+            
+            with model_timer('autoplay'):
+                turns, result = game.autoplay(max_turns)
+            
+            logger.info("Autoplay de %s: %d turnos, status %s", game_id, len(turns), game.status)
+            
+            wire = _wire_format()
+            return _respond({
+                'success': True,
+                'turns': _serialize_turns(turns, wire),
+                'turns_count': len(turns),
+                'game_over': result.get('game_over', False),
+                'won': result.get('won'),
+                'message': result.get('message'),
+                'game_state': _game_state_json(game, data.get('since'), wire)
+            }, 200, wire)
+        
+    except VersionConflict as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        logger.exception("Error en autoplay")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -230,19 +441,152 @@ def get_game_state():
     try:
         game_id = request.args.get('game_id', 'default')
         
-        if game_id not in active_games:
-            return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+            
+            # El estado no cambió desde la versión que tiene el cliente
+            token = game.state_token
+            since = request.args.get('since')
+            wire = _wire_format()
+            if request.if_none_match.contains(token):
+                response = current_app.response_class(status=304)
+            elif since is None:
+                # Cuerpo ya codificado mientras la partida no cambie (sondeos repetidos)
+                body = game.cached(('state', wire), lambda: _encode({
+                    'success': True,
+                    'game_state': _game_state_json(game, wire=wire)
+                }, wire))
+                response = current_app.response_class(body, mimetype=wire)
+            else:
+                response = current_app.response_class(_encode({
+                    'success': True,
+                    'game_state': _game_state_json(game, since, wire)
+                }, wire), mimetype=wire)
+            response.vary.add('Accept')
+            response.set_etag(token)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
         
-        game = active_games[game_id]
-        game_state = game.get_game_state()
+    except Exception as e:
+        logger.exception("Error al obtener estado")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bp.route('/predict', methods=['GET'])
+def predict():
+    """Predecir el resultado de la partida jugando en automático desde el estado actual"""
+    try:
+        game_id = request.args.get('game_id', 'default')
         
-        return jsonify({
-            'success': True,
-            'game_state': game_state
-        }), 200
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+            
+            prediction = predict_game(game)
+            
+            return jsonify({
+                'success': True,
+                'game_id': game_id,
+                'game_rules': game.game_rules,
+                'prediction': {**prediction, 'card': card_to_str(prediction['card'])}
+            }), 200
         
     except Exception as e:
-        print(f"❌ Error al obtener estado: {str(e)}")
+        logger.exception("Error en predict")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bp.route('/log', methods=['GET'])
+def game_log():
+    """Registro de eventos de la partida (auditoría) comprobado con una reproducción"""
+    try:
+        game_id = request.args.get('game_id', 'default')
+        
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+            
+            log = encode_log(game)
+            cuts = game.deck.cuts.tolist()
+            replayed = replay(game.deck.initial_seed, cuts, game.game_rules, game.status != 'waiting',
+                              game.moves, game.current_card)
+            sources = deal_sources(replay(game.deck.initial_seed, cuts, started=False).deck.deck)
+            
+            return jsonify({
+                'success': True,
+                'game_id': game_id,
+                'game_rules': game.game_rules,
+                'initial_seed': game.deck.initial_seed,
+                'cuts': cuts,
+                'moves': [{'card': card_to_str(card), 'from': sources[card]} for card in game.moves],
+                'current_card': card_to_str(game.current_card),
+                'status': game.status,
+                'log': log.hex(),
+                'log_size': len(log),
+                'verified': replayed.get_game_state() == game.get_game_state()
+            }), 200
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e), 'verified': False}), 409
+    except Exception as e:
+        logger.exception("Error en log")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bp.route('/best-cuts', methods=['GET'])
+def best_cuts():
+    """Mejores secuencias de cortes para un juego sin barajear (tabla precalculada, O(1))"""
+    try:
+        game_id = request.args.get('game_id', 'default')
+        depth = request.args.get('depth', 2, type=int)
+        cuts = request.args.get('cuts')
+        
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({'success': False, 'error': 'Juego no encontrado'}), 404
+            
+            if game.deck.get_shuffle_count() > 0:
+                return jsonify({
+                    'success': False,
+                    'error': 'La tabla describe cortes desde el mazo sin barajear'
+                }), 400
+            
+            initial_seed, game_rules = game.deck.initial_seed, game.game_rules
+        
+        if depth < 1 or depth > 4:
+            return jsonify({'success': False, 'error': 'depth debe ser 1-4'}), 400
+        
+        # Fuera del lock de la partida: abrir o generar la tabla puede tardar
+        with cut_tables.table(initial_seed, depth) as table:
+            if table == BUILDING:
+                response = jsonify({'success': False, 'error': f'Generando la tabla de profundidad {depth}, reintenta'})
+                response.headers['Retry-After'] = '1'
+                return response, 503
+            if table is None:
+                return jsonify({
+                    'success': False,
+                    'error': f'Tabla de profundidad {depth} no generada (python -m app.services.cut_tree)'
+                }), 404
+            
+            response = {
+                'success': True,
+                'game_id': game_id,
+                'game_rules': game_rules,
+                'best': {length: table.best(length, game_rules) for length in range(1, depth + 1)}
+            }
+            
+            if cuts:
+                sequence = [int(cut) for cut in cuts.split(',')]
+                response['cuts'] = sequence
+                response['outcome'] = table.outcome(sequence, game_rules)
+            
+            return jsonify(response), 200
+        
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.exception("Error en best-cuts")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -253,15 +597,13 @@ def reset_game():
         data = request.get_json()
         game_id = data.get('game_id', 'default')
         
-        if game_id in active_games:
-            del active_games[game_id]
+        active_games.discard(game_id)
         
         deck = DeckShuffle(initial_seed=None, start_ordered=True)
         game = PokerGame(deck)
         active_games[game_id] = game
         
-        print(f"🔄 Juego reseteado: {game_id}")
-        print(f"   Mazo inicial ordenado (primeras 10 cartas): {deck.get_deck()[:10]}")
+        logger.info("Juego reseteado: %s", game_id)
         
         return jsonify({
             'success': True,
@@ -270,42 +612,76 @@ def reset_game():
         }), 200
         
     except Exception as e:
-        print(f"❌ Error al resetear juego: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al resetear juego")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@bp.route('/stats', methods=['GET'])
+def store_stats():
+    """Contadores del almacén de partidas (aciertos, fallos, expulsiones...) y partidas por status y reglas"""
+    return jsonify({**active_games.stats(), 'registry': active_games.counts()}), 200
+
+
+MAX_LIST_LIMIT = 1000
+
+
+@bp.route('/admin/games', methods=['GET'])
+def list_games():
+    """Listado paginado por cursor de las partidas del almacén (para paneles de administración)"""
+    # Un game_id basta para jugar o resetear la partida: sin ADMIN_TOKEN configurado no se lista nada
+    if not admin_authorized():
+        return jsonify({'success': False, 'error': 'Token de administración inválido'}), 403
+    try:
+        limit = int(request.args.get('limit', 100))
+        if not 1 <= limit <= MAX_LIST_LIMIT:
+            raise ValueError
+        games, next_cursor = active_games.list_games(request.args.get('cursor') or None, limit)
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': f'limit debe estar entre 1 y {MAX_LIST_LIMIT} y cursor debe venir de una página anterior'
+        }), 400
+    return jsonify({
+        'success': True,
+        'games': [{'game_id': game_id, 'status': status, 'game_rules': rules} for game_id, status, rules in games],
+        'next_cursor': next_cursor,
+        'counts': active_games.counts()
+    }), 200
+
+
 @bp.route('/debug', methods=['GET'])
 def debug_info():
     """Información de debug sobre juegos activos"""
     try:
         game_id = request.args.get('game_id', 'default')
         
-        if game_id not in active_games:
+        with active_games.locked(game_id) as game:
+            if game is None:
+                return jsonify({
+                    'registry': active_games.counts(),  # El listado completo está en /admin/games
+                    'message': f'Juego {game_id} no encontrado'
+                }), 404
+            
+            debug_data = game.cached('debug', lambda: {
+                'game_id': game_id,
+                'status': game.status,
+                'current_card': card_to_str(game.current_card),
+                'kings_revealed': game.kings_revealed,
+                'shuffle_count': game.deck.get_shuffle_count(),
+                'cards_remaining': len(game.deck.deck),
+                'moves_count': len(game.moves),
+                'face_down_cards': {k: len(v) for k, v in game.face_down_cards.items()},
+                'face_up_cards': {k: len(v) for k, v in game.piles.items()},
+                'game_rules': game.game_rules  # ✨ INCLUIR REGLAS EN DEBUG
+            })
+            
             return jsonify({
-                'active_games': list(active_games.keys()),
-                'message': f'Juego {game_id} no encontrado'
-            }), 404
-        
-        game = active_games[game_id]
-        
-        debug_data = {
-            'game_id': game_id,
-            'status': game.status,
-            'current_card': game.current_card,
-            'kings_revealed': game.kings_revealed,
-            'shuffle_count': game.deck.get_shuffle_count(),
-            'cards_remaining': len(game.deck.deck),
-            'moves_count': len(game.moves),
-            'face_down_cards': {k: len(v) for k, v in game.face_down_cards.items()},
-            'face_up_cards': {k: len(v) for k, v in game.piles.items()},
-            'total_games_active': len(active_games),
-            'game_rules': game.game_rules  # ✨ INCLUIR REGLAS EN DEBUG
-        }
-        
-        return jsonify(debug_data), 200
+                **debug_data,
+                'total_games_active': active_games.counts()['games'],
+                'store': active_games.stats(),
+                'events': event_hub.stats()
+            }), 200
         
     except Exception as e:
-        print(f"❌ Error en debug: {str(e)}")
+        logger.exception("Error en debug")
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Simulador vectorizado (NumPy) de partidas completas en lote.
+
+Reproduce el juego automático de ``PokerGame`` (``start_game``,
+``flip_card_from_pile`` + ``_get_next_flip_pile`` y ``place_card``) para N
+mazos a la vez y para todas las variantes de reglas en la misma pasada: cada una
+de las (a lo sumo) 52 jugadas es una operación sobre arrays de N filas.
+El resultado de cada jugada sale de las tablas de ``app.models.rules``,
+apiladas en arrays (variante, máscara de condiciones).
+"""
+import numpy as np
+
+from app.models.cards import DECK_SIZE, RANK_OF, VALUES
+from app.models import rules
+from app.models.game import CARDS_PER_PILE
+from app.models.rules import CONDITION_COUNT, GAME_RULES, KING, RULE_TABLES, move_conditions
+
+RULE_VARIANTS = GAME_RULES
+
+REASON_NONE = 0
+REASON_OWN_PILE = 1
+REASON_FOURTH_KING = 2
+REASON_NAMES = {REASON_NONE: None, REASON_OWN_PILE: rules.REASON_OWN_PILE, REASON_FOURTH_KING: rules.REASON_FOURTH_KING}
+_REASON_CODES = {name: code for code, name in REASON_NAMES.items()}
+
+PILE_COUNT = len(VALUES)
+
+_RANKS = np.frombuffer(RANK_OF, dtype=np.uint8)
+
+
+# Montón más alto (K→A) con cartas boca abajo para cada máscara de 13 bits
+_TOP_PILE = np.array([mask.bit_length() - 1 for mask in range(1 << PILE_COUNT)], dtype=np.int16)
+
+# Tablas de reglas aplanadas: índice = variante * 2^7 + máscara de condiciones
+_TRANSITIONS = [transition for variant in RULE_VARIANTS for transition in RULE_TABLES[variant]]
+_ENDS = np.array([transition.status is not None for transition in _TRANSITIONS])
+_WINS = np.array([transition.status == 'won' for transition in _TRANSITIONS])
+_REASONS = np.array([_REASON_CODES[transition.reason] for transition in _TRANSITIONS], dtype=np.uint8)
+_KINGS = np.array([transition.kings for transition in _TRANSITIONS], dtype=np.int8)
+
+
+def _simulate(decks, variants):
+    """Simular filas de ``decks`` (M, 52); ``variants``: índice en RULE_VARIANTS de cada fila"""
+    rows = decks.shape[0]
+    face_down = decks.reshape(-1)
+    # Índices planos: fila * 13 + montón (contadores) y fila * 52 + montón * 4 + volteadas (cartas)
+    flipped = np.zeros(rows * PILE_COUNT, dtype=np.int16)
+    fill = np.zeros(rows * PILE_COUNT, dtype=np.int8)
+    pile_mask = np.full(rows, (1 << PILE_COUNT) - 1, dtype=np.int16)
+    total_face_down = np.full(rows, DECK_SIZE, dtype=np.int16)
+    complete = np.zeros(rows, dtype=np.int8)
+    kings = np.zeros(rows, dtype=np.int8)
+    source = np.full(rows, -1, dtype=np.int16)
+
+    won = np.zeros(rows, dtype=bool)
+    reason = np.zeros(rows, dtype=np.uint8)
+    moves = np.zeros(rows, dtype=np.uint8)
+    active = np.arange(rows)
+    table_offset = variants.astype(np.int64) << CONDITION_COUNT
+
+    while active.size:
+        base = active * PILE_COUNT
+        mask = pile_mask[active]
+
+        # Siguiente montón: el de origen si le quedan cartas, si no el primero de K a A
+        src = source[active]
+        src_has_cards = (src >= 0) & ((mask >> np.maximum(src, 0)) & 1).astype(bool)
+        pile = np.where(src_has_cards, src, _TOP_PILE[mask])
+
+        slot = base + pile
+        used = flipped[slot]
+        card = face_down[active * DECK_SIZE + pile * CARDS_PER_PILE + used]
+        flipped[slot] = used + 1
+        pile_mask[active] = np.where(used + 1 == CARDS_PER_PILE, mask & ~(1 << pile), mask)
+        remaining = total_face_down[active] - 1
+        total_face_down[active] = remaining
+        moves[active] += 1
+
+        rank = _RANKS[card].astype(np.int16)
+        target = base + rank
+        completes = fill[target] == CARDS_PER_PILE - 1
+        fill[target] += 1
+        completed = complete[active] + completes
+        complete[active] = completed
+
+        revealed = kings[active]
+        transition = table_offset[active] + move_conditions(
+            completes, rank == pile, flipped[target] == CARDS_PER_PILE, rank == KING,
+            revealed, remaining == 0, completed == PILE_COUNT
+        )
+        kings[active] = revealed + _KINGS[transition]
+        won[active] = _WINS[transition]
+        reason[active] = _REASONS[transition]
+        source[active] = rank
+        active = active[~_ENDS[transition]]
+
+    return won, reason, moves
+
+
+def simulate_batch(decks):
+    """
+    Simular N partidas a partir de un array (N, 52) de órdenes de mazo (enteros 0-51).
+
+    Devuelve ``{'original': {...}, 'alternative': {...}}`` donde cada entrada tiene
+    arrays de N elementos: ``won`` (bool), ``reason`` (REASON_*) y ``moves_count``.
+    """
+    decks = np.asarray(decks, dtype=np.uint8)
+    if decks.ndim != 2 or decks.shape[1] != DECK_SIZE:
+        raise ValueError(f'Se esperaba un array (N, {DECK_SIZE}), llegó {decks.shape}')
+
+    count = decks.shape[0]
+    variants = np.repeat(np.arange(len(RULE_VARIANTS)), count)
+    won, reason, moves = _simulate(np.tile(decks, (len(RULE_VARIANTS), 1)), variants)
+
+    results = {}
+    for index, variant in enumerate(RULE_VARIANTS):
+        rows = slice(index * count, (index + 1) * count)
+        results[variant] = {'won': won[rows], 'reason': reason[rows], 'moves_count': moves[rows]}
+    return results
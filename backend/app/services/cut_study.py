@@ -0,0 +1,171 @@
+"""
+Estudio Monte Carlo de estrategias de corte en paralelo (pool de procesos).
+
+Estima la probabilidad de ganar de cada ``cut_point`` (1-51) y de secuencias
+de varios barajeos, con cada variante de reglas (``GAME_RULES``). Las
+semillas se reparten en bloques a los workers, que devuelven solo contadores,
+así la memoria no crece con el número de partidas.
+
+Nota: el barajeo solo depende de ``initial_seed % 1000`` (ver
+``app.models.deck._seed_key``), de modo que 1000 semillas consecutivas dan la
+probabilidad exacta para hashes de game_id uniformes.
+
+Uso:
+    python -m app.services.cut_study --games 1000 --workers 8 --format csv
+    python -m app.services.cut_study --repeat 3 --sequence 10,20,30 --output study.json
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from app.models.deck import DeckShuffle
+from app.models.predictor import REASON_FOURTH_KING, REASON_OWN_PILE, predict_outcome
+from app.models.rules import GAME_RULES
+
+RULE_VARIANTS = GAME_RULES
+DEFAULT_CHUNK_SIZE = 250
+
+# Contadores por (secuencia, reglas): partidas ganadas, perdidas por montón propio, por 4to Rey
+_WON, _OWN_PILE, _FOURTH_KING = 0, 1, 2
+
+
+def single_cut_sequences(repeat=1):
+    """Una secuencia por cut_point 1-51, repitiendo el mismo corte ``repeat`` veces"""
+    return [(cut_point,) * repeat for cut_point in range(1, 52)]
+
+
+def _evaluate_chunk(task):
+    """Worker: jugar todas las secuencias para las semillas [start, stop)"""
+    start, stop, sequences = task
+    counts = [[[0, 0, 0] for _ in RULE_VARIANTS] for _ in sequences]
+
+    for seed in range(start, stop):
+        for sequence_index, sequence in enumerate(sequences):
+            deck = DeckShuffle(initial_seed=seed)
+            for cut_point in sequence:
+                deck.cut_and_shuffle(cut_point)
+
+            for rules_index, rules in enumerate(RULE_VARIANTS):
+                prediction = predict_outcome(deck.deck, rules)
+                bucket = counts[sequence_index][rules_index]
+                if prediction['status'] == 'won':
+                    bucket[_WON] += 1
+                elif prediction['reason'] == REASON_OWN_PILE:
+                    bucket[_OWN_PILE] += 1
+                elif prediction['reason'] == REASON_FOURTH_KING:
+                    bucket[_FOURTH_KING] += 1
+
+    return stop - start, counts
+
+
+def _chunks(first_seed, games, chunk_size, sequences):
+    for start in range(first_seed, first_seed + games, chunk_size):
+        yield start, min(start + chunk_size, first_seed + games), sequences
+
+
+def _merge(totals, counts):
+    for sequence_totals, sequence_counts in zip(totals, counts):
+        for rules_totals, rules_counts in zip(sequence_totals, sequence_counts):
+            for index, value in enumerate(rules_counts):
+                rules_totals[index] += value
+
+
+def run_study(sequences=None, games=1000, first_seed=0, workers=None,
+              chunk_size=DEFAULT_CHUNK_SIZE, on_progress=None):
+    """
+    Ejecutar el estudio y devolver una fila por (secuencia, reglas).
+
+    sequences: lista de tuplas de cortes (por defecto cada corte 1-51 una vez)
+    games: número de semillas a evaluar, desde ``first_seed``
+    workers: procesos (None = todos los núcleos, 1 = sin pool)
+    on_progress: callback(games_done, games) llamado al llegar cada bloque
+    """
+    sequences = [tuple(sequence) for sequence in (sequences or single_cut_sequences())]
+    totals = [[[0, 0, 0] for _ in RULE_VARIANTS] for _ in sequences]
+    workers = workers or os.cpu_count() or 1
+    done = 0
+
+    def collect(result):
+        nonlocal done
+        chunk_games, counts = result
+        _merge(totals, counts)
+        done += chunk_games
+        if on_progress:
+            on_progress(done, games)
+
+    tasks = _chunks(first_seed, games, chunk_size, sequences)
+    if workers == 1:
+        for task in tasks:
+            collect(_evaluate_chunk(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Mantener como mucho 2 bloques en vuelo por worker: memoria plana
+            pending = set()
+            for task in tasks:
+                pending.add(pool.submit(_evaluate_chunk, task))
+                if len(pending) >= workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        collect(future.result())
+            for future in pending:
+                collect(future.result())
+
+    rows = []
+    for sequence, sequence_totals in zip(sequences, totals):
+        for rules, (won, own_pile, fourth_king) in zip(RULE_VARIANTS, sequence_totals):
+            rows.append({
+                'sequence': '-'.join(str(cut_point) for cut_point in sequence),
+                'shuffles': len(sequence),
+                'game_rules': rules,
+                'games': games,
+                'wins': won,
+                'own_pile_losses': own_pile,
+                'fourth_king_losses': fourth_king,
+                'win_probability': won / games if games else 0.0
+            })
+    return rows
+
+
+def write_rows(rows, output, output_format):
+    if output_format == 'json':
+        json.dump(rows, output, indent=2)
+        output.write('\n')
+    else:
+        writer = csv.DictWriter(output, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Probabilidad de ganar por estrategia de corte')
+    parser.add_argument('--games', type=int, default=1000, help='semillas a simular por secuencia')
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='procesos (por defecto todos los núcleos)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--repeat', type=int, default=1, help='barajeos con el mismo corte (1-51)')
+    parser.add_argument('--sequence', action='append', default=[],
+                        help='secuencia extra de cortes separados por coma, p. ej. 10,20,30')
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+    parser.add_argument('--output', help='archivo de salida (por defecto stdout)')
+    args = parser.parse_args(argv)
+
+    sequences = single_cut_sequences(args.repeat)
+    sequences += [tuple(int(cut) for cut in text.split(',')) for text in args.sequence]
+
+    def progress(done, total):
+        print(f'{done}/{total} semillas', file=sys.stderr)
+
+    rows = run_study(sequences, args.games, args.first_seed, args.workers, args.chunk_size, progress)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as output:
+            write_rows(rows, output, args.format)
+    else:
+        write_rows(rows, sys.stdout, args.format)
+
+
+if __name__ == '__main__':
+    main()
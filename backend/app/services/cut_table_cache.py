@@ -0,0 +1,169 @@
+"""
+Caché de las tablas de cortes de ``/best-cuts`` (``app.services.cut_tree``).
+
+Mantiene abiertas las tablas más usadas en una LRU acotada (cada una es un
+mmap y un descriptor de fichero) y cierra las expulsadas cuando ninguna
+petición las está consultando. Las tablas que faltan se generan en un hilo
+aparte, una sola vez por tabla: las peticiones de otras semillas no esperan
+detrás de una generación, y la que la pidió espera como mucho ``build_wait``
+segundos antes de recibir ``BUILDING`` (la ruta responde 503).
+
+No importa NumPy hasta que hace falta abrir o generar una tabla.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+
+from app.models.deck import SEED_PERIOD
+
+logger = logging.getLogger(__name__)
+
+# Resultado de CutTableCache.table cuando la tabla se está generando todavía
+BUILDING = 'building'
+
+
+class _OpenTable:
+    __slots__ = ('table', 'users', 'evicted')
+
+    def __init__(self, table):
+        self.table = table
+        self.users = 0  # Peticiones consultándola: no se cierra hasta que terminen
+        self.evicted = False
+
+
+class CutTableCache:
+    """
+    Tablas abiertas por ``(semilla % 1000, profundidad)`` con LRU de ``max_tables``
+    (las expulsadas se cierran cuando nadie las usa). Las que no existen y no
+    superan ``build_depth`` se generan en segundo plano (``max_pending`` a la
+    vez como mucho); quien las pide espera hasta ``build_wait`` segundos.
+    """
+
+    def __init__(self, tables_dir, build_depth=2, max_tables=64, build_wait=1.0, max_pending=4):
+        self.tables_dir = tables_dir
+        self.build_depth = build_depth
+        self.max_tables = max_tables
+        self.build_wait = build_wait
+        self.max_pending = max_pending
+        self._tables = OrderedDict()  # clave -> _OpenTable; la menos reciente primero
+        self._building = {}  # clave -> Future de write_cut_table
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get('CUT_TABLES_DIR') or os.path.join('data', 'cut_tables'),
+            build_depth=config.get('CUT_TABLES_ONLINE_DEPTH', 2),
+            max_tables=config.get('CUT_TABLES_CACHE_SIZE', 64),
+            build_wait=config.get('CUT_TABLES_BUILD_WAIT', 1.0)
+        )
+
+    @contextmanager
+    def table(self, initial_seed, depth):
+        """
+        ``with cache.table(seed, depth) as table``: la ``CutTable``, None si no
+        está generada (y es más profunda que ``build_depth``) o ``BUILDING`` si se
+        está generando.
+        """
+        key = (0 if initial_seed is None else initial_seed % SEED_PERIOD, depth)
+        entry = self._acquire(key)
+        if entry is None:
+            future = self._build(key)
+            if future is not None and future is not BUILDING:
+                try:
+                    future.result(timeout=self.build_wait)
+                except FutureTimeout:
+                    future = BUILDING
+                else:
+                    entry = self._acquire(key)
+                    future = None
+            if entry is None:
+                yield future
+                return
+        try:
+            yield entry.table
+        finally:
+            with self._lock:
+                entry.users -= 1
+                close = entry.evicted and not entry.users
+            if close:
+                entry.table.close()
+
+    def _acquire(self, key):
+        """Entrada abierta de la tabla (la abre del disco si existe), ya contada como en uso; o None"""
+        with self._lock:
+            entry = self._tables.get(key)
+            if entry is not None:
+                self._tables.move_to_end(key)
+                entry.users += 1
+                return entry
+        from app.services.cut_tree import CutTable
+        table = CutTable.load(self.tables_dir, *key)
+        if table is None:
+            return None
+        with self._lock:
+            entry = self._tables.get(key)
+            if entry is None:
+                entry = self._tables[key] = _OpenTable(table)
+                table = None
+                expired = self._evict()
+            else:
+                expired = []
+            entry.users += 1
+        if table is not None:
+            table.close()  # Otra petición la abrió a la vez
+        for evicted in expired:
+            evicted.table.close()
+        return entry
+
+    def _evict(self):
+        """Sacar de la LRU las tablas que sobran; devuelve las que ya se pueden cerrar (con el lock)"""
+        closable = []
+        while len(self._tables) > self.max_tables:
+            _, entry = self._tables.popitem(last=False)
+            entry.evicted = True
+            if not entry.users:
+                closable.append(entry)
+        return closable
+
+    def _build(self, key):
+        """
+        Future de la generación de la tabla (compartido por todas las peticiones),
+        None si es demasiado profunda o ``BUILDING`` si ya hay ``max_pending`` en cola
+        """
+        seed_key, depth = key
+        if depth > self.build_depth:
+            return None
+        with self._lock:
+            future = self._building.get(key)
+            if future is None:
+                if len(self._building) >= self.max_pending:
+                    return BUILDING
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cut-tables')
+                from app.services.cut_tree import write_cut_table
+                future = self._executor.submit(write_cut_table, seed_key, depth, self.tables_dir)
+                self._building[key] = future
+                future.add_done_callback(lambda done: self._built(key, done))
+        return future
+
+    def _built(self, key, future):
+        with self._lock:
+            self._building.pop(key, None)
+        if future.exception() is not None:
+            logger.error("No se pudo generar la tabla de cortes %s", key, exc_info=future.exception())
+
+    def close(self):
+        with self._lock:
+            entries = list(self._tables.values())
+            self._tables.clear()
+        for entry in entries:
+            entry.evicted = True
+            if not entry.users:
+                entry.table.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
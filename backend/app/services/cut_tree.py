@@ -0,0 +1,226 @@
+"""
+Enumeración exhaustiva de secuencias de cortes con reutilización de prefijos.
+
+Para una semilla recorre todas las secuencias de 1..k cortes (51^k hojas) nivel
+por nivel: cada nodo del árbol guarda su mazo intermedio, así que cada nivel
+cuesta un barajeo por nodo (una gather con la permutación cacheada del corte)
+y no uno por secuencia completa. El resultado de cada nodo se guarda en una
+tabla binaria en disco que se consulta en O(1) por índice.
+
+Como el barajeo solo depende de ``initial_seed % 1000``, hay a lo sumo 1000
+tablas distintas por profundidad.
+
+Formato (little-endian), versión 2:
+    cabecera   '<4sBBHI'  magic b'PMCT', versión, profundidad, semilla % 1000,
+               CRC32 de los nombres de ``RULE_VARIANTS`` (en orden)
+    resumen    '<II' por nivel y variante: victorias, índice de la primera victoria
+    resultados un byte por secuencia, nivel a nivel; índice = cortes en base 51
+               2 bits por variante de ``RULE_VARIANTS`` (bits 2i, 2i+1 la i-ésima) con
+               su REASON_* de batch_simulator: caben 4 variantes como mucho
+
+Una tabla de otra versión o generada con otras variantes de reglas se trata
+como no generada (``CutTable.load`` devuelve None) y se vuelve a generar.
+
+Uso:
+    python -m app.services.cut_tree --game-id game-1234 --depth 3 --output-dir data/cut_tables
+"""
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from app.models.cards import DECK_SIZE
+from app.models.deck import SEED_PERIOD, riffle_permutation
+from app.services.batch_simulator import REASON_NAMES, RULE_VARIANTS, simulate_batch
+
+MAGIC = b'PMCT'
+FORMAT_VERSION = 2
+CUTS = 51
+MAX_DEPTH = 4
+NO_WIN = 0xFFFFFFFF
+
+_HEADER = struct.Struct('<4sBBHI')
+_PREFIX = struct.Struct('<4sB')  # Magic y versión: lo que se puede leer de cualquier versión
+_REASON_BITS = 2
+_MAX_VARIANTS = 8 // _REASON_BITS
+RULES_CHECKSUM = zlib.crc32(','.join(RULE_VARIANTS).encode())
+_SUMMARY = struct.Struct('<II')
+_CHUNK_PARENTS = 2048
+
+
+def seed_key_for(initial_seed):
+    """Semilla normalizada (None equivale a 0: sin términos de semilla)"""
+    return 0 if initial_seed is None else initial_seed % SEED_PERIOD
+
+
+def table_filename(seed_key, depth):
+    return f'cuts_d{depth}_s{seed_key:03d}.bin'
+
+
+def sequence_index(cuts):
+    """Índice de una secuencia de cortes (1-51) dentro de su nivel"""
+    index = 0
+    for cut_point in cuts:
+        if cut_point < 1 or cut_point > CUTS:
+            raise ValueError(f'cut_point debe ser 1-{CUTS}, llegó {cut_point}')
+        index = index * CUTS + (cut_point - 1)
+    return index
+
+
+def sequence_from_index(index, length):
+    cuts = []
+    for _ in range(length):
+        index, digit = divmod(index, CUTS)
+        cuts.append(digit + 1)
+    return cuts[::-1]
+
+
+def _encode_outcomes(results):
+    outcomes = np.zeros(len(results[RULE_VARIANTS[0]]['reason']), dtype=np.uint8)
+    for index, rules in enumerate(RULE_VARIANTS):
+        outcomes |= results[rules]['reason'].astype(np.uint8) << (_REASON_BITS * index)
+    return outcomes
+
+
+def build_cut_table(initial_seed, depth):
+    """Calcular los resultados de todas las secuencias de 1..depth cortes; devuelve los bytes de la tabla"""
+    if not 1 <= depth <= MAX_DEPTH:
+        raise ValueError(f'depth debe ser 1-{MAX_DEPTH}')
+    if len(RULE_VARIANTS) > _MAX_VARIANTS:
+        raise ValueError(
+            f'La tabla de cortes guarda {_MAX_VARIANTS} variantes de reglas como mucho, hay {len(RULE_VARIANTS)}'
+        )
+    seed_key = seed_key_for(initial_seed)
+
+    levels = []
+    parents = np.arange(DECK_SIZE, dtype=np.uint8)[np.newaxis, :]
+    for level in range(depth):
+        permutations = np.array(
+            [riffle_permutation(DECK_SIZE, cut_point, level, seed_key) for cut_point in range(1, CUTS + 1)],
+            dtype=np.intp
+        )
+        keep_decks = level < depth - 1
+        outcomes = np.empty(parents.shape[0] * CUTS, dtype=np.uint8)
+        children_levels = []
+
+        for start in range(0, parents.shape[0], _CHUNK_PARENTS):
+            chunk = parents[start:start + _CHUNK_PARENTS]
+            # (P, 51, 52): hijo (p, c) = mazo del padre p tras el corte c + 1
+            children = np.take(chunk, permutations, axis=1).reshape(-1, DECK_SIZE)
+            outcomes[start * CUTS:start * CUTS + children.shape[0]] = _encode_outcomes(simulate_batch(children))
+            if keep_decks:
+                children_levels.append(children)
+
+        levels.append(outcomes)
+        if keep_decks:
+            parents = np.concatenate(children_levels)
+
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, depth, seed_key, RULES_CHECKSUM)]
+    for outcomes in levels:
+        for index in range(len(RULE_VARIANTS)):
+            wins = ((outcomes >> (_REASON_BITS * index)) & 0b11) == 0
+            first = int(np.argmax(wins)) if wins.any() else NO_WIN
+            parts.append(_SUMMARY.pack(int(wins.sum()), first))
+    parts.extend(outcomes.tobytes() for outcomes in levels)
+    return b''.join(parts)
+
+
+def write_cut_table(initial_seed, depth, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, table_filename(seed_key_for(initial_seed), depth))
+    data = build_cut_table(initial_seed, depth)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as output:
+        output.write(data)
+    os.replace(temporary, path)
+    return path
+
+
+class CutTable:
+    """Tabla de resultados en disco (mmap); cada consulta es O(1)"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as source:
+            self._data = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        if not self.is_current(self._data):
+            self._data.close()
+            raise ValueError(f'Tabla de cortes no válida o de otra versión: {path}')
+        _, _, self.depth, self.seed_key, _ = _HEADER.unpack_from(self._data, 0)
+
+        summary_offset = _HEADER.size
+        self._summaries = {}
+        offset = summary_offset + _SUMMARY.size * len(RULE_VARIANTS) * self.depth
+        self._level_offsets = []
+        for level in range(1, self.depth + 1):
+            for variant_index, rules in enumerate(RULE_VARIANTS):
+                position = summary_offset + _SUMMARY.size * ((level - 1) * len(RULE_VARIANTS) + variant_index)
+                self._summaries[(level, rules)] = _SUMMARY.unpack_from(self._data, position)
+            self._level_offsets.append(offset)
+            offset += CUTS ** level
+
+    @staticmethod
+    def is_current(data):
+        """True si ``data`` empieza con la cabecera de esta versión y estas variantes de reglas"""
+        if len(data) < _HEADER.size or _PREFIX.unpack_from(data, 0) != (MAGIC, FORMAT_VERSION):
+            return False
+        return _HEADER.unpack_from(data, 0)[4] == RULES_CHECKSUM
+
+    @classmethod
+    def load(cls, tables_dir, initial_seed, depth):
+        """Abrir la tabla de una semilla, o None si no se ha generado (o es de otra versión o reglas)"""
+        path = os.path.join(tables_dir, table_filename(seed_key_for(initial_seed), depth))
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as source:
+            if not cls.is_current(source.read(_HEADER.size)):
+                return None
+        return cls(path)
+
+    def outcome(self, cuts, game_rules='original'):
+        """Resultado de jugar tras la secuencia ``cuts`` (1..depth cortes)"""
+        if not 1 <= len(cuts) <= self.depth:
+            raise ValueError(f'La secuencia debe tener 1-{self.depth} cortes')
+        code = self._data[self._level_offsets[len(cuts) - 1] + sequence_index(cuts)]
+        reason = (code >> (_REASON_BITS * RULE_VARIANTS.index(game_rules))) & 0b11
+        return {'status': 'lost' if reason else 'won', 'reason': REASON_NAMES[reason]}
+
+    def best(self, length, game_rules='original'):
+        """Victorias y primera secuencia ganadora entre todas las de ``length`` cortes"""
+        wins, first = self._summaries[(length, game_rules)]
+        return {
+            'sequences': CUTS ** length,
+            'wins': wins,
+            'win_probability': wins / CUTS ** length,
+            'winning_cuts': None if first == NO_WIN else sequence_from_index(first, length)
+        }
+
+    def close(self):
+        self._data.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tabla exhaustiva de secuencias de cortes')
+    seed = parser.add_mutually_exclusive_group(required=True)
+    seed.add_argument('--game-id', help='game_id (se usa su hash como en /new)')
+    seed.add_argument('--seed', type=int, help='initial_seed directa')
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--output-dir', default=os.path.join('data', 'cut_tables'))
+    args = parser.parse_args(argv)
+
+    initial_seed = args.seed
+    if args.game_id is not None:
+        initial_seed = int(hashlib.md5(args.game_id.encode()).hexdigest()[:8], 16)
+
+    path = write_cut_table(initial_seed, args.depth, args.output_dir)
+    table = CutTable(path)
+    for rules in RULE_VARIANTS:
+        print(rules, table.best(args.depth, rules))
+    print(path)
+
+
+if __name__ == '__main__':
+    main()
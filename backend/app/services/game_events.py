@@ -0,0 +1,97 @@
+"""
+Difusión de cambios de partidas a suscriptores asyncio (Server-Sent Events).
+
+Las rutas Flask modifican las partidas en hilos del servidor; cada cambio se
+publica aquí una sola vez (los bytes del evento SSE ya formateados) y se
+reparte con ``call_soon_threadsafe`` a las colas de los suscriptores de ese
+game_id. Cada cola es acotada: si un suscriptor lento la llena se vacía y
+recibe ``RESYNC``, que el stream resuelve enviando el estado completo. Así la
+memoria por suscriptor no crece aunque no lea.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+RESYNC = None  # Marca en la cola: el suscriptor perdió eventos y necesita el estado completo
+
+
+def format_event(event, data, event_id=None):
+    """Codificar un evento SSE (``data`` se serializa como JSON en una línea)"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"), ensure_ascii=False)}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+class Subscriber:
+    """Cola acotada de un stream; solo se usa desde su event loop"""
+
+    __slots__ = ('game_id', 'loop', 'queue', 'dropped')
+
+    def __init__(self, game_id, loop, queue_size):
+        self.game_id = game_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Descartar lo pendiente: el estado completo lo sustituye
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            self.dropped += 1
+
+
+class GameEventHub:
+    """Suscriptores por game_id; ``publish`` se puede llamar desde cualquier hilo"""
+
+    def __init__(self, queue_size=8):
+        self.queue_size = queue_size
+        self._subscribers = {}  # game_id -> set(Subscriber)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, game_id, loop=None):
+        subscriber = Subscriber(game_id, loop or asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(game_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.game_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.game_id]
+
+    def has_subscribers(self, game_id):
+        return game_id in self._subscribers
+
+    def publish(self, game_id, message):
+        """Entregar ``message`` (p. ej. ``(state_id, version, bytes)``) a los suscriptores de game_id"""
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(game_id, ()))
+            self.published += 1
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, message)
+            except RuntimeError:
+                # Event loop cerrado: el stream ya terminó
+                self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'games': len(self._subscribers),
+                'subscribers': sum(len(subscribers) for subscribers in self._subscribers.values()),
+                'published': self.published
+            }
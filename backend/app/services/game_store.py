@@ -0,0 +1,534 @@
+"""
+Almacén acotado de partidas activas.
+
+Sustituye al diccionario ``active_games``: limita el número de partidas en
+memoria (LRU), expulsa las inactivas más de ``ttl`` segundos y, si se indica
+``spill_path``, guarda las expulsadas en un SQLite local (su registro de
+eventos, ver ``app.models.replay``) para recuperarlas de forma transparente
+en el siguiente acceso. Mientras una partida expulsada se escribe en disco,
+quien la busque espera a que termine en vez de no encontrarla.
+
+Las partidas se reparten en shards con su propio lock, y cada partida tiene
+además un lock propio: ``locked(game_id)`` serializa las operaciones sobre una
+misma partida mientras partidas distintas avanzan en paralelo. Una partida
+bloqueada no se expulsa. Con varios shards el límite y el orden LRU se aplican
+por shard (``max_games / shards`` cada uno).
+
+Si se asigna ``on_change(game_id, game, previous_token)``, se llama al salir de
+``locked`` cuando la partida cambió (con el lock aún tomado, así los cambios de
+una partida se notifican en orden) y en ``put`` con ``previous_token=None``.
+Lo usa el canal de eventos (``app.services.game_events``).
+
+``counts()`` da las partidas por status y reglas y ``list_games(cursor, limit)``
+las lista por páginas sin recorrer el almacén: ``GameRegistry`` mantiene los
+contadores y un índice por orden de alta al crear, jugar, terminar, expulsar
+o eliminar partidas.
+
+``create_game_store`` elige el backend según ``GAME_BACKEND``: este almacén en
+memoria (un proceso) o ``SQLiteGameStore`` (varios procesos, ver
+``app.services.sqlite_store``). Ambos ofrecen la misma interfaz.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from app.models.game import STATUSES
+from app.models.replay import encode_log, game_from_log
+from app.models.rules import GAME_RULES
+
+logger = logging.getLogger(__name__)
+
+GAME_BACKENDS = ('memory', 'sqlite')
+
+
+class VersionConflict(Exception):
+    """La partida cambió en otro proceso entre la lectura y la escritura"""
+
+    def __init__(self, game_id):
+        super().__init__(f'El juego {game_id} cambió en otra petición, reintenta')
+        self.game_id = game_id
+
+
+def registry_key(game):
+    """Clave de los contadores del registro: ``(status, game_rules)``"""
+    return game.status, game.game_rules
+
+
+def format_counts(counts):
+    """Contadores ``{(status, reglas): partidas}`` en el formato de ``counts()``"""
+    by_status = dict.fromkeys(STATUSES, 0)
+    by_rules = dict.fromkeys(GAME_RULES, 0)
+    by_status_and_rules = {status: dict.fromkeys(GAME_RULES, 0) for status in STATUSES}
+    for (status, rules), games in counts.items():
+        if not games:
+            continue
+        by_status[status] = by_status.get(status, 0) + games
+        by_rules[rules] = by_rules.get(rules, 0) + games
+        by_status_and_rules.setdefault(status, {})[rules] = games
+    return {
+        'games': sum(by_status.values()),
+        'by_status': by_status,
+        'by_rules': by_rules,
+        'by_status_and_rules': by_status_and_rules
+    }
+
+
+class GameRegistry:
+    """
+    Índice de partidas del almacén en memoria: contadores por (status, reglas)
+    y orden de alta para paginar. Altas, bajas y cambios son O(1); una página
+    es O(log n + limit). Las bajas dejan huecos en el orden que se compactan
+    cuando superan a las partidas vivas (coste amortizado O(1)).
+    """
+
+    _COMPACT_MIN = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = {}  # game_id -> [secuencia de alta, clave]
+        self._order = []  # (secuencia, game_id) en orden creciente, con huecos
+        self._sequence = 0
+        self._counts = {}  # (status, reglas) -> partidas
+
+    def _add_count(self, key, amount):
+        self._counts[key] = self._counts.get(key, 0) + amount
+
+    def add(self, game_id, key):
+        """Dar de alta (o de nuevo, al final del orden) una partida"""
+        with self._lock:
+            record = self._records.get(game_id)
+            if record is not None:
+                self._add_count(record[1], -1)
+            self._sequence += 1
+            self._records[game_id] = [self._sequence, key]
+            self._order.append((self._sequence, game_id))
+            self._add_count(key, 1)
+            self._compact()
+
+    def update(self, game_id, key):
+        """La partida cambió de status (o de reglas)"""
+        with self._lock:
+            record = self._records.get(game_id)
+            if record is None or record[1] == key:
+                return
+            self._add_count(record[1], -1)
+            self._add_count(key, 1)
+            record[1] = key
+
+    def remove(self, game_id):
+        with self._lock:
+            record = self._records.pop(game_id, None)
+            if record is not None:
+                self._add_count(record[1], -1)
+                self._compact()
+
+    def __contains__(self, game_id):
+        with self._lock:
+            return game_id in self._records
+
+    def _compact(self):
+        holes = len(self._order) - len(self._records)
+        if holes > self._COMPACT_MIN and holes > len(self._records):
+            records = self._records
+            self._order = [
+                (sequence, game_id) for sequence, game_id in self._order
+                if records.get(game_id, (None,))[0] == sequence
+            ]
+
+    def counts(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return format_counts(counts)
+
+    def page(self, cursor=None, limit=100):
+        """
+        Hasta ``limit`` partidas dadas de alta después de ``cursor`` (None = desde
+        el principio): ``([(game_id, status, reglas)...], siguiente cursor o None)``
+        """
+        after = int(cursor) if cursor is not None else 0
+        items = []
+        with self._lock:
+            order = self._order
+            index = bisect_right(order, after, key=lambda item: item[0])
+            while index < len(order) and len(items) < limit:
+                sequence, game_id = order[index]
+                index += 1
+                record = self._records.get(game_id)
+                if record is not None and record[0] == sequence:
+                    items.append((game_id, *record[1]))
+                    after = sequence
+            more = index < len(order)
+        return items, str(after) if more else None
+
+
+class _Entry:
+    __slots__ = ('game', 'last_access', 'lock', 'pins')
+
+    def __init__(self, game, now):
+        self.game = game
+        self.last_access = now
+        self.lock = threading.Lock()
+        self.pins = 0  # Peticiones que usan o esperan la partida: no se puede expulsar
+
+
+class _Shard:
+    __slots__ = ('games', 'pinned', 'spilling', 'lock')
+
+    def __init__(self):
+        self.games = OrderedDict()  # game_id -> _Entry sin fijar; el menos reciente primero
+        self.pinned = {}  # game_id -> _Entry fijada (no se expulsa ni recorre la LRU)
+        self.spilling = {}  # game_id -> Event: expulsada y aún escribiéndose en disco
+        self.lock = threading.Lock()
+
+    def get(self, game_id):
+        entry = self.games.get(game_id)
+        return entry if entry is not None else self.pinned.get(game_id)
+
+    def pop(self, game_id):
+        entry = self.games.pop(game_id, None)
+        return entry if entry is not None else self.pinned.pop(game_id, None)
+
+    def __len__(self):
+        return len(self.games) + len(self.pinned)
+
+
+class GameStore:
+    """Partidas por game_id con LRU, TTL de inactividad, volcado opcional a disco y lock por partida"""
+
+    def __init__(self, max_games=10000, ttl=3600, spill_path=None, shards=1, clock=time.monotonic):
+        self.max_games = max_games
+        self.ttl = ttl
+        self._clock = clock
+        self._shards = [_Shard() for _ in range(shards)]
+        self._shard_capacity = max(1, -(-max_games // shards))
+        self._stats_lock = threading.Lock()
+        self.on_change = None
+        self.registry = GameRegistry()  # Partidas en memoria y volcadas a disco
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.spills = 0
+        self.rehydrations = 0
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._spilled = 0
+        if spill_path:
+            self._db = sqlite3.connect(spill_path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS games (game_id TEXT PRIMARY KEY, data BLOB NOT NULL)')
+            self._db.commit()
+            self._spilled = self._db.execute('SELECT COUNT(*) FROM games').fetchone()[0]
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            max_games=config.get('GAME_STORE_MAX_GAMES', 10000),
+            ttl=config.get('GAME_STORE_TTL', 3600),
+            spill_path=config.get('GAME_STORE_SPILL_PATH'),
+            shards=config.get('GAME_STORE_SHARDS', 1)
+        )
+
+    def _shard(self, game_id):
+        return self._shards[hash(game_id) % len(self._shards)]
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _serialize(self, game):
+        # Las partidas expulsadas están inactivas: basta su registro de eventos (decenas de bytes)
+        return encode_log(game)
+
+    def _deserialize(self, data):
+        return game_from_log(data)
+
+    def _spill(self, game_id, game):
+        """Guardar en disco una partida expulsada (si hay volcado configurado)"""
+        if self._db is None:
+            return
+        data = self._serialize(game)
+        with self._db_lock:
+            self._db.execute('INSERT OR REPLACE INTO games (game_id, data) VALUES (?, ?)', (game_id, data))
+            self._db.commit()
+            self._spilled += 1
+        self._count('spills')
+
+    def _drop_spilled(self, game_id):
+        """Borrar la copia en disco de una partida; True si existía"""
+        if self._db is None:
+            return False
+        with self._db_lock:
+            cursor = self._db.execute('DELETE FROM games WHERE game_id = ?', (game_id,))
+            self._db.commit()
+            if cursor.rowcount:
+                self._spilled -= 1
+                return True
+        return False
+
+    def _take_spilled(self, game_id):
+        """Recuperar (y borrar del disco) una partida volcada, o None"""
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute('SELECT data FROM games WHERE game_id = ?', (game_id,)).fetchone()
+        if row is None:
+            return None
+        self._drop_spilled(game_id)
+        return self._deserialize(row[0])
+
+    def _evict(self, shard, now):
+        """
+        Expulsar del shard las partidas inactivas y las que sobran (LRU); devuelve
+        las expulsadas. Recorre desde la menos reciente y para en la primera que
+        no toca expulsar: O(expulsadas), no O(partidas del shard).
+        """
+        evicted = []
+        games = shard.games
+        while games:
+            game_id, entry = next(iter(games.items()))
+            expired = now - entry.last_access > self.ttl
+            if not expired and len(shard) <= self._shard_capacity:
+                break
+            del games[game_id]
+            if self._db is None:
+                self.registry.remove(game_id)  # Sin volcado a disco la partida deja de existir
+            else:
+                # Hasta que esté en disco, quien la busque espera en vez de no encontrarla
+                shard.spilling[game_id] = threading.Event()
+            self._count('expirations' if expired else 'evictions')
+            evicted.append((game_id, entry))
+        return evicted
+
+    def _spill_evicted(self, shard, evicted):
+        """Escribir en disco las partidas expulsadas (fuera del lock del shard) y retirar sus marcas"""
+        for game_id, entry in evicted:
+            if self._db is None:
+                continue
+            try:
+                self._spill(game_id, entry.game)
+            except Exception:
+                logger.exception("No se pudo volcar la partida %s: sigue en memoria", game_id)
+                with shard.lock:
+                    if shard.get(game_id) is None:
+                        shard.games[game_id] = entry
+                        shard.games.move_to_end(game_id, last=False)
+            finally:
+                with shard.lock:
+                    shard.spilling.pop(game_id).set()
+
+    def _touch(self, shard, game_id, entry, now, pin):
+        """Marcar una entrada como usada ahora y fijarla si ``pin`` (con el lock del shard)"""
+        entry.last_access = now
+        if entry.pins:
+            entry.pins += pin
+        elif pin:
+            del shard.games[game_id]
+            shard.pinned[game_id] = entry
+            entry.pins = pin
+        else:
+            shard.games.move_to_end(game_id)
+
+    def _lookup(self, game_id, pin):
+        """Buscar la entrada de una partida (rehidratándola si hace falta) y opcionalmente fijarla"""
+        shard = self._shard(game_id)
+        while True:
+            with shard.lock:
+                now = self._clock()
+                entry = shard.get(game_id)
+                if entry is not None:
+                    self._touch(shard, game_id, entry, now, pin)
+                    self._count('hits')
+                    evicted = self._evict(shard, now)
+                    break
+                pending = shard.spilling.get(game_id)
+            if pending is None:
+                break
+            pending.wait()  # Se está volcando: al terminar estará en disco
+        if entry is None:
+            game = self._take_spilled(game_id)
+            if game is None:
+                self._count('misses')
+                return None
+            self._count('rehydrations')
+            logger.debug("Partida rehidratada desde disco: %s", game_id)
+            with shard.lock:
+                now = self._clock()
+                entry = shard.get(game_id)
+                if entry is None:
+                    entry = _Entry(game, now)
+                    shard.games[game_id] = entry
+                    if game_id not in self.registry:
+                        # Volcada por un proceso anterior: entra en el registro al recuperarla
+                        self.registry.add(game_id, registry_key(game))
+                self._touch(shard, game_id, entry, now, pin)
+                evicted = self._evict(shard, now)
+        self._spill_evicted(shard, evicted)
+        return entry
+
+    def get(self, game_id, default=None):
+        """Obtener una partida (de memoria o rehidratada del disco) sin bloquearla"""
+        entry = self._lookup(game_id, pin=0)
+        return default if entry is None else entry.game
+
+    @contextmanager
+    def locked(self, game_id):
+        """
+        Usar una partida en exclusiva: ``with store.locked(game_id) as game``.
+        Produce None si no existe. Otras partidas no se bloquean.
+        """
+        while True:
+            entry = self._lookup(game_id, pin=1)
+            if entry is None:
+                yield None
+                return
+            entry.lock.acquire()
+            shard = self._shard(game_id)
+            with shard.lock:
+                current = shard.get(game_id) is entry
+            if current:
+                break
+            # Reemplazada o eliminada mientras esperábamos: buscar de nuevo
+            self._release(shard, game_id, entry)
+
+        on_change = self.on_change
+        previous = entry.game.state_token if on_change is not None else None
+        key = registry_key(entry.game)
+        try:
+            yield entry.game
+            if on_change is not None and entry.game.state_token != previous:
+                on_change(game_id, entry.game, previous)
+        finally:
+            # Aunque la ruta falle: la partida en memoria ya tiene los cambios
+            if registry_key(entry.game) != key:
+                with shard.lock:
+                    if shard.get(game_id) is entry:
+                        self.registry.update(game_id, registry_key(entry.game))
+            self._release(shard, game_id, entry)
+
+    def _release(self, shard, game_id, entry):
+        entry.lock.release()
+        with shard.lock:
+            entry.pins -= 1
+            if not entry.pins and shard.pinned.get(game_id) is entry:
+                # Vuelve a la LRU como la más reciente
+                del shard.pinned[game_id]
+                entry.last_access = self._clock()
+                shard.games[game_id] = entry
+
+    def _wait_spilled(self, shard, game_id):
+        """Con el lock del shard tomado: si la partida se está volcando, soltarlo, esperar y devolver True"""
+        pending = shard.spilling.get(game_id)
+        if pending is None:
+            return False
+        shard.lock.release()
+        try:
+            pending.wait()
+        finally:
+            shard.lock.acquire()
+        return True
+
+    def put(self, game_id, game):
+        shard = self._shard(game_id)
+        with shard.lock:
+            while self._wait_spilled(shard, game_id):
+                pass
+            replaced = shard.pop(game_id) is not None
+            shard.games[game_id] = _Entry(game, self._clock())
+            self.registry.add(game_id, registry_key(game))
+            evicted = self._evict(shard, self._clock())
+        if not replaced:
+            self._drop_spilled(game_id)
+        self._spill_evicted(shard, evicted)
+        if self.on_change is not None:
+            self.on_change(game_id, game, None)
+
+    def discard(self, game_id):
+        """Eliminar una partida de memoria y de disco; True si existía"""
+        shard = self._shard(game_id)
+        with shard.lock:
+            while self._wait_spilled(shard, game_id):
+                pass
+            found = shard.pop(game_id) is not None
+            self.registry.remove(game_id)
+        return self._drop_spilled(game_id) or found
+
+    def __contains__(self, game_id):
+        shard = self._shard(game_id)
+        with shard.lock:
+            if shard.get(game_id) is not None or game_id in shard.spilling:
+                return True
+        if self._db is None:
+            return False
+        with self._db_lock:
+            return self._db.execute('SELECT 1 FROM games WHERE game_id = ?', (game_id,)).fetchone() is not None
+
+    def __getitem__(self, game_id):
+        game = self.get(game_id)
+        if game is None:
+            raise KeyError(game_id)
+        return game
+
+    def __setitem__(self, game_id, game):
+        self.put(game_id, game)
+
+    def __delitem__(self, game_id):
+        if not self.discard(game_id):
+            raise KeyError(game_id)
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def keys(self):
+        keys = []
+        for shard in self._shards:
+            with shard.lock:
+                keys.extend(shard.games.keys())
+                keys.extend(shard.pinned.keys())
+        return keys
+
+    def counts(self):
+        """Partidas (en memoria y volcadas) por status, por reglas y por ambos, sin recorrerlas"""
+        return self.registry.counts()
+
+    def list_games(self, cursor=None, limit=100):
+        """Página de ``(game_id, status, reglas)`` en orden de alta y el cursor de la siguiente (o None)"""
+        return self.registry.page(cursor, limit)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'backend': 'memory',
+                'games_in_memory': len(self),
+                'games_spilled': self._spilled,
+                'max_games': self.max_games,
+                'ttl': self.ttl,
+                'shards': len(self._shards),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'spills': self.spills,
+                'rehydrations': self.rehydrations
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def create_game_store(config):
+    """Crear el almacén de partidas del backend configurado en ``GAME_BACKEND``"""
+    backend = config.get('GAME_BACKEND', 'memory')
+    if backend == 'memory':
+        return GameStore.from_config(config)
+    if backend == 'sqlite':
+        from app.services.sqlite_store import SQLiteGameStore
+        return SQLiteGameStore.from_config(config)
+    raise ValueError(f'GAME_BACKEND debe ser uno de {GAME_BACKENDS}, llegó {backend!r}')
@@ -0,0 +1,316 @@
+"""
+Análisis vectorizado (NumPy) de la calidad del barajeo.
+
+Baraja en lote con ``DeckShuffle.iter_shuffle_many`` una población de mazos
+(semillas aleatorias de 32 bits, como el hash del game_id, y cortes según un
+modelo) y, tras cada barajeo 1..k, mide:
+
+- la matriz de posiciones: fracción de mazos con la carta c en la posición p
+  (uniforme = 1/52) y su distancia de variación total (TVD) por carta;
+- las secuencias ascendentes de cada mazo y la TVD de su distribución frente
+  a la de una permutación uniforme (números eulerianos);
+- cuántos órdenes distintos aparecen y cuántos son alcanzables como máximo.
+
+Ambas TVD son cotas inferiores de la distancia real a la uniforme sobre las
+52! permutaciones (miden una proyección). Como referencia se da la TVD exacta
+del riffle ideal GSR (Bayer y Diaconis) con el mismo número de barajeos.
+
+Nota: el barajeo solo depende de ``initial_seed % 1000`` y del corte, así que
+tras k barajeos hay a lo sumo 1000 x 51^k órdenes posibles.
+
+Uso:
+    python -m app.services.shuffle_quality --decks 1000000 --shuffles 10 --output quality.json
+    python -m app.services.shuffle_quality --cuts uniform --cuts 26 --plot plots/
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+from app.models.cards import DECK_SIZE
+from app.models.deck import SEED_PERIOD, DeckShuffle
+
+CUT_MODELS = ('uniform', 'human')
+DEFAULT_CUT_MODELS = CUT_MODELS
+
+_HASH_CHUNK = 1 << 16  # Filas por bloque al contar órdenes distintos (memoria acotada)
+
+
+@lru_cache(maxsize=None)
+def eulerian_row(n=DECK_SIZE):
+    """Números eulerianos A(n, m), m = 0..n-1: permutaciones de n con m descensos"""
+    row = [1]
+    for size in range(2, n + 1):
+        row = [
+            (m + 1) * (row[m] if m < len(row) else 0) + (size - m) * (row[m - 1] if m > 0 else 0)
+            for m in range(size)
+        ]
+    return tuple(row)
+
+
+def uniform_rising_distribution(n=DECK_SIZE):
+    """P(r secuencias ascendentes) de una permutación uniforme, r = 1..n (índice r - 1)"""
+    total = math.factorial(n)
+    return np.array([float(Fraction(count, total)) for count in eulerian_row(n)])
+
+
+@lru_cache(maxsize=None)
+def gsr_total_variation(shuffles, n=DECK_SIZE):
+    """
+    TVD exacta a la uniforme tras ``shuffles`` riffles GSR: una permutación con
+    r secuencias ascendentes tiene probabilidad C(2^k + n - r, n) / 2^(kn).
+    """
+    hands = 2 ** shuffles
+    uniform = Fraction(1, math.factorial(n))
+    distance = sum(
+        count * abs(Fraction(math.comb(hands + n - rising, n), hands ** n) - uniform)
+        for rising, count in enumerate(eulerian_row(n), start=1)
+    )
+    return float(distance / 2)
+
+
+def parse_cut_model(text):
+    """'uniform', 'human' o un corte fijo 1-51"""
+    if text in CUT_MODELS:
+        return text
+    try:
+        cut_point = int(text)
+    except ValueError:
+        raise ValueError(f'Modelo de corte desconocido: {text!r}') from None
+    if not 1 <= cut_point <= 51:
+        raise ValueError(f'El corte fijo debe estar entre 1 y 51, llegó {cut_point}')
+    return str(cut_point)
+
+
+def sample_cuts(rng, model, decks, shuffles):
+    """
+    Cortes (decks, shuffles) según el modelo: 'uniform' como el barajeo
+    automático del frontend (1-51 equiprobables), 'human' binomial centrado en
+    26 como un corte a mano, o un corte fijo.
+    """
+    if model == 'uniform':
+        return rng.integers(1, 52, size=(decks, shuffles), dtype=np.int64)
+    if model == 'human':
+        return np.clip(rng.binomial(DECK_SIZE, 0.5, size=(decks, shuffles)), 1, 51)
+    return np.full((decks, shuffles), int(model), dtype=np.int64)
+
+
+def _cut_choices(model):
+    return 51 if model in CUT_MODELS else 1
+
+
+def position_counts(decks):
+    """Matriz (52, 52): mazos con la carta c (fila) en la posición p (columna)"""
+    columns = np.ascontiguousarray(decks.T)  # Una fila contigua por posición: bincount mucho más rápido
+    counts = np.empty((DECK_SIZE, DECK_SIZE), dtype=np.int64)
+    for position in range(DECK_SIZE):
+        counts[:, position] = np.bincount(columns[position], minlength=DECK_SIZE)
+    return counts
+
+
+def rising_sequences(decks):
+    """
+    Secuencias ascendentes de cada mazo: 1 + cartas c cuya siguiente (c + 1)
+    quedó por encima de ella. Un riffle a lo sumo duplica su número.
+    """
+    positions = np.empty_like(decks)
+    positions[np.arange(decks.shape[0])[:, None], decks] = np.arange(DECK_SIZE, dtype=decks.dtype)
+    return 1 + np.count_nonzero(positions[:, 1:] < positions[:, :-1], axis=1)
+
+
+def count_distinct(decks):
+    """Órdenes distintos en el lote (hash de 64 bits por fila; colisiones despreciables)"""
+    words = np.ascontiguousarray(decks).view(np.uint32)  # 52 bytes = 13 palabras por mazo
+    weights = np.random.default_rng(DECK_SIZE).integers(1, 2 ** 63, size=words.shape[1], dtype=np.uint64)
+    hashes = np.empty(decks.shape[0], dtype=np.uint64)
+    for start in range(0, decks.shape[0], _HASH_CHUNK):
+        # Aritmética módulo 2^64
+        hashes[start:start + _HASH_CHUNK] = words[start:start + _HASH_CHUNK].astype(np.uint64) @ weights
+    hashes.sort()
+    return int(hashes.size and 1 + np.count_nonzero(hashes[1:] != hashes[:-1]))
+
+
+def position_tvd_floor(decks):
+    """TVD media por carta esperada solo por el muestreo, si los mazos fueran uniformes"""
+    p = 1 / DECK_SIZE
+    return 0.5 * DECK_SIZE * math.sqrt(2 / math.pi) * math.sqrt(p * (1 - p) / decks)
+
+
+def analyze_model(model, decks=100_000, shuffles=10, seed=0, include_matrix=True, on_shuffle=None):
+    """
+    Barajear ``decks`` mazos hasta ``shuffles`` veces con cortes del modelo y
+    devolver una fila de métricas por número de barajeos.
+
+    on_shuffle: callback(model, k) llamado al terminar cada barajeo
+    """
+    rng = np.random.default_rng(seed)
+    seeds = rng.integers(0, 2 ** 32, size=decks, dtype=np.int64)
+    cuts = sample_cuts(rng, model, decks, shuffles)
+    uniform_rising = uniform_rising_distribution()
+    start = time.perf_counter()
+    rows = []
+
+    for k, batch in enumerate(DeckShuffle.iter_shuffle_many(seeds, cuts), start=1):
+        matrix = position_counts(batch) / decks
+        card_tvd = 0.5 * np.abs(matrix - 1 / DECK_SIZE).sum(axis=1)
+
+        rising = rising_sequences(batch)
+        rising_frequency = np.bincount(rising, minlength=DECK_SIZE + 1)[1:] / decks
+
+        row = {
+            'shuffles': k,
+            'distinct_decks': count_distinct(batch),
+            'max_distinct': SEED_PERIOD * _cut_choices(model) ** k,
+            'position_tvd_mean': round(float(card_tvd.mean()), 6),
+            'position_tvd_max': round(float(card_tvd.max()), 6),
+            'position_max_deviation': round(float(np.abs(matrix - 1 / DECK_SIZE).max()), 6),
+            'rising_sequences_mean': round(float(rising.mean()), 4),
+            'rising_sequences': {
+                str(count): round(float(frequency), 6)
+                for count, frequency in enumerate(rising_frequency, start=1) if frequency
+            },
+            'rising_tvd': round(float(0.5 * np.abs(rising_frequency - uniform_rising).sum()), 6),
+            'gsr_tvd': round(gsr_total_variation(k), 6)
+        }
+        if include_matrix:
+            row['position_matrix'] = np.round(matrix, 6).tolist()
+        rows.append(row)
+        if on_shuffle:
+            on_shuffle(model, k)
+
+    return {
+        'cuts': model,
+        'decks': decks,
+        'elapsed_seconds': round(time.perf_counter() - start, 3),
+        'results': rows
+    }
+
+
+def run_analysis(models=DEFAULT_CUT_MODELS, decks=100_000, shuffles=10, seed=0,
+                 include_matrix=True, on_shuffle=None):
+    """Informe completo: un ``analyze_model`` por modelo de corte con la misma semilla"""
+    return {
+        'decks': decks,
+        'shuffles': shuffles,
+        'seed': seed,
+        'position_tvd_floor': round(position_tvd_floor(decks), 6),
+        'uniform_rising_sequences_mean': (DECK_SIZE + 1) / 2,
+        'configurations': [
+            analyze_model(model, decks, shuffles, seed, include_matrix, on_shuffle) for model in models
+        ]
+    }
+
+
+def plot_report(report, directory):
+    """Gráficas PNG del informe (requiere matplotlib); devuelve las rutas escritas"""
+    try:
+        import matplotlib
+    except ImportError:
+        raise RuntimeError('Las gráficas requieren matplotlib (pip install matplotlib)') from None
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    os.makedirs(directory, exist_ok=True)
+    written = []
+
+    def save(figure, name):
+        path = os.path.join(directory, name)
+        figure.tight_layout()
+        figure.savefig(path, dpi=120)
+        plt.close(figure)
+        written.append(path)
+
+    figure, axis = plt.subplots(figsize=(8, 5))
+    for configuration in report['configurations']:
+        ks = [row['shuffles'] for row in configuration['results']]
+        axis.plot(ks, [row['rising_tvd'] for row in configuration['results']], marker='o',
+                  label=f"secuencias ascendentes ({configuration['cuts']})")
+        axis.plot(ks, [row['position_tvd_mean'] for row in configuration['results']], marker='s',
+                  linestyle='--', label=f"posiciones ({configuration['cuts']})")
+    ks = range(1, report['shuffles'] + 1)
+    axis.plot(ks, [gsr_total_variation(k) for k in ks], color='black', linestyle=':', label='riffle GSR ideal')
+    axis.axhline(report['position_tvd_floor'], color='grey', linewidth=0.8)
+    axis.set_xlabel('barajeos')
+    axis.set_ylabel('TVD a la uniforme')
+    axis.set_ylim(0, 1.05)
+    axis.legend(fontsize='small')
+    save(figure, 'tvd.png')
+
+    uniform_rising = uniform_rising_distribution()
+    for configuration in report['configurations']:
+        rows = configuration['results']
+        columns = min(len(rows), 5)
+        lines = math.ceil(len(rows) / columns)
+        figure, axes = plt.subplots(lines, columns, figsize=(3 * columns, 3 * lines), squeeze=False)
+        for axis in axes.flat[len(rows):]:
+            axis.axis('off')
+        for axis, row in zip(axes.flat, rows):
+            image = axis.imshow(row['position_matrix'], vmin=0, vmax=4 / DECK_SIZE, cmap='viridis')
+            axis.set_title(f"{row['shuffles']} barajeo(s)")
+            axis.set_xlabel('posición')
+            axis.set_ylabel('carta')
+        figure.colorbar(image, ax=axes.ravel().tolist(), shrink=0.8)
+        figure.suptitle(f"Matriz de posiciones (cortes {configuration['cuts']})")
+        save(figure, f"positions_{configuration['cuts']}.png")
+
+        figure, axis = plt.subplots(figsize=(8, 5))
+        counts = np.arange(1, DECK_SIZE + 1)
+        for row in rows:
+            frequency = [row['rising_sequences'].get(str(count), 0) for count in counts]
+            axis.plot(counts, frequency, label=f"{row['shuffles']}")
+        axis.plot(counts, uniform_rising, color='black', linestyle=':', label='uniforme')
+        axis.set_xlabel('secuencias ascendentes')
+        axis.set_ylabel('fracción de mazos')
+        axis.legend(title='barajeos', fontsize='small', ncol=2)
+        save(figure, f"rising_{configuration['cuts']}.png")
+
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Calidad del barajeo tras 1..k riffles')
+    parser.add_argument('--decks', type=int, default=100_000, help='mazos por configuración')
+    parser.add_argument('--shuffles', type=int, default=10, help='barajeos máximos (k)')
+    parser.add_argument('--cuts', action='append', type=parse_cut_model, default=[],
+                        help="modelo de corte: uniform, human o un corte fijo 1-51 (repetible)")
+    parser.add_argument('--seed', type=int, default=0, help='semilla del generador de la población')
+    parser.add_argument('--no-matrix', action='store_true', help='no incluir la matriz 52x52 en el JSON')
+    parser.add_argument('--output', help='archivo JSON de salida (por defecto stdout)')
+    parser.add_argument('--plot', metavar='DIR', help='escribir gráficas PNG en DIR (requiere matplotlib)')
+    args = parser.parse_args(argv)
+
+    if args.plot and args.no_matrix:
+        parser.error('--plot necesita la matriz de posiciones (quitar --no-matrix)')
+
+    def progress(model, k):
+        print(f'{model}: {k}/{args.shuffles} barajeos', file=sys.stderr)
+
+    report = run_analysis(args.cuts or DEFAULT_CUT_MODELS, args.decks, args.shuffles, args.seed,
+                          not args.no_matrix, progress)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+            output.write('\n')
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if args.plot:
+        try:
+            for path in plot_report(report, args.plot):
+                print(path, file=sys.stderr)
+        except RuntimeError as error:
+            print(error, file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""
+Almacén de partidas compartido entre procesos (SQLite en modo WAL).
+
+Con varios workers (p. ej. ``gunicorn -w 4``) cada proceso tiene su propia
+memoria, así que una partida creada en uno daría 404 en otro. Este almacén
+guarda cada partida serializada en una fila con un número de versión: WAL
+permite lecturas concurrentes con una escritura, y cada escritura comprueba
+la versión leída (concurrencia optimista). Si otro proceso modificó la
+partida entre medias se lanza ``VersionConflict`` y la ruta responde 409.
+
+Dentro de un proceso, ``locked`` serializa además las peticiones sobre una
+misma partida, así los conflictos solo pueden venir de otros procesos.
+``on_change`` funciona como en ``GameStore`` pero solo ve las escrituras de
+este proceso.
+
+Cada fila guarda también el status y las reglas de la partida, y unos
+triggers mantienen la tabla ``game_counts`` (partidas por status y reglas)
+en la misma transacción de cada escritura: ``counts()`` es correcto para
+todos los procesos sin recorrer ``games``. ``list_games`` pagina por
+``game_id`` usando la clave primaria.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from app.models.game import PokerGame
+from app.services.game_store import VersionConflict, format_counts
+
+logger = logging.getLogger(__name__)
+
+_LOCK_STRIPES = 64
+
+_COUNT_TRIGGERS = (
+    'CREATE TRIGGER IF NOT EXISTS games_count_insert AFTER INSERT ON games BEGIN '
+    'INSERT INTO game_counts (status, rules, games) VALUES (NEW.status, NEW.rules, 1) '
+    'ON CONFLICT (status, rules) DO UPDATE SET games = games + 1; END',
+    'CREATE TRIGGER IF NOT EXISTS games_count_delete AFTER DELETE ON games BEGIN '
+    'UPDATE game_counts SET games = games - 1 WHERE status = OLD.status AND rules = OLD.rules; END',
+    'CREATE TRIGGER IF NOT EXISTS games_count_update AFTER UPDATE OF status, rules ON games '
+    'WHEN OLD.status IS NOT NEW.status OR OLD.rules IS NOT NEW.rules BEGIN '
+    'UPDATE game_counts SET games = games - 1 WHERE status = OLD.status AND rules = OLD.rules; '
+    'INSERT INTO game_counts (status, rules, games) VALUES (NEW.status, NEW.rules, 1) '
+    'ON CONFLICT (status, rules) DO UPDATE SET games = games + 1; END',
+)
+
+
+class SQLiteGameStore:
+    """Partidas por game_id en un SQLite compartido, con versión por fila"""
+
+    def __init__(self, path, ttl=3600, busy_timeout=5.0, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.busy_timeout = busy_timeout
+        self._clock = clock
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self._stats_lock = threading.Lock()
+        self._next_expiration = 0.0
+        self.on_change = None
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.conflicts = 0
+        self.expirations = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._create_schema(self._connection())
+
+    def _create_schema(self, connection):
+        """Tablas, índices y triggers de contadores (en una transacción: varios procesos pueden arrancar a la vez)"""
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS games ('
+                'game_id TEXT PRIMARY KEY, version INTEGER NOT NULL, '
+                'updated REAL NOT NULL, data BLOB NOT NULL, status TEXT, rules TEXT)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS games_updated ON games (updated)')
+            columns = {row[1] for row in connection.execute('PRAGMA table_info(games)')}
+            if 'status' not in columns:
+                # Base de datos anterior a los contadores: añadir las columnas y rellenarlas una vez
+                connection.execute('ALTER TABLE games ADD COLUMN status TEXT')
+                connection.execute('ALTER TABLE games ADD COLUMN rules TEXT')
+                rows = connection.execute('SELECT game_id, data FROM games').fetchall()
+                for game_id, data in rows:
+                    game = self._deserialize(data)
+                    connection.execute('UPDATE games SET status = ?, rules = ? WHERE game_id = ?',
+                                       (game.status, game.game_rules, game_id))
+            exists = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'game_counts'"
+            ).fetchone()
+            if not exists:
+                connection.execute(
+                    'CREATE TABLE game_counts (status TEXT NOT NULL, rules TEXT NOT NULL, '
+                    'games INTEGER NOT NULL, PRIMARY KEY (status, rules))'
+                )
+                connection.execute(
+                    'INSERT INTO game_counts (status, rules, games) '
+                    'SELECT status, rules, COUNT(*) FROM games GROUP BY status, rules'
+                )
+            for trigger in _COUNT_TRIGGERS:
+                connection.execute(trigger)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            path=config.get('GAME_DB_PATH'),
+            ttl=config.get('GAME_STORE_TTL', 3600)
+        )
+
+    def _connection(self):
+        """Conexión del hilo actual (se abre de nuevo tras un fork)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                                         isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _serialize(self, game):
+        return game.to_bytes()
+
+    def _deserialize(self, data):
+        return PokerGame.from_bytes(data)
+
+    def _read(self, game_id):
+        row = self._connection().execute(
+            'SELECT version, data FROM games WHERE game_id = ?', (game_id,)
+        ).fetchone()
+        self._count('misses' if row is None else 'hits')
+        return row
+
+    def _expire(self, now):
+        """Borrar las partidas sin escrituras en ``ttl`` segundos (como mucho cada ttl / 10)"""
+        if now < self._next_expiration:
+            return
+        self._next_expiration = now + self.ttl / 10
+        cursor = self._connection().execute('DELETE FROM games WHERE updated < ?', (now - self.ttl,))
+        if cursor.rowcount:
+            self._count('expirations', cursor.rowcount)
+            logger.debug("Partidas expiradas en %s: %d", self.path, cursor.rowcount)
+
+    def get(self, game_id, default=None):
+        """Copia de una partida (los cambios sobre ella no se guardan: usar ``locked``)"""
+        row = self._read(game_id)
+        return default if row is None else self._deserialize(row[1])
+
+    @contextmanager
+    def locked(self, game_id):
+        """
+        ``with store.locked(game_id) as game``: lee la partida, la entrega y al
+        salir guarda los cambios si la versión no cambió entretanto; si cambió
+        lanza ``VersionConflict``. Produce None si no existe.
+        """
+        with self._locks[hash(game_id) % _LOCK_STRIPES]:
+            row = self._read(game_id)
+            if row is None:
+                yield None
+                return
+            version, data = row
+            game = self._deserialize(data)
+            previous = game.state_token
+
+            yield game
+
+            new_data = self._serialize(game)
+            if new_data == data:
+                return
+            cursor = self._connection().execute(
+                'UPDATE games SET version = version + 1, updated = ?, data = ?, status = ?, rules = ? '
+                'WHERE game_id = ? AND version = ?',
+                (self._clock(), new_data, game.status, game.game_rules, game_id, version)
+            )
+            if not cursor.rowcount:
+                self._count('conflicts')
+                raise VersionConflict(game_id)
+            self._count('writes')
+            if self.on_change is not None and game.state_token != previous:
+                self.on_change(game_id, game, previous)
+
+    def put(self, game_id, game):
+        now = self._clock()
+        self._connection().execute(
+            'INSERT INTO games (game_id, version, updated, data, status, rules) VALUES (?, 1, ?, ?, ?, ?) '
+            'ON CONFLICT (game_id) DO UPDATE SET version = version + 1, updated = excluded.updated, '
+            'data = excluded.data, status = excluded.status, rules = excluded.rules',
+            (game_id, now, self._serialize(game), game.status, game.game_rules)
+        )
+        self._count('writes')
+        self._expire(now)
+        if self.on_change is not None:
+            self.on_change(game_id, game, None)
+
+    def discard(self, game_id):
+        """Eliminar una partida; True si existía"""
+        cursor = self._connection().execute('DELETE FROM games WHERE game_id = ?', (game_id,))
+        return cursor.rowcount > 0
+
+    def version(self, game_id):
+        """Versión guardada de una partida, o None"""
+        row = self._connection().execute('SELECT version FROM games WHERE game_id = ?', (game_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def __contains__(self, game_id):
+        return self.version(game_id) is not None
+
+    def __getitem__(self, game_id):
+        game = self.get(game_id)
+        if game is None:
+            raise KeyError(game_id)
+        return game
+
+    def __setitem__(self, game_id, game):
+        self.put(game_id, game)
+
+    def __delitem__(self, game_id):
+        if not self.discard(game_id):
+            raise KeyError(game_id)
+
+    def __len__(self):
+        return self._connection().execute('SELECT COALESCE(SUM(games), 0) FROM game_counts').fetchone()[0]
+
+    def keys(self):
+        return [row[0] for row in self._connection().execute('SELECT game_id FROM games')]
+
+    def counts(self):
+        """Partidas por status, por reglas y por ambos (tabla ``game_counts``, de todos los procesos)"""
+        rows = self._connection().execute('SELECT status, rules, games FROM game_counts').fetchall()
+        return format_counts({(status, rules): games for status, rules, games in rows})
+
+    def list_games(self, cursor=None, limit=100):
+        """Página de ``(game_id, status, reglas)`` por orden de game_id y el cursor de la siguiente (o None)"""
+        rows = self._connection().execute(
+            'SELECT game_id, status, rules FROM games WHERE game_id > ? ORDER BY game_id LIMIT ?',
+            (cursor or '', limit + 1)
+        ).fetchall()
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1][0]
+        return rows, None
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'backend': 'sqlite',
+                'games': len(self),
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'writes': self.writes,
+                'conflicts': self.conflicts,
+                'expirations': self.expirations
+            }
+
+    def close(self):
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
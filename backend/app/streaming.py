@@ -0,0 +1,207 @@
+"""
+Variante ASGI de la API con actualizaciones en vivo (Server-Sent Events).
+
+``create_asgi_app(create_app())`` devuelve una aplicación ASGI pura (sin
+dependencias: sirve con cualquier servidor ASGI, p. ej. ``uvicorn asgi:app``):
+
+- ``GET /api/game/stream?game_id=...`` abre un stream SSE de la partida. El
+  primer evento es ``state`` (estado completo, o ``delta`` si el navegador
+  reconecta con ``Last-Event-ID``) y después llega un ``delta`` por cada cambio
+  (volteo, colocación, barajeo...), con solo los montones que cambiaron. El
+  ``id`` de cada evento es la versión de la partida (``state_token``).
+- El resto de rutas las atiende la app Flask en un pool de hilos, así que las
+  jugadas siguen siendo peticiones normales y sus cambios llegan a los streams
+  por ``app.services.game_events``.
+
+Un stream inactivo solo ocupa una corrutina y una cola acotada, así que miles
+de suscriptores caben en un proceso. Con ``GAME_BACKEND=sqlite`` y varios
+procesos, cada stream solo ve los cambios hechos en su proceso.
+"""
+import asyncio
+import io
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from app.routes import game_routes
+from app.services.game_events import RESYNC
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = '/api/game/stream'
+
+_STREAM_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),  # Sin buffer en nginx
+    (b'access-control-allow-origin', b'*')
+]
+
+
+def create_asgi_app(flask_app, threads=None):
+    """Envolver la app Flask en una app ASGI que añade ``/api/game/stream``"""
+    heartbeat = flask_app.config.get('EVENTS_HEARTBEAT', 15)
+    executor = ThreadPoolExecutor(max_workers=threads or flask_app.config.get('ASGI_THREADS', 16),
+                                  thread_name_prefix='wsgi')
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await _lifespan(receive, send, executor)
+        elif scope['type'] == 'http':
+            if scope['path'] == STREAM_PATH and scope['method'] == 'GET':
+                await _stream(scope, receive, send, executor, heartbeat)
+            else:
+                await _call_wsgi(flask_app.wsgi_app, scope, receive, send, executor)
+        elif scope['type'] == 'websocket':
+            await send({'type': 'websocket.close', 'code': 1003})
+
+    return app
+
+
+async def _lifespan(receive, send, executor):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def _send_json(send, status, data):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': json.dumps(data).encode()})
+
+
+async def _stream(scope, receive, send, executor, heartbeat):
+    """Stream SSE de una partida hasta que el cliente se desconecte"""
+    loop = asyncio.get_running_loop()
+    query = parse_qs(scope['query_string'].decode('latin1'))
+    game_id = query.get('game_id', ['default'])[0]
+    headers = dict(scope['headers'])
+    since = headers.get(b'last-event-id', b'').decode('latin1') or None
+
+    hub = game_routes.event_hub
+    # Suscribirse antes de leer el estado: ningún cambio posterior se pierde
+    subscriber = hub.subscribe(game_id, loop)
+    try:
+        snapshot = await loop.run_in_executor(executor, game_routes.stream_snapshot, game_id, since)
+        if snapshot is None:
+            await _send_json(send, 404, {'success': False, 'error': 'Juego no encontrado'})
+            return
+        state_id, version, body = snapshot
+        await send({'type': 'http.response.start', 'status': 200, 'headers': _STREAM_HEADERS})
+        await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+        message = asyncio.ensure_future(subscriber.queue.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait({message, disconnected}, timeout=heartbeat,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    return
+                if message not in done:
+                    await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+                    continue
+
+                event = message.result()
+                message = asyncio.ensure_future(subscriber.queue.get())
+                if event is not RESYNC:
+                    event_state_id, previous, event_version, body = event
+                    if previous is not None and event_state_id == state_id and event_version <= version:
+                        continue  # Ya incluido en lo enviado
+                    if previous is None or (event_state_id == state_id and previous <= version):
+                        state_id, version = event_state_id, event_version
+                        await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+                        continue
+                # Eventos perdidos (cola llena u orden roto): reenviar el estado completo
+                snapshot = await loop.run_in_executor(executor, game_routes.stream_snapshot, game_id)
+                if snapshot is None:
+                    await send({'type': 'http.response.body',
+                                'body': b'event: gone\ndata: {}\n\n', 'more_body': False})
+                    return
+                state_id, version, body = snapshot
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        finally:
+            message.cancel()
+            disconnected.cancel()
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+async def _wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def _environ(scope, body):
+    """Entorno WSGI de una petición ASGI"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.input_terminated': True,  # Cuerpo completo en memoria (también si llegó chunked)
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+    for name, value in scope['headers']:
+        name, value = name.decode('latin1'), value.decode('latin1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _run_wsgi(wsgi_app, environ):
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.lower().encode('latin1'), value.encode('latin1'))
+                               for name, value in headers]
+
+    result = wsgi_app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], body
+
+
+async def _call_wsgi(wsgi_app, scope, receive, send, executor):
+    """Atender una petición con la app WSGI (Flask) en el pool de hilos"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    environ = _environ(scope, b''.join(chunks))
+    status, headers, body = await asyncio.get_running_loop().run_in_executor(
+        executor, _run_wsgi, wsgi_app, environ)
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,53 @@
+"""
+Configuración de logging de la API.
+
+Los módulos usan ``logging.getLogger(__name__)`` con formato perezoso
+(``logger.debug('... %s', valor)``). Solo ``create_app`` instala handlers: los
+registros pasan por una cola acotada y un hilo (``QueueListener``) los
+escribe, así una petición nunca espera a stdout. Usados como librería o en
+simulaciones, los modelos no escriben nada.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+_listener = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que descarta registros si la cola está llena en lugar de bloquear"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(config):
+    """Configurar el logger ``app`` según ``config`` (LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE)"""
+    global _listener
+
+    logger = logging.getLogger('app')
+    logger.setLevel(config.get('LOG_LEVEL', 'INFO'))
+
+    if _listener is not None:
+        return logger
+
+    log_queue = queue.Queue(maxsize=config.get('LOG_QUEUE_SIZE', 10000))
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(config.get('LOG_FORMAT', '%(asctime)s %(levelname)s %(name)s: %(message)s')))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    logger.propagate = False
+    return logger
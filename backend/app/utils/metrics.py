@@ -0,0 +1,289 @@
+"""
+Métricas de la API en formato de texto de Prometheus y perfiles muestreados.
+
+``setup_metrics(app)`` (lo llama ``create_app``) registra para cada petición
+su ruta, método, status y duración: contadores de peticiones y de errores
+(status >= 500) e histogramas de latencia por ruta, expuestos en ``/metrics``.
+Con ``METRICS_MODEL_TIMINGS`` (desactivado por defecto) las rutas cronometran
+además sus llamadas a los modelos (``cut_and_shuffle``, ``start_game``,
+``flip_card_from_pile``, ``place_card``...) con ``model_timer``: los modelos no
+se tocan, así el predictor, las simulaciones y los benchmarks no pagan nada.
+Esos tiempos se acumulan en histogramas por hilo, sin lock por llamada.
+
+Con ``PROFILE_SAMPLE_RATE = N`` una de cada N peticiones se ejecuta con
+cProfile; sus funciones más costosas se guardan en un buffer circular de
+``PROFILE_BUFFER_SIZE`` perfiles que devuelve ``/admin/profiles`` (solo con la
+cabecera ``X-Admin-Token`` igual a ``ADMIN_TOKEN``; sin token configurado
+responde 403).
+"""
+import cProfile
+import hmac
+import itertools
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+from flask import current_app, g, jsonify, request
+
+# Límites (segundos) de los histogramas: peticiones HTTP y métodos de los modelos
+REQUEST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+MODEL_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """Histograma acumulable al estilo Prometheus (sin lock: lo protege ``Metrics`` o es de un solo hilo)"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # La última: por encima del mayor límite (+Inf)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        """Sumar las observaciones de otro histograma con los mismos límites"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def cumulative(self):
+        """Pares ``(le, observaciones <= le)`` terminando en ``+Inf``"""
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        return zip(bounds, itertools.accumulate(self.counts))
+
+
+def _labels(**labels):
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Metrics:
+    """Contadores e histogramas de peticiones y de los modelos (seguro entre hilos)"""
+
+    def __init__(self, model_timings=False):
+        self._lock = threading.Lock()
+        self.model_timings = model_timings
+        self.requests = {}  # (ruta, método, status) -> peticiones
+        self.errors = {}  # ruta -> respuestas 5xx
+        self.request_seconds = {}  # ruta -> Histogram
+        self._local = threading.local()
+        self._thread_model_seconds = []  # (hilo, {operación -> Histogram}) de cada hilo que observó
+        self._retired_model_seconds = {}  # operación -> Histogram de los hilos ya terminados
+
+    def observe_request(self, route, method, status, seconds):
+        with self._lock:
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if status >= 500:
+                self.errors[route] = self.errors.get(route, 0) + 1
+            histogram = self.request_seconds.get(route)
+            if histogram is None:
+                histogram = self.request_seconds[route] = Histogram(REQUEST_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_model(self, operation, seconds):
+        # Histogramas del hilo: solo se toma el lock la primera vez que observa cada hilo
+        histograms = getattr(self._local, 'model_seconds', None)
+        if histograms is None:
+            histograms = self._local.model_seconds = {}
+            with self._lock:
+                self._thread_model_seconds.append((threading.current_thread(), histograms))
+        histogram = histograms.get(operation)
+        if histogram is None:
+            histogram = histograms[operation] = Histogram(MODEL_BUCKETS)
+        histogram.observe(seconds)
+
+    def model_seconds(self):
+        """Histogramas de los modelos sumando todos los hilos (con ``self._lock`` tomado)"""
+        alive = []
+        for thread, histograms in self._thread_model_seconds:
+            if thread.is_alive():
+                alive.append((thread, histograms))
+            else:
+                _merge_into(self._retired_model_seconds, histograms)
+        self._thread_model_seconds = alive
+        merged = {}
+        _merge_into(merged, self._retired_model_seconds)
+        for _, histograms in alive:
+            # Un hilo vivo puede estar observando: a lo sumo falta su última observación
+            _merge_into(merged, dict(histograms))
+        return merged
+
+    def render(self, gauges=()):
+        """
+        Texto de exposición de Prometheus. ``gauges``: tuplas ``(nombre, ayuda, valor)``
+        calculadas en el momento de la consulta.
+        """
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def histogram(name, label, histograms):
+            for key, values in sorted(histograms.items()):
+                for le, count in values.cumulative():
+                    lines.append(f'{name}_bucket{_labels(**{label: key}, le=le)} {count}')
+                lines.append(f'{name}_sum{_labels(**{label: key})} {values.sum!r}')
+                lines.append(f'{name}_count{_labels(**{label: key})} {values.count}')
+
+        with self._lock:
+            family('poker_http_requests_total', 'counter', 'Peticiones HTTP por ruta, metodo y status')
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'poker_http_requests_total{_labels(route=route, method=method, status=status)} {count}')
+
+            family('poker_http_request_errors_total', 'counter', 'Respuestas 5xx por ruta')
+            for route, count in sorted(self.errors.items()):
+                lines.append(f'poker_http_request_errors_total{_labels(route=route)} {count}')
+
+            family('poker_http_request_duration_seconds', 'histogram', 'Duracion de las peticiones HTTP por ruta')
+            histogram('poker_http_request_duration_seconds', 'route', self.request_seconds)
+
+            family('poker_model_duration_seconds', 'histogram', 'Duracion de los metodos de DeckShuffle y PokerGame')
+            histogram('poker_model_duration_seconds', 'operation', self.model_seconds())
+
+        for name, help_text, value in gauges:
+            family(name, 'gauge', help_text)
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _merge_into(target, histograms):
+    for operation, histogram in histograms.items():
+        merged = target.get(operation)
+        if merged is None:
+            merged = target[operation] = Histogram(histogram.buckets)
+        merged.merge(histogram)
+
+
+class RequestProfiler:
+    """Perfila con cProfile una de cada ``sample_rate`` peticiones y guarda las últimas ``buffer_size``"""
+
+    def __init__(self, sample_rate=0, buffer_size=20, top=15):
+        self.sample_rate = sample_rate
+        self.top = top
+        self.profiles = deque(maxlen=buffer_size)
+        self._counter = itertools.count(1)
+
+    def start(self):
+        """Profiler activo para esta petición si le toca, o None"""
+        if not self.sample_rate or next(self._counter) % self.sample_rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None  # Ya hay otro profiler activo en el proceso
+        return profiler
+
+    def finish(self, profiler, **info):
+        profiler.disable()
+        stats = pstats.Stats(profiler).stats
+        hottest = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+        self.profiles.append({
+            **info,
+            'timestamp': time.time(),
+            'functions': [
+                {
+                    'function': f'{filename}:{line}({name})',
+                    'calls': calls,
+                    'total_seconds': round(total, 6),
+                    'cumulative_seconds': round(cumulative, 6)
+                }
+                for (filename, line, name), (_, calls, total, cumulative, _) in hottest
+            ]
+        })
+
+
+@contextmanager
+def model_timer(operation):
+    """
+    Cronometrar la llamada a un modelo dentro de una ruta:
+    ``with model_timer('place_card'): game.place_card(pile)``. No hace nada si la
+    app no tiene métricas o ``METRICS_MODEL_TIMINGS`` está desactivado.
+    """
+    metrics = current_app.extensions.get('metrics')
+    if metrics is None or not metrics.model_timings:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe_model(operation, time.perf_counter() - start)
+
+
+def admin_authorized():
+    """True si la petición trae ``X-Admin-Token`` igual a ``ADMIN_TOKEN`` (sin token configurado, nunca)"""
+    token = current_app.config.get('ADMIN_TOKEN')
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+
+def setup_metrics(app, gauges=None):
+    """Registrar las métricas de ``app``, ``/metrics`` y ``/admin/profiles``; ``gauges()`` añade valores actuales"""
+    metrics = Metrics(model_timings=app.config.get('METRICS_MODEL_TIMINGS', False))
+    profiler = RequestProfiler(
+        sample_rate=app.config.get('PROFILE_SAMPLE_RATE', 0),
+        buffer_size=app.config.get('PROFILE_BUFFER_SIZE', 20),
+        top=app.config.get('PROFILE_TOP', 15)
+    )
+    app.extensions['metrics'] = metrics
+    app.extensions['profiler'] = profiler
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_profiler = profiler.start()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        seconds = time.perf_counter() - start
+        # Ruta de la regla ('/api/game/state'), no la URL: las etiquetas no crecen con los parámetros
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.observe_request(route, request.method, response.status_code, seconds)
+        request_profiler = g.pop('metrics_profiler', None)
+        if request_profiler is not None:
+            profiler.finish(request_profiler, route=route, method=request.method,
+                            status=response.status_code, seconds=round(seconds, 6))
+        return response
+
+    @app.teardown_request
+    def stop_request_profiler(exc):
+        # Si after_request no llegó a ejecutarse, no dejar el profiler activo en el hilo
+        request_profiler = g.pop('metrics_profiler', None)
+        if request_profiler is not None:
+            request_profiler.disable()
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        body = metrics.render(gauges() if gauges is not None else ())
+        return current_app.response_class(body, content_type=CONTENT_TYPE)
+
+    @app.route('/admin/profiles')
+    def sampled_profiles():
+        if not admin_authorized():
+            return jsonify({'success': False, 'error': 'Token de administración inválido'}), 403
+        return jsonify({
+            'success': True,
+            'sample_rate': profiler.sample_rate,
+            'profiles': list(reversed(profiler.profiles))  # El más reciente primero
+        }), 200
+
+    return metrics
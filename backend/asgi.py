@@ -0,0 +1,5 @@
+from app import create_app
+from app.streaming import create_asgi_app
+
+# Servidor ASGI con /api/game/stream (SSE): uvicorn asgi:app
+app = create_asgi_app(create_app())
@@ -0,0 +1,100 @@
+"""
+Microbenchmark del coste por jugada de PokerGame.
+
+Mide el tiempo medio por movimiento (flip + place) en partidas automáticas,
+por consulta de estado (_get_next_flip_pile, get_game_state) y por partida
+reconstruida desde su registro de eventos (app.models.replay).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_game_moves --games 2000
+"""
+import argparse
+import time
+
+from app.models.cards import PILE_OF
+from app.models.deck import DeckShuffle
+from app.models.game import PokerGame
+from app.models.replay import encode_log, game_from_log
+
+
+def _new_game(seed, game_rules):
+    deck = DeckShuffle(initial_seed=seed)
+    for cut_point in (26, 13, 39):
+        deck.cut_and_shuffle(cut_point)
+    return PokerGame(deck, game_rules=game_rules)
+
+
+def bench_moves(games, game_rules):
+    """Segundos por movimiento jugando ``games`` partidas completas"""
+    elapsed = 0.0
+    moves = 0
+    for seed in range(games):
+        game = _new_game(seed, game_rules)
+        game.start_game()
+        start = time.perf_counter()
+        while game.status == 'playing':
+            card = game.flip_card_from_pile(game._get_next_flip_pile())
+            game.place_card(PILE_OF[card])
+        elapsed += time.perf_counter() - start
+        moves += len(game.moves)
+    return elapsed / moves
+
+
+def bench_state_queries(calls):
+    """Segundos por llamada a _get_next_flip_pile y get_game_state a mitad de partida"""
+    game = _new_game(1, 'original')
+    game.start_game()
+    for _ in range(20):
+        if game.status != 'playing':
+            break
+        card = game.flip_card_from_pile(game._get_next_flip_pile())
+        game.place_card(PILE_OF[card])
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        game._get_next_flip_pile()
+    next_pile = (time.perf_counter() - start) / calls
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        game.get_game_state()
+    state = (time.perf_counter() - start) / calls
+    return next_pile, state
+
+
+def bench_replay(games):
+    """Segundos por partida completa reconstruida con game_from_log"""
+    logs = []
+    for seed in range(games):
+        game = _new_game(seed, 'original')
+        game.start_game()
+        while game.status == 'playing':
+            card = game.flip_card_from_pile(game._get_next_flip_pile())
+            game.place_card(PILE_OF[card])
+        logs.append(encode_log(game))
+
+    start = time.perf_counter()
+    for log in logs:
+        game_from_log(log)
+    return (time.perf_counter() - start) / games
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Coste por jugada de PokerGame')
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--calls', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    per_move = {rules: bench_moves(args.games, rules) for rules in ('original', 'alternative')}
+    next_pile, state = bench_state_queries(args.calls)
+    per_replay = bench_replay(args.games)
+
+    for rules, seconds in per_move.items():
+        print(f'jugada ({rules}): {seconds * 1e6:.2f} µs')
+    print(f'_get_next_flip_pile: {next_pile * 1e6:.3f} µs')
+    print(f'get_game_state: {state * 1e6:.2f} µs')
+    print(f'replay: {per_replay * 1e6:.1f} µs por partida ({1 / per_replay:.0f} partidas/s)')
+
+
+if __name__ == '__main__':
+    main()
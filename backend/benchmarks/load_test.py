@@ -0,0 +1,399 @@
+"""
+Prueba de carga con jugadores virtuales que juegan partidas completas.
+
+Cada jugador (una corrutina asyncio) recorre el ciclo real de la API:
+``/new`` -> n x ``/shuffle`` -> ``/start`` -> ``/flip-card`` + ``/place-card``
+siguiendo ``next_flip_pile`` de las respuestas hasta que la partida termina.
+Al final se informa del throughput, los percentiles p50/p95/p99 de latencia
+por endpoint y la tasa de errores (status >= 400 o fallo de conexión). Las
+latencias se acumulan en histogramas de cubos logarítmicos fijos (error
+relativo <= 1 %): la memoria no crece con la duración de un soak.
+
+Transportes:
+- en proceso (por defecto): la app Flask con su cliente de pruebas en un
+  pool de hilos, sin red; mide la capacidad del código de la API.
+- HTTP (``--url``): contra un servidor ya arrancado (``python run.py``,
+  gunicorn, ``uvicorn asgi:app``...), una conexión keep-alive por jugador.
+
+Modos:
+- ráfaga: ``--players`` jugadores juegan ``--games`` partidas cada uno.
+- rampa (``--ramp S``): los jugadores se incorporan repartidos en S segundos.
+- soak (``--duration S``): los jugadores juegan partidas seguidas durante S
+  segundos (con ``--report-every`` se imprime el progreso).
+
+Uso (desde backend/):
+    python -m benchmarks.load_test --players 1000 --games 2
+    python -m benchmarks.load_test --url http://localhost:5000 --players 200 --ramp 30 --duration 600
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from app.models.rules import GAME_RULES
+
+ENDPOINTS = ('/new', '/shuffle', '/start', '/flip-card', '/place-card')
+API_PREFIX = '/api/game'
+
+
+class RequestFailed(Exception):
+    """La petición no devolvió un JSON con status < 400"""
+
+
+class LatencyHistogram:
+    """
+    Latencias (s) en cubos logarítmicos fijos: cada cubo abarca un factor
+    ``1 + precision``, así los percentiles tienen un error relativo <= ``precision``
+    y hay a lo sumo unos miles de cubos (de ``smallest`` a horas) aunque se
+    registren millones de peticiones.
+    """
+
+    def __init__(self, precision=0.01, smallest=1e-6):
+        self.smallest = smallest
+        self._log_base = math.log1p(precision)
+        self.counts = Counter()  # índice de cubo -> peticiones
+        self.count = 0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds):
+        # Cubo i > 0: [smallest * b^(i-1), smallest * b^i); el 0, todo lo que no supera smallest
+        index = 0 if seconds <= self.smallest else int(math.log(seconds / self.smallest) / self._log_base) + 1
+        self.counts[index] += 1
+        self.count += 1
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Percentil ``q`` (0-100) por rango más cercano: límite superior de su cubo, acotado a [min, max]"""
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                upper = self.smallest * math.exp(index * self._log_base)
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+
+class Stats:
+    """Latencias (histograma) y errores por endpoint, y partidas terminadas por resultado"""
+
+    def __init__(self):
+        self.latencies = defaultdict(LatencyHistogram)
+        self.errors = Counter()
+        self.games = Counter()
+
+    def record(self, endpoint, seconds, ok):
+        self.latencies[endpoint].record(seconds)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    @property
+    def requests(self):
+        return sum(histogram.count for histogram in self.latencies.values())
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint in sorted(self.latencies, key=lambda name: ENDPOINTS.index(name) if name in ENDPOINTS else 99):
+            histogram = self.latencies[endpoint]
+            endpoints[endpoint] = {
+                'requests': histogram.count,
+                'errors': self.errors[endpoint],
+                'error_rate': self.errors[endpoint] / histogram.count,
+                'p50_ms': histogram.percentile(50) * 1e3,
+                'p95_ms': histogram.percentile(95) * 1e3,
+                'p99_ms': histogram.percentile(99) * 1e3,
+                'max_ms': histogram.max * 1e3
+            }
+        requests = self.requests
+        errors = sum(self.errors.values())
+        return {
+            'elapsed_s': elapsed,
+            'requests': requests,
+            'errors': errors,
+            'error_rate': errors / requests if requests else 0.0,
+            'throughput_rps': requests / elapsed if elapsed else 0.0,
+            'games': dict(self.games),
+            'games_per_s': sum(self.games.values()) / elapsed if elapsed else 0.0,
+            'endpoints': endpoints
+        }
+
+
+class InProcessTransport:
+    """La app Flask en este proceso: cada petición se atiende en un hilo del pool con el cliente de pruebas"""
+
+    def __init__(self, app, threads=8):
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='load')
+        self._local = threading.local()
+
+    def _call(self, method, path, body):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(API_PREFIX + path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+    def session(self):
+        return self
+
+    async def request(self, method, path, body=None):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, method, path, body)
+
+    async def close(self):
+        pass
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class HttpTransport:
+    """Servidor HTTP real; cada jugador usa su propia conexión keep-alive"""
+
+    def __init__(self, base_url, timeout=10.0):
+        parts = urlsplit(base_url)
+        if parts.scheme != 'http':
+            raise ValueError(f'Solo se admite http://, llegó {base_url!r}')
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/') + API_PREFIX
+        self.timeout = timeout
+
+    def session(self):
+        return HttpSession(self)
+
+    def shutdown(self):
+        pass
+
+
+class HttpSession:
+    """Cliente HTTP/1.1 mínimo sobre asyncio (JSON, Content-Length o chunked)"""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.transport.host, self.transport.port)
+
+    async def request(self, method, path, body=None):
+        return await asyncio.wait_for(self._request(method, path, body), self.transport.timeout)
+
+    async def _request(self, method, path, body):
+        if self._writer is None:
+            await self._connect()
+        payload = json.dumps(body).encode() if body is not None else b''
+        head = (
+            f'{method} {self.transport.prefix}{path} HTTP/1.1\r\n'
+            f'Host: {self.transport.host}:{self.transport.port}\r\n'
+            'Accept: application/json\r\n'
+            'Content-Type: application/json\r\n'
+            f'Content-Length: {len(payload)}\r\n\r\n'
+        )
+        try:
+            self._writer.write(head.encode() + payload)
+            await self._writer.drain()
+            return await self._read_response()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            raise
+
+    async def _read_response(self):
+        status_line = await self._reader.readuntil(b'\r\n')
+        version, status = status_line.split(b' ', 2)[:2]
+        headers = {}
+        while True:
+            line = await self._reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self._reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if not size:
+                    break
+                chunks.append(chunk[:-2])
+            data = b''.join(chunks)
+        elif 'content-length' in headers:
+            data = await self._reader.readexactly(int(headers['content-length']))
+        else:
+            data = await self._reader.read()
+            headers['connection'] = 'close'
+
+        keep_alive = version == b'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        if not keep_alive:
+            await self.close()
+        try:
+            return int(status), json.loads(data) if data else None
+        except ValueError:
+            return int(status), None
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._reader = None
+
+
+async def _call(session, stats, method, endpoint, body, think):
+    start = time.perf_counter()
+    try:
+        status, data = await session.request(method, endpoint, body)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+        stats.record(endpoint, time.perf_counter() - start, ok=False)
+        raise RequestFailed(f'{endpoint}: {e!r}') from e
+    ok = status < 400 and data is not None
+    stats.record(endpoint, time.perf_counter() - start, ok)
+    if not ok:
+        raise RequestFailed(f'{endpoint}: status {status}')
+    if think:
+        await asyncio.sleep(think)
+    return data
+
+
+async def play_game(session, stats, game_id, shuffles, rng, think=0.0, game_rules='original'):
+    """Una partida completa como la juega el frontend; devuelve el status final"""
+    await _call(session, stats, 'POST', '/new', {'game_id': game_id, 'game_rules': game_rules}, think)
+    for _ in range(shuffles):
+        await _call(session, stats, 'POST', '/shuffle', {'game_id': game_id, 'cut_point': rng.randint(1, 51)}, think)
+    state = (await _call(session, stats, 'POST', '/start', {'game_id': game_id}, think))['game_state']
+    while state['status'] == 'playing':
+        flip = await _call(session, stats, 'POST', '/flip-card', {'game_id': game_id, 'pile': state['next_flip_pile']}, think)
+        place = await _call(session, stats, 'POST', '/place-card', {'game_id': game_id, 'pile': flip['card'][0]}, think)
+        state = place['game_state']
+    stats.games[state['status']] += 1
+    return state['status']
+
+
+async def _player(index, transport, stats, options, deadline, delay):
+    if delay:
+        await asyncio.sleep(delay)
+    rng = random.Random(options['seed'] * 1_000_003 + index)
+    session = transport.session()
+    try:
+        game = 0
+        while True:
+            if deadline is None and game >= options['games']:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            try:
+                await play_game(session, stats, f'load-{index}-{game}', options['shuffles'], rng,
+                                options['think'], options['game_rules'])
+            except RequestFailed:
+                stats.games['aborted'] += 1
+            game += 1
+    finally:
+        await session.close()
+
+
+async def _report_progress(stats, every, started):
+    previous = 0
+    while True:
+        await asyncio.sleep(every)
+        requests = stats.requests
+        print(f'[{time.perf_counter() - started:7.1f}s] {(requests - previous) / every:8.1f} req/s, '
+              f'{sum(stats.games.values())} partidas, {sum(stats.errors.values())} errores', file=sys.stderr)
+        previous = requests
+
+
+async def run_load(transport, players=100, games=1, shuffles=3, ramp=0.0, duration=None, think=0.0,
+                   seed=0, game_rules='original', report_every=None):
+    """
+    Lanzar ``players`` jugadores virtuales y devolver el resumen (``Stats.summary``).
+    Con ``duration`` (soak) juegan hasta ese plazo en lugar de ``games`` partidas;
+    con ``ramp`` se incorporan repartidos en esos segundos.
+    """
+    stats = Stats()
+    options = {'games': games, 'shuffles': shuffles, 'think': think, 'seed': seed, 'game_rules': game_rules}
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+    progress = asyncio.ensure_future(_report_progress(stats, report_every, started)) if report_every else None
+    try:
+        await asyncio.gather(*(
+            _player(index, transport, stats, options, deadline, ramp * index / players if ramp else 0.0)
+            for index in range(players)
+        ))
+    finally:
+        if progress is not None:
+            progress.cancel()
+    return stats.summary(time.perf_counter() - started)
+
+
+def format_report(summary):
+    lines = [
+        f'{"endpoint":12} {"peticiones":>10} {"errores":>8} {"% error":>8} {"p50 ms":>8} {"p95 ms":>8} '
+        f'{"p99 ms":>8} {"max ms":>8}'
+    ]
+    for endpoint, result in summary['endpoints'].items():
+        lines.append(
+            f'{endpoint:12} {result["requests"]:>10} {result["errors"]:>8} {result["error_rate"]:>8.2%} '
+            f'{result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} {result["p99_ms"]:>8.2f} {result["max_ms"]:>8.2f}'
+        )
+    games = ', '.join(f'{status} {count}' for status, count in sorted(summary['games'].items())) or '0'
+    lines.append(
+        f'{summary["requests"]} peticiones en {summary["elapsed_s"]:.1f} s: {summary["throughput_rps"]:.1f} req/s, '
+        f'{summary["error_rate"]:.2%} errores; partidas: {games} ({summary["games_per_s"]:.1f}/s)'
+    )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prueba de carga con jugadores virtuales')
+    parser.add_argument('--url', help='Servidor a probar (p. ej. http://localhost:5000); sin él, la app en proceso')
+    parser.add_argument('--players', type=int, default=100)
+    parser.add_argument('--games', type=int, default=1, help='Partidas por jugador (sin --duration)')
+    parser.add_argument('--shuffles', type=int, default=3, help='Barajeos antes de cada partida')
+    parser.add_argument('--ramp', type=float, default=0.0, help='Segundos en los que se incorporan los jugadores')
+    parser.add_argument('--duration', type=float, help='Modo soak: jugar partidas durante estos segundos')
+    parser.add_argument('--think', type=float, default=0.0, help='Pausa (s) tras cada respuesta')
+    parser.add_argument('--rules', default='original', choices=GAME_RULES)
+    parser.add_argument('--threads', type=int, default=8, help='Hilos de la app en proceso')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Timeout (s) por petición HTTP')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--report-every', type=float, help='Imprimir el progreso cada estos segundos')
+    parser.add_argument('--json', help='Guardar el resumen en este fichero JSON')
+    args = parser.parse_args(argv)
+
+    if args.url:
+        transport = HttpTransport(args.url, timeout=args.timeout)
+    else:
+        from app import create_app
+        transport = InProcessTransport(create_app(), threads=args.threads)
+        logging.getLogger('app').setLevel(logging.WARNING)  # Sin una línea de log por partida
+
+    try:
+        summary = asyncio.run(run_load(
+            transport, players=args.players, games=args.games, shuffles=args.shuffles, ramp=args.ramp,
+            duration=args.duration, think=args.think, seed=args.seed, game_rules=args.rules,
+            report_every=args.report_every
+        ))
+    finally:
+        transport.shutdown()
+
+    print(format_report(summary))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summary, f, indent=2)
+            f.write('\n')
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,343 @@
+"""
+Suite de microbenchmarks de los caminos calientes del mazo y la partida.
+
+Cada benchmark mide el tiempo por operación (µs) de un método de
+``DeckShuffle`` o ``PokerGame`` o de una partida completa a través del
+cliente de pruebas de Flask. La preparación (partidas a mitad de juego,
+mazos...) queda fuera de la parte medida: se crean antes los objetos y solo
+se cronometra el bucle de llamadas (con el recolector de ciclos parado, como
+``timeit``). Se repite cada medición y se guarda el mínimo (lo menos afectado
+por el ruido de la máquina) y la mediana; conviene comparar resultados
+obtenidos con el mismo ``--scale``.
+
+Los resultados se guardan como JSON (``--save``) y se comparan con una línea
+base (``--compare``): si algún benchmark es más lento que la base en más de
+``--threshold`` (25 % por defecto) el comando termina con código 1. Junto a
+cada benchmark se mide un bucle de calibración; ``--normalize`` lo usa para
+descontar los cambios de velocidad de la máquina (VMs, portátiles).
+
+Uso (desde backend/):
+    python -m benchmarks.suite --save benchmarks/baselines/local.json
+    python -m benchmarks.suite --compare benchmarks/baselines/local.json
+    python -m benchmarks.suite --only game.place_card --quick
+    python -m benchmarks.suite --compare antes.json --current despues.json
+"""
+import argparse
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+
+from app.models.cards import PILE_OF
+from app.models.deck import DeckShuffle, riffle_permutation
+from app.models.game import PokerGame
+from app.models.rules import GAME_RULES
+
+DEFAULT_THRESHOLD = 0.25
+
+BENCHMARKS = {}  # nombre -> (función(number) -> segundos totales, operaciones por defecto)
+
+
+def benchmark(name, number):
+    """Registrar ``func(number)``: debe devolver los segundos que tardan ``number`` operaciones"""
+    def register(func):
+        BENCHMARKS[name] = (func, number)
+        return func
+    return register
+
+
+def _new_game(seed, game_rules, cuts=(26, 13, 39)):
+    deck = DeckShuffle(initial_seed=seed)
+    for cut_point in cuts:
+        deck.cut_and_shuffle(cut_point)
+    return PokerGame(deck, game_rules=game_rules)
+
+
+def _positions(number, game_rules, pending):
+    """
+    ``number`` partidas en momentos distintos de la partida (snapshots
+    restaurados) listas para voltear (``pending=False``) o para colocar la
+    carta pendiente (``pending=True``), con el montón de la siguiente acción.
+    """
+    positions = []
+    seed = 0
+    while len(positions) < number:
+        game = _new_game(seed, game_rules)
+        game.start_game()
+        seed += 1
+        while game.status == 'playing' and len(positions) < number:
+            pile = game._get_next_flip_pile()
+            if not pending:
+                positions.append((PokerGame.from_bytes(game.to_bytes()), pile))
+            card = game.flip_card_from_pile(pile)
+            if pending:
+                positions.append((PokerGame.from_bytes(game.to_bytes()), PILE_OF[card]))
+            game.place_card(PILE_OF[card])
+    return positions
+
+
+@benchmark('deck.init', 20000)
+def bench_deck_init(number):
+    seeds = range(number)
+    start = time.perf_counter()
+    for seed in seeds:
+        DeckShuffle(initial_seed=seed)
+    return time.perf_counter() - start
+
+
+@benchmark('deck.init_shuffled', 2000)
+def bench_deck_init_shuffled(number):
+    seeds = range(number)
+    start = time.perf_counter()
+    for seed in seeds:
+        DeckShuffle(initial_seed=seed, start_ordered=False)
+    return time.perf_counter() - start
+
+
+@benchmark('deck._initial_shuffle', 2000)
+def bench_initial_shuffle(number):
+    decks = [DeckShuffle(initial_seed=seed) for seed in range(number)]
+    start = time.perf_counter()
+    for deck in decks:
+        deck._initial_shuffle(deck.initial_seed)
+    return time.perf_counter() - start
+
+
+@benchmark('deck.cut_and_shuffle', 20000)
+def bench_cut_and_shuffle(number):
+    """Con la permutación ya en caché (el caso habitual: semillas módulo 1000)"""
+    decks = [DeckShuffle(initial_seed=seed % 50) for seed in range(number)]
+    for deck in decks[:50]:
+        DeckShuffle(initial_seed=deck.initial_seed).cut_and_shuffle(26)
+    start = time.perf_counter()
+    for deck in decks:
+        deck.cut_and_shuffle(26)
+    return time.perf_counter() - start
+
+
+@benchmark('deck.cut_and_shuffle.cold', 1000)
+def bench_cut_and_shuffle_cold(number):
+    """Calculando la permutación (caché vacía)"""
+    decks = [DeckShuffle(initial_seed=seed) for seed in range(number)]
+    riffle_permutation.cache_clear()
+    start = time.perf_counter()
+    for deck in decks:
+        deck.cut_and_shuffle(26)
+    return time.perf_counter() - start
+
+
+def _bench_start_game(game_rules):
+    def run(number):
+        games = [_new_game(seed, game_rules) for seed in range(number)]
+        start = time.perf_counter()
+        for game in games:
+            game.start_game()
+        return time.perf_counter() - start
+    return run
+
+
+def _bench_flip(game_rules):
+    def run(number):
+        positions = _positions(number, game_rules, pending=False)
+        start = time.perf_counter()
+        for game, pile in positions:
+            game.flip_card_from_pile(pile)
+        return time.perf_counter() - start
+    return run
+
+
+def _bench_place(game_rules):
+    def run(number):
+        positions = _positions(number, game_rules, pending=True)
+        start = time.perf_counter()
+        for game, pile in positions:
+            game.place_card(pile)
+        return time.perf_counter() - start
+    return run
+
+
+for _rules in GAME_RULES:
+    benchmark(f'game.start_game[{_rules}]', 5000)(_bench_start_game(_rules))
+    benchmark(f'game.flip_card_from_pile[{_rules}]', 5000)(_bench_flip(_rules))
+    benchmark(f'game.place_card[{_rules}]', 5000)(_bench_place(_rules))
+
+
+@benchmark('game.get_game_state', 5000)
+def bench_get_game_state(number):
+    """Construyendo el estado (primera llamada tras un cambio)"""
+    games = [game for game, _ in _positions(number, 'original', pending=False)]
+    start = time.perf_counter()
+    for game in games:
+        game.get_game_state()
+    return time.perf_counter() - start
+
+
+@benchmark('game.get_game_state.cached', 100000)
+def bench_get_game_state_cached(number):
+    """Sin cambios desde la llamada anterior (sondeos de /state)"""
+    game, _ = _positions(20, 'original', pending=False)[-1]
+    game.get_game_state()
+    start = time.perf_counter()
+    for _ in range(number):
+        game.get_game_state()
+    return time.perf_counter() - start
+
+
+@benchmark('e2e.flask_game', 20)
+def bench_flask_game(number):
+    """Partida completa por HTTP como la juega el frontend: /new, 3 /shuffle, /start, /flip-card + /place-card"""
+    from app import create_app
+
+    client = create_app().test_client()
+    logging.getLogger('app').setLevel(logging.WARNING)  # Sin una línea de log por partida
+    start = time.perf_counter()
+    for index in range(number):
+        game_id = f'bench-{index}'
+        client.post('/api/game/new', json={'game_id': game_id})
+        for cut_point in (26, 13, 39):
+            client.post('/api/game/shuffle', json={'game_id': game_id, 'cut_point': cut_point})
+        state = client.post('/api/game/start', json={'game_id': game_id}).get_json()['game_state']
+        while state['status'] == 'playing':
+            flip = client.post('/api/game/flip-card', json={'game_id': game_id, 'pile': state['next_flip_pile']})
+            card = flip.get_json()['card']
+            state = client.post('/api/game/place-card',
+                                json={'game_id': game_id, 'pile': card[0]}).get_json()['game_state']
+    return time.perf_counter() - start
+
+
+def _calibration():
+    """Segundos de un bucle Python fijo: mide la velocidad de la máquina en ese momento"""
+    start = time.perf_counter()
+    total = 0
+    for i in range(20000):
+        total += i % 7
+    return time.perf_counter() - start
+
+
+def run_suite(names=None, repeat=5, scale=1.0):
+    """Ejecutar los benchmarks (todos o ``names``) y devolver los resultados por nombre"""
+    results = {}
+    for name, (func, number) in BENCHMARKS.items():
+        if names is not None and name not in names:
+            continue
+        number = max(1, int(number * scale))
+        samples = []
+        calibration = []
+        for _ in range(repeat):
+            # Como timeit: sin pausas del recolector de ciclos dentro de la medición
+            gc.collect()
+            gc.disable()
+            try:
+                calibration.append(_calibration() * 1e6)
+                samples.append(func(number) / number * 1e6)
+            finally:
+                gc.enable()
+        results[name] = {
+            'min_us': round(min(samples), 4),
+            'median_us': round(statistics.median(samples), 4),
+            'calibration_us': round(min(calibration), 2),
+            'number': number,
+            'repeat': repeat
+        }
+    return results
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD, normalize=False):
+    """
+    Comparar dos ``results`` por su mínimo. Devuelve ``(filas, regresiones)``:
+    una fila ``(nombre, base_us, actual_us, cambio)`` por benchmark común y los
+    nombres más lentos que la base en más de ``threshold`` (0.25 = 25 %).
+    Con ``normalize`` el cambio se corrige con la calibración medida junto a
+    cada benchmark (máquinas compartidas cuya velocidad varía entre ejecuciones).
+    """
+    rows = []
+    regressions = []
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['min_us'], result['min_us']
+        change = after / before - 1 if before else 0.0
+        if normalize and 'calibration_us' in baseline[name] and 'calibration_us' in result:
+            change = (1 + change) * baseline[name]['calibration_us'] / result['calibration_us'] - 1
+        rows.append((name, before, after, change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def _metadata(args):
+    return {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'scale': args.scale
+    }
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Microbenchmarks de DeckShuffle, PokerGame y la API')
+    parser.add_argument('--only', action='append', help='Ejecutar solo los benchmarks que empiezan así (repetible)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplicar el número de operaciones')
+    parser.add_argument('--quick', action='store_const', const=0.1, dest='scale', help='Equivale a --scale 0.1')
+    parser.add_argument('--save', help='Guardar los resultados como JSON (línea base)')
+    parser.add_argument('--compare', help='Línea base JSON con la que comparar')
+    parser.add_argument('--current', help='Resultados JSON ya guardados en lugar de ejecutar la suite')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Regresión máxima tolerada (0.25 = 25 %% más lento)')
+    parser.add_argument('--normalize', action='store_true',
+                        help='Corregir la comparación con la velocidad de la máquina medida en cada ejecución')
+    parser.add_argument('--list', action='store_true', help='Listar los benchmarks')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (func, number) in BENCHMARKS.items():
+            print(f'{name:40} {number:>7}  {(func.__doc__ or "").strip()}')
+        return 0
+
+    if args.current:
+        results = _load(args.current)
+    else:
+        names = None
+        if args.only:
+            names = {name for name in BENCHMARKS if name.startswith(tuple(args.only))}
+        results = run_suite(names, repeat=args.repeat, scale=args.scale)
+
+    if args.save:
+        directory = os.path.dirname(args.save)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump({'meta': _metadata(args), 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if not args.compare:
+        for name, result in results.items():
+            print(f'{name:40} {result["min_us"]:>12.3f} µs  (mediana {result["median_us"]:.3f})')
+        return 0
+
+    rows, regressions = compare_results(_load(args.compare), results, args.threshold, args.normalize)
+    for name, before, after, change in rows:
+        mark = '  REGRESIÓN' if name in regressions else ''
+        print(f'{name:40} {before:>12.3f} -> {after:>12.3f} µs  {change:+7.1%}{mark}')
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) más de {args.threshold:.0%} más lentos que la base', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
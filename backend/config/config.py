@@ -3,10 +3,50 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-poker'
     DEBUG = True
     HOST = '0.0.0.0'
     PORT = 5000
+    
+    # Logging (app.utils.logger): DEBUG activa las trazas de cada jugada
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+    LOG_QUEUE_SIZE = 10000
+    
+    # Backend de partidas: 'memory' (un proceso) o 'sqlite' (compartido entre workers, WAL)
+    GAME_BACKEND = os.environ.get('GAME_BACKEND', 'memory')
+    GAME_DB_PATH = os.environ.get('GAME_DB_PATH') or os.path.join(basedir, 'data', 'games.db')
+    
+    # Almacén de partidas (app.services.game_store): máximo en memoria, TTL de inactividad (s)
+    # y SQLite opcional donde se vuelcan las partidas expulsadas
+    GAME_STORE_MAX_GAMES = int(os.environ.get('GAME_STORE_MAX_GAMES', 10000))
+    GAME_STORE_TTL = int(os.environ.get('GAME_STORE_TTL', 3600))
+    GAME_STORE_SPILL_PATH = os.environ.get('GAME_STORE_SPILL_PATH')
+    GAME_STORE_SHARDS = int(os.environ.get('GAME_STORE_SHARDS', 16))
+    
+    # Stream de eventos (asgi.py, /api/game/stream): cola por suscriptor, latido (s) e hilos para Flask
+    EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 8))
+    EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', 15))
+    ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 16))
+    
+    # Métricas (/metrics, formato Prometheus): tiempos de los modelos en las rutas (opcional) y perfil
+    # de 1 de cada PROFILE_SAMPLE_RATE peticiones (0 = desactivado), consultables en /admin/profiles
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_MODEL_TIMINGS = os.environ.get('METRICS_MODEL_TIMINGS', '0') != '0'
+    PROFILE_SAMPLE_RATE = int(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_BUFFER_SIZE = int(os.environ.get('PROFILE_BUFFER_SIZE', 20))
+    PROFILE_TOP = int(os.environ.get('PROFILE_TOP', 15))
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    
+    # Tablas de /best-cuts (python -m app.services.cut_tree); hasta esta profundidad se generan al vuelo
+    CUT_TABLES_DIR = os.environ.get('CUT_TABLES_DIR') or os.path.join(basedir, 'data', 'cut_tables')
+    CUT_TABLES_ONLINE_DEPTH = int(os.environ.get('CUT_TABLES_ONLINE_DEPTH', 2))
+    # Tablas abiertas a la vez (un mmap y un descriptor cada una) y segundos que una petición
+    # espera a que se genere su tabla antes de responder 503
+    CUT_TABLES_CACHE_SIZE = int(os.environ.get('CUT_TABLES_CACHE_SIZE', 64))
+    CUT_TABLES_BUILD_WAIT = float(os.environ.get('CUT_TABLES_BUILD_WAIT', 1.0))
 
 config = Config()
\ No newline at end of file
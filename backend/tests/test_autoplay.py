@@ -0,0 +1,68 @@
+from app import create_app
+from app.models.cards import card_from_str
+from app.models.predictor import predict_outcome
+
+
+def new_started_game(client, game_id, cut_point, game_rules='original'):
+    client.post('/api/game/new', json={'game_id': game_id, 'game_rules': game_rules})
+    response = client.post('/api/game/shuffle', json={'game_id': game_id, 'cut_point': cut_point})
+    deck = [card_from_str(card) for card in response.get_json()['deck_after']]
+    client.post('/api/game/start', json={'game_id': game_id})
+    return deck
+
+
+def test_play_turn_and_autoplay_match_the_predictor():
+    client = create_app().test_client()
+    for cut_point in range(1, 52, 5):
+        for rules in ('original', 'alternative'):
+            deck = new_started_game(client, 'turns', cut_point, rules)
+            prediction = predict_outcome(deck, rules)
+
+            turns = 0
+            body = {'game_state': {'status': 'playing'}}
+            while body['game_state']['status'] == 'playing':
+                body = client.post('/api/game/play-turn', json={'game_id': 'turns'}).get_json()
+                assert body['success']
+                turns += 1
+            assert body['game_state']['status'] == prediction['status']
+            assert turns == prediction['moves_count']
+            assert card_from_str(body['card']) == prediction['card']
+
+            deck = new_started_game(client, 'auto', cut_point, rules)
+            prediction = predict_outcome(deck, rules)
+            body = client.post('/api/game/autoplay', json={'game_id': 'auto'}).get_json()
+            assert body['game_state']['status'] == prediction['status']
+            assert body['turns_count'] == len(body['turns']) == prediction['moves_count']
+            assert body['game_over'] and body['won'] == (prediction['status'] == 'won')
+
+
+def test_autoplay_respects_max_turns_and_pending_cards():
+    client = create_app().test_client()
+    new_started_game(client, 'partial', 20)
+    state = client.get('/api/game/state?game_id=partial').get_json()['game_state']
+    flipped = client.post('/api/game/flip-card', json={'game_id': 'partial', 'pile': state['next_flip_pile']}).get_json()
+
+    body = client.post('/api/game/play-turn', json={'game_id': 'partial'}).get_json()
+    assert body['card'] == flipped['card']
+    assert body['from'] == state['next_flip_pile']
+
+    body = client.post('/api/game/autoplay', json={'game_id': 'partial', 'max_turns': 3}).get_json()
+    assert body['turns_count'] <= 3
+    assert body['game_state']['moves_count'] == 1 + body['turns_count']
+
+    client.post('/api/game/autoplay', json={'game_id': 'partial'})
+    response = client.post('/api/game/play-turn', json={'game_id': 'partial'})
+    assert response.status_code == 400
+
+
+def test_autoplay_rejects_invalid_max_turns():
+    client = create_app().test_client()
+    new_started_game(client, 'invalid', 20)
+    for max_turns in ('5', -1, 2.5, True, [3]):
+        response = client.post('/api/game/autoplay', json={'game_id': 'invalid', 'max_turns': max_turns})
+        assert response.status_code == 400
+    state = client.get('/api/game/state?game_id=invalid').get_json()['game_state']
+    assert state['status'] == 'playing' and state['moves_count'] == 0
+
+    body = client.post('/api/game/autoplay', json={'game_id': 'invalid', 'max_turns': 0}).get_json()
+    assert body['success'] and body['turns_count'] == 0
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from app.models.cards import PILE_OF, new_pile
+from app.models.deck import DeckShuffle
+from app.models.game import PokerGame
+from app.services.batch_simulator import REASON_NAMES, simulate_batch
+
+
+def play_poker_game(order, rules):
+    deck = DeckShuffle()
+    deck.deck = new_pile(order)
+    game = PokerGame(deck, game_rules=rules)
+    game.start_game()
+    result = {}
+    while game.status == 'playing':
+        card = game.flip_card_from_pile(game._get_next_flip_pile())
+        result = game.place_card(PILE_OF[card])
+    return game, result
+
+
+def test_batch_matches_poker_game_on_random_decks():
+    rng = random.Random(7)
+    orders = []
+    for _ in range(250):
+        order = list(range(52))
+        rng.shuffle(order)
+        orders.append(order)
+
+    results = simulate_batch(np.array(orders))
+
+    for rules in ('original', 'alternative'):
+        batch = results[rules]
+        for row, order in enumerate(orders):
+            game, result = play_poker_game(order, rules)
+            assert bool(batch['won'][row]) == (game.status == 'won')
+            assert int(batch['moves_count'][row]) == len(game.moves)
+            reason = REASON_NAMES[int(batch['reason'][row])]
+            if game.status == 'won':
+                assert reason is None
+            else:
+                assert reason == ('fourth_king' if '4to Rey' in result['message'] else 'own_pile')
+
+
+def test_batch_rejects_bad_shape():
+    with pytest.raises(ValueError):
+        simulate_batch(np.zeros((3, 51), dtype=np.uint8))
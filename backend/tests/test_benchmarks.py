@@ -0,0 +1,36 @@
+import json
+
+from benchmarks.suite import BENCHMARKS, compare_results, main, run_suite
+
+
+def test_suite_covers_the_hot_paths():
+    for rules in ('original', 'alternative'):
+        for method in ('start_game', 'flip_card_from_pile', 'place_card'):
+            assert f'game.{method}[{rules}]' in BENCHMARKS
+    assert {'deck.init', 'deck._initial_shuffle', 'deck.cut_and_shuffle', 'game.get_game_state',
+            'e2e.flask_game'} <= set(BENCHMARKS)
+
+    results = run_suite({'deck.init', 'game.place_card[alternative]'}, repeat=2, scale=0.01)
+    assert set(results) == {'deck.init', 'game.place_card[alternative]'}
+    for result in results.values():
+        assert 0 < result['min_us'] <= result['median_us']
+        assert result['repeat'] == 2 and result['calibration_us'] > 0
+
+
+def test_compare_flags_regressions_past_the_threshold(tmp_path):
+    baseline = {'a': {'min_us': 1.0, 'calibration_us': 100.0}, 'b': {'min_us': 2.0, 'calibration_us': 100.0}}
+    current = {'a': {'min_us': 1.2, 'calibration_us': 100.0}, 'b': {'min_us': 3.0, 'calibration_us': 150.0},
+               'new': {'min_us': 5.0, 'calibration_us': 100.0}}
+
+    rows, regressions = compare_results(baseline, current, threshold=0.25)
+    assert [row[0] for row in rows] == ['a', 'b'] and regressions == ['b']
+    # Toda la máquina un 50 % más lenta: no es una regresión
+    assert compare_results(baseline, current, threshold=0.25, normalize=True)[1] == []
+
+    paths = []
+    for name, results in (('base', baseline), ('current', current)):
+        paths.append(tmp_path / f'{name}.json')
+        paths[-1].write_text(json.dumps({'meta': {}, 'results': results}))
+    args = ['--compare', str(paths[0]), '--current', str(paths[1])]
+    assert main(args) == 1
+    assert main(args + ['--threshold', '0.6']) == 0
@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from app import create_app
+from app.models.cards import PILE_OF, card_from_str
+from app.models.predictor import predict_outcome
+from app.routes import game_routes
+
+THREADS = 8
+
+
+@pytest.fixture
+def app():
+    return create_app()
+
+
+def run_threads(target, count=THREADS):
+    errors = []
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        try:
+            barrier.wait()
+            target(index)
+        except Exception as e:  # pragma: no cover - se reporta abajo
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors
+
+
+def new_started_game(client, game_id, cut_point, game_rules='original'):
+    client.post('/api/game/new', json={'game_id': game_id, 'game_rules': game_rules})
+    response = client.post('/api/game/shuffle', json={'game_id': game_id, 'cut_point': cut_point})
+    deck = [card_from_str(card) for card in response.get_json()['deck_after']]
+    state = client.post('/api/game/start', json={'game_id': game_id}).get_json()['game_state']
+    return deck, state
+
+
+def test_threads_on_the_same_game_never_lose_cards(app):
+    client = app.test_client()
+    new_started_game(client, 'shared', cut_point=17)
+    flips = []
+
+    def play(index):
+        thread_client = app.test_client()
+        for _ in range(200):
+            state = thread_client.get('/api/game/state?game_id=shared').get_json()['game_state']
+            if state['status'] != 'playing':
+                return
+            if state['next_flip_pile'] is None:
+                continue
+            response = thread_client.post('/api/game/flip-card',
+                                          json={'game_id': 'shared', 'pile': state['next_flip_pile']})
+            if response.status_code != 200:
+                continue
+            card = card_from_str(response.get_json()['card'])
+            flips.append(card)
+            response = thread_client.post('/api/game/place-card', json={'game_id': 'shared', 'pile': PILE_OF[card]})
+            assert response.status_code == 200
+
+    run_threads(play)
+
+    game = game_routes.active_games.get('shared')
+    assert game.status in ('won', 'lost')
+    assert len(flips) == len(set(flips)) == len(game.moves)
+    face_up = [card for pile in game.piles.values() for card in pile]
+    face_down = [card for pile in game.face_down_cards.values() for card in pile]
+    assert sorted(face_up + face_down) == list(range(52))
+
+
+def test_threads_on_different_games_match_the_predictor(app):
+    results = {}
+
+    def play(index):
+        thread_client = app.test_client()
+        game_id = f'game-{index}'
+        rules = ('original', 'alternative')[index % 2]
+        deck, state = new_started_game(thread_client, game_id, cut_point=5 + index * 6, game_rules=rules)
+        while state['status'] == 'playing':
+            response = thread_client.post('/api/game/flip-card',
+                                          json={'game_id': game_id, 'pile': state['next_flip_pile']})
+            card = card_from_str(response.get_json()['card'])
+            response = thread_client.post('/api/game/place-card', json={'game_id': game_id, 'pile': PILE_OF[card]})
+            state = response.get_json()['game_state']
+        results[game_id] = (predict_outcome(deck, rules), state)
+
+    run_threads(play)
+
+    assert len(results) == THREADS
+    for prediction, state in results.values():
+        assert prediction['status'] == state['status']
+        assert prediction['moves_count'] == state['moves_count']
@@ -0,0 +1,27 @@
+from app.models.deck import DeckShuffle
+from app.models.predictor import predict_outcome
+from app.services.cut_study import run_study
+
+
+def test_study_counts_match_direct_predictions():
+    sequences = [(26,), (10, 40)]
+    rows = run_study(sequences, games=30, first_seed=500, workers=1, chunk_size=7)
+
+    assert len(rows) == 4
+    for row in rows:
+        cuts = [int(cut) for cut in row['sequence'].split('-')]
+        wins = 0
+        for seed in range(500, 530):
+            deck = DeckShuffle(initial_seed=seed)
+            for cut_point in cuts:
+                deck.cut_and_shuffle(cut_point)
+            wins += predict_outcome(deck.deck, row['game_rules'])['status'] == 'won'
+        assert row['wins'] == wins
+        assert row['wins'] + row['own_pile_losses'] + row['fourth_king_losses'] == 30
+
+
+def test_process_pool_gives_same_table():
+    sequences = [(5,), (47,), (13, 13)]
+    serial = run_study(sequences, games=40, workers=1, chunk_size=10)
+    parallel = run_study(sequences, games=40, workers=2, chunk_size=10)
+    assert parallel == serial
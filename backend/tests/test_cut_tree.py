@@ -0,0 +1,109 @@
+import random
+import threading
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from app.models.deck import DeckShuffle
+from app.models.predictor import predict_outcome
+from app.services import cut_tree
+from app.services.cut_table_cache import BUILDING, CutTableCache
+from app.services.cut_tree import CutTable, sequence_from_index, sequence_index, write_cut_table
+
+
+def test_table_matches_replaying_every_sampled_sequence(tmp_path):
+    initial_seed = 2882400001
+    table = CutTable(write_cut_table(initial_seed, 2, str(tmp_path)))
+    rng = random.Random(3)
+
+    sequences = [[cut] for cut in range(1, 52)] + [[rng.randint(1, 51), rng.randint(1, 51)] for _ in range(150)]
+    for cuts in sequences:
+        deck = DeckShuffle(initial_seed=initial_seed)
+        for cut_point in cuts:
+            deck.cut_and_shuffle(cut_point)
+        for rules in ('original', 'alternative'):
+            expected = predict_outcome(deck.deck, rules)
+            assert table.outcome(cuts, rules) == {'status': expected['status'], 'reason': expected['reason']}
+
+    for rules in ('original', 'alternative'):
+        best = table.best(2, rules)
+        if best['winning_cuts']:
+            assert table.outcome(best['winning_cuts'], rules)['status'] == 'won'
+    table.close()
+
+
+def test_tables_are_shared_by_seeds_with_same_remainder(tmp_path):
+    path = write_cut_table(1000345, 1, str(tmp_path))
+    assert path == write_cut_table(345, 1, str(tmp_path))
+    assert CutTable.load(str(tmp_path), 7345, 1).seed_key == 345
+    assert CutTable.load(str(tmp_path), 7345, 2) is None
+
+
+def test_tables_from_other_versions_or_rules_are_rebuilt(tmp_path, monkeypatch):
+    path = write_cut_table(345, 1, str(tmp_path))
+    with open(path, 'r+b') as table:
+        table.seek(4)
+        table.write(bytes([cut_tree.FORMAT_VERSION - 1]))
+    assert CutTable.load(str(tmp_path), 345, 1) is None
+    with pytest.raises(ValueError):
+        CutTable(path)
+
+    write_cut_table(345, 1, str(tmp_path))
+    monkeypatch.setattr(cut_tree, 'RULES_CHECKSUM', cut_tree.RULES_CHECKSUM ^ 1)
+    assert CutTable.load(str(tmp_path), 345, 1) is None
+
+
+def test_building_fails_with_more_variants_than_fit_in_a_byte(monkeypatch):
+    monkeypatch.setattr(cut_tree, 'RULE_VARIANTS', ('a', 'b', 'c', 'd', 'e'))
+    with pytest.raises(ValueError):
+        cut_tree.build_cut_table(345, 1)
+
+
+def test_sequence_index_round_trip():
+    for cuts in ([1], [51], [26, 13], [51, 51, 51], [2, 1, 50, 7]):
+        assert sequence_from_index(sequence_index(cuts), len(cuts)) == cuts
+
+
+def test_cache_closes_evicted_tables_once_unused(tmp_path):
+    for seed in (1, 2, 3):
+        write_cut_table(seed, 1, str(tmp_path))
+    cache = CutTableCache(str(tmp_path), build_depth=0, max_tables=2)
+    with cache.table(1, 1) as first:
+        with cache.table(2, 1), cache.table(3, 1):
+            pass
+        expected = first.outcome([7])  # Expulsada pero en uso: sigue abierta
+    with pytest.raises(ValueError):
+        first.outcome([7])
+    with cache.table(1, 1) as reopened:
+        assert reopened is not first and reopened.outcome([7]) == expected
+    with cache.table(4, 1) as missing:
+        assert missing is None
+    cache.close()
+
+
+def test_missing_tables_are_built_once_outside_the_request(tmp_path, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    builds = []
+
+    def slow_build(initial_seed, depth, output_dir):
+        builds.append((initial_seed, depth))
+        started.set()
+        release.wait(5)
+        return write_cut_table(initial_seed, depth, output_dir)
+
+    monkeypatch.setattr(cut_tree, 'write_cut_table', slow_build)
+    cache = CutTableCache(str(tmp_path), build_depth=1, build_wait=0.05)
+    with cache.table(1005, 1) as table:
+        assert table == BUILDING
+    assert started.wait(5)
+    with cache.table(5, 1) as table:  # Misma tabla (semilla % 1000): no se genera otra vez
+        assert table == BUILDING
+    release.set()
+    cache.build_wait = 5
+    with cache.table(5, 1) as table:
+        assert table.best(1)['sequences'] == 51
+    assert builds == [(5, 1)]
+    with cache.table(5, 2) as table:  # Más profunda que build_depth: no se genera al vuelo
+        assert table is None
+    cache.close()
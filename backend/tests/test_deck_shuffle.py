@@ -0,0 +1,130 @@
+import pytest
+
+from app.models.deck import DeckShuffle, riffle_permutation
+
+
+def legacy_cut_and_shuffle(deck, cut_point, shuffle_count, initial_seed):
+    """Implementación original (carta por carta) usada como referencia."""
+    if cut_point < 1 or cut_point > 51:
+        cut_point = 26
+
+    top_half = deck[:cut_point].copy()
+    bottom_half = deck[cut_point:].copy()
+
+    shuffled = []
+    left_index = 0
+    right_index = 0
+
+    def should_take_from_left(position, left_size, right_size, left_used, right_used, cut_pt, shuffle_cnt):
+        if left_used >= left_size:
+            return False
+        if right_used >= right_size:
+            return True
+
+        left_progress = left_used / left_size if left_size > 0 else 1.0
+        right_progress = right_used / right_size if right_size > 0 else 1.0
+
+        seed_base = (position * 7) + (cut_pt * 13) + (shuffle_cnt * 31)
+        if initial_seed is not None:
+            seed_base += (initial_seed * 97)
+            seed_base += ((initial_seed % 1000) * position)
+        determinism = (seed_base % 1000) / 1000.0
+
+        progress_diff = abs(left_progress - right_progress)
+
+        if progress_diff < 0.2:
+            return determinism < 0.5
+        base_preference = left_progress < right_progress
+        change_threshold = 0.15 + (determinism * 0.2)
+        if progress_diff < change_threshold:
+            if determinism < 0.5:
+                return not base_preference
+            return base_preference
+        determinism_modifier = (determinism - 0.5) * 0.3
+        return (left_progress + determinism_modifier) < (right_progress - determinism_modifier)
+
+    while left_index < len(top_half) or right_index < len(bottom_half):
+        take_from_left = should_take_from_left(
+            len(shuffled), len(top_half), len(bottom_half),
+            left_index, right_index, cut_point, shuffle_count
+        )
+        if take_from_left and left_index < len(top_half):
+            shuffled.append(top_half[left_index])
+            left_index += 1
+        elif right_index < len(bottom_half):
+            shuffled.append(bottom_half[right_index])
+            right_index += 1
+        elif left_index < len(top_half):
+            shuffled.append(top_half[left_index])
+            left_index += 1
+
+    return shuffled
+
+
+def test_cut_and_shuffle_matches_legacy_for_every_cut():
+    for initial_seed in (None, 0, 7, 123456, 2882400001):
+        for cut_point in range(1, 52):
+            deck = DeckShuffle(initial_seed=initial_seed)
+            expected = list(deck.get_deck())
+            for shuffle_count in range(3):
+                expected = legacy_cut_and_shuffle(expected, cut_point, shuffle_count, initial_seed)
+                deck.cut_and_shuffle(cut_point)
+                assert list(deck.get_deck()) == expected, (initial_seed, cut_point, shuffle_count)
+
+
+def test_cut_and_shuffle_matches_legacy_for_cut_sequences():
+    initial_seed = DeckShuffle()._hash_seed('game-1234567890')
+    deck = DeckShuffle(initial_seed=initial_seed)
+    expected = list(deck.get_deck())
+    for shuffle_count, cut_point in enumerate([26, 1, 51, 13, 0, 60, 39]):
+        expected = legacy_cut_and_shuffle(expected, cut_point, shuffle_count, initial_seed)
+        deck.cut_and_shuffle(cut_point)
+        assert list(deck.get_deck()) == expected
+
+
+def test_permutation_is_cached_and_handles_short_decks():
+    first = riffle_permutation(52, 26, 0, 42)
+    assert riffle_permutation(52, 26, 0, 42) is first
+    assert sorted(first) == list(range(52))
+
+    short_deck = list(range(10))
+    expected = legacy_cut_and_shuffle(short_deck, 30, 0, 42)
+    assert [short_deck[i] for i in riffle_permutation(10, 30, 0, 42)] == expected
+    assert riffle_permutation(0, 30, 0, 42) == ()
+
+
+def test_shuffle_many_matches_cut_and_shuffle():
+    np = pytest.importorskip('numpy')
+    rng = np.random.default_rng(5)
+    seeds = np.concatenate([[0, 999, 2 ** 32 - 1], rng.integers(0, 2 ** 32, 200)])
+    cut_sequences = rng.integers(0, 56, (seeds.shape[0], 4))
+
+    decks = DeckShuffle.shuffle_many(seeds, cut_sequences)
+
+    assert decks.shape == (seeds.shape[0], 52)
+    for seed, cuts, row in zip(seeds.tolist(), cut_sequences.tolist(), decks.tolist()):
+        deck = DeckShuffle(initial_seed=seed)
+        for cut_point in cuts:
+            deck.cut_and_shuffle(cut_point)
+        assert list(deck.get_deck()) == row
+
+
+def test_shuffle_many_broadcasts_a_common_cut_sequence():
+    np = pytest.importorskip('numpy')
+    decks = DeckShuffle.shuffle_many([11, 22], [26, 13])
+    for seed, row in zip((11, 22), decks.tolist()):
+        deck = DeckShuffle(initial_seed=seed)
+        deck.cut_and_shuffle(26)
+        deck.cut_and_shuffle(13)
+        assert list(deck.get_deck()) == row
+
+
+def test_permutation_table_matches_scalar_permutations():
+    pytest.importorskip('numpy')
+    from app.models.deck import _riffle_permutation_table
+
+    table = _riffle_permutation_table(1)
+    for cut_point in (1, 17, 26, 51):
+        for seed_key in (0, 1, 499, 999):
+            row = table[(cut_point - 1) * 1000 + seed_key]
+            assert tuple(row.tolist()) == riffle_permutation(52, cut_point, 1, seed_key)
@@ -1,9 +1,13 @@
+import pytest
+
+from app import create_app
 from app.models.deck import DeckShuffle
 from app.models.game import PokerGame
+from app.models.cards import card_from_str, new_pile
 
 
 def make_dummy_card(value, idx=0):
-    return f"{value}C"
+    return card_from_str(f"{value}C")
 
 
 def test_final_move_from_same_pile_counts_as_win():
@@ -12,16 +16,18 @@ def test_final_move_from_same_pile_counts_as_win():
     game.status = 'playing'
 
     for p in game.piles:
-        game.piles[p] = []
-        game.face_down_cards[p] = []
+        game.piles[p] = new_pile()
+        game.face_down_cards[p] = new_pile()
 
     for p in game.piles:
         if p == '2':
-            game.piles[p] = [make_dummy_card(p) for _ in range(3)]
-            game.face_down_cards[p] = [make_dummy_card(p, 99)]
+            game.piles[p] = new_pile([make_dummy_card(p) for _ in range(3)])
+            game.face_down_cards[p] = new_pile([make_dummy_card(p, 99)])
         else:
-            game.piles[p] = [make_dummy_card(p) for _ in range(4)]
-            game.face_down_cards[p] = []
+            game.piles[p] = new_pile([make_dummy_card(p) for _ in range(4)])
+            game.face_down_cards[p] = new_pile()
+
+    game._sync_counters()
 
     card = game.flip_card_from_pile('2')
     assert card is not None, 'flip_card_from_pile returned None'
@@ -39,3 +45,23 @@ if __name__ == '__main__':
     except AssertionError as e:
         print('TEST FAILED:', e)
         raise
+
+
+def test_second_start_keeps_the_dealt_cards():
+    deck = DeckShuffle(initial_seed=5)
+    deck.cut_and_shuffle(20)
+    game = PokerGame(deck)
+    game.start_game()
+    state = game.get_game_state()
+    with pytest.raises(ValueError, match='ya se inició'):
+        game.start_game()
+    assert game.get_game_state() == state and sum(state['face_down_cards'].values()) == 52
+
+    client = create_app().test_client()
+    client.post('/api/game/new', json={'game_id': 'doble'})
+    client.post('/api/game/shuffle', json={'game_id': 'doble', 'cut_point': 20})
+    assert client.post('/api/game/start', json={'game_id': 'doble'}).status_code == 200
+    response = client.post('/api/game/start', json={'game_id': 'doble'})
+    assert response.status_code == 400 and 'ya se inició' in response.get_json()['error']
+    state = client.get('/api/game/state?game_id=doble').get_json()['game_state']
+    assert state['next_flip_pile'] is not None and sum(state['face_down_cards'].values()) == 52
@@ -1,9 +1,10 @@
 from app.models.deck import DeckShuffle
 from app.models.game import PokerGame
+from app.models.cards import card_from_str, new_pile
 
 
 def make_dummy_card(value):
-    return f"{value}C"
+    return card_from_str(f"{value}C")
 
 
 def scenario_loss_when_complete_from_same_pile():
@@ -13,18 +14,19 @@ def scenario_loss_when_complete_from_same_pile():
     game.status = 'playing'
 
     for p in game.piles:
-        game.piles[p] = []
-        game.face_down_cards[p] = []
+        game.piles[p] = new_pile()
+        game.face_down_cards[p] = new_pile()
 
     for p in game.piles:
         if p == '3':
-            game.piles[p] = [make_dummy_card(p) for _ in range(3)]
-            game.face_down_cards[p] = []
+            game.piles[p] = new_pile([make_dummy_card(p) for _ in range(3)])
+            game.face_down_cards[p] = new_pile()
         else:
-            game.piles[p] = [make_dummy_card(p) for _ in range(4)]
+            game.piles[p] = new_pile([make_dummy_card(p) for _ in range(4)])
 
     game.current_card = make_dummy_card('3')
     game.current_card_source = '3'
+    game._sync_counters()
 
     result = game.place_card('3')
     assert result.get('game_over') is True
@@ -38,17 +40,18 @@ def scenario_win_when_last_completed_all():
     game.status = 'playing'
 
     for p in game.piles:
-        game.piles[p] = []
-        game.face_down_cards[p] = []
+        game.piles[p] = new_pile()
+        game.face_down_cards[p] = new_pile()
 
     for p in game.piles:
         if p == '2':
-            game.piles[p] = [make_dummy_card(p) for _ in range(3)]
+            game.piles[p] = new_pile([make_dummy_card(p) for _ in range(3)])
         else:
-            game.piles[p] = [make_dummy_card(p) for _ in range(4)]
+            game.piles[p] = new_pile([make_dummy_card(p) for _ in range(4)])
 
     game.current_card = make_dummy_card('2')
     game.current_card_source = '2'
+    game._sync_counters()
 
     result = game.place_card('2')
     assert result.get('game_over') is True
@@ -62,16 +65,17 @@ def scenario_king_from_other_pile_does_not_auto_lose():
     game.status = 'playing'
 
     for p in game.piles:
-        game.piles[p] = []
-        game.face_down_cards[p] = []
+        game.piles[p] = new_pile()
+        game.face_down_cards[p] = new_pile()
 
     game.kings_revealed = 3
     for p in game.piles:
-        game.piles[p] = [make_dummy_card(p) for _ in range(4)]
-    game.piles['K'] = [make_dummy_card('K') for _ in range(3)]
-    game.face_down_cards['K'] = [make_dummy_card('K')]
-    game.current_card = 'KC'
+        game.piles[p] = new_pile([make_dummy_card(p) for _ in range(4)])
+    game.piles['K'] = new_pile([make_dummy_card('K') for _ in range(3)])
+    game.face_down_cards['K'] = new_pile([make_dummy_card('K')])
+    game.current_card = card_from_str('KC')
     game.current_card_source = 'J'
+    game._sync_counters()
 
     result = game.place_card('K')
     assert result.get('game_over') in (None, False) or result.get('won') is False
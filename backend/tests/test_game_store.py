@@ -0,0 +1,154 @@
+import threading
+import timeit
+
+from app.models.deck import DeckShuffle
+from app.models.game import PokerGame
+from app.services.game_store import GameStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def new_game(seed=1):
+    deck = DeckShuffle(initial_seed=seed)
+    deck.cut_and_shuffle(26)
+    return PokerGame(deck)
+
+
+def test_lru_eviction_keeps_recently_used_games():
+    store = GameStore(max_games=2, ttl=100)
+    store['a'] = new_game()
+    store['b'] = new_game()
+    assert store.get('a') is not None
+    store['c'] = new_game()
+
+    assert 'b' not in store
+    assert store.keys() == ['a', 'c']
+    assert store.stats()['evictions'] == 1
+
+
+def test_idle_games_expire_after_ttl():
+    clock = FakeClock()
+    store = GameStore(max_games=10, ttl=60, clock=clock)
+    store['old'] = new_game()
+    clock.now = 30
+    store['recent'] = new_game()
+    clock.now = 75
+    store.get('recent')
+
+    assert store.keys() == ['recent']
+    assert store.get('old') is None
+    stats = store.stats()
+    assert stats['expirations'] == 1
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+
+def test_evicted_games_are_rehydrated_from_sqlite(tmp_path):
+    store = GameStore(max_games=1, ttl=100, spill_path=str(tmp_path / 'games.db'))
+    game = new_game(seed=42)
+    game.start_game()
+    game.flip_card_from_pile(game._get_next_flip_pile())
+    expected = game.get_game_state()
+
+    store['a'] = game
+    store['b'] = new_game()
+    assert store.stats()['games_spilled'] == 1
+    assert 'a' in store
+
+    restored = store.get('a')
+    assert restored is not game
+    assert restored.get_game_state() == expected
+    stats = store.stats()
+    assert stats['rehydrations'] == 1
+    assert stats['spills'] == 2
+    assert stats['games_spilled'] == 1
+
+    assert store.discard('b')
+    assert 'b' not in store
+    assert store.stats()['games_spilled'] == 0
+    store.close()
+
+
+def test_locked_games_are_not_evicted_and_shards_split_capacity():
+    store = GameStore(max_games=4, ttl=100, shards=2)
+    store['a'] = new_game()
+    with store.locked('a') as game:
+        assert game is store.get('a')
+        for index in range(10):
+            store[f'other-{index}'] = new_game()
+        assert 'a' in store
+    assert len(store) <= 4
+    assert store.stats()['shards'] == 2
+
+    with store.locked('missing') as game:
+        assert game is None
+
+
+def test_locked_serializes_access_to_the_same_game():
+    store = GameStore(shards=4)
+    store['a'] = new_game()
+    inside = []
+    overlaps = []
+
+    def worker():
+        for _ in range(200):
+            with store.locked('a'):
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(1)
+                inside.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not overlaps
+
+
+def test_lookup_cost_does_not_grow_with_the_shard():
+    def lookup_time(size):
+        store = GameStore(max_games=size, ttl=100)
+        game = new_game()
+        for index in range(size):
+            store[f'g{index}'] = game
+        with store.locked('g0'):  # Una partida fijada no obliga a recorrer el shard
+            return min(timeit.repeat(lambda: store.get('g1'), number=200, repeat=5))
+
+    small, large = lookup_time(100), lookup_time(20_000)
+    assert large < small * 10  # Recorrer el shard en cada acceso sería ~200 veces más lento
+
+
+def test_game_being_spilled_is_found_by_a_parallel_lookup(tmp_path):
+    store = GameStore(max_games=1, ttl=100, spill_path=str(tmp_path / 'games.db'))
+    store['a'] = new_game(seed=7)
+    expected = store.get('a').get_game_state()
+    serialize = store._serialize
+    writing, finish = threading.Event(), threading.Event()
+
+    def slow_serialize(game):
+        writing.set()
+        finish.wait(5)
+        return serialize(game)
+
+    store._serialize = slow_serialize
+    evicting = threading.Thread(target=store.put, args=('b', new_game()))
+    evicting.start()
+    assert writing.wait(5)  # 'a' ya salió de memoria pero aún no está en disco
+    found = []
+    lookup = threading.Thread(target=lambda: found.append(store.get('a')))
+    lookup.start()
+    lookup.join(0.1)
+    assert lookup.is_alive()  # Espera a que termine el volcado en vez de dar 404
+    assert 'a' in store
+    finish.set()
+    evicting.join(5)
+    lookup.join(5)
+    assert found[0].get_game_state() == expected
+    store.close()
@@ -0,0 +1,64 @@
+import asyncio
+import random
+import threading
+
+from werkzeug.serving import make_server
+
+from app import create_app
+from benchmarks.load_test import ENDPOINTS, HttpTransport, InProcessTransport, LatencyHistogram, run_load
+
+
+def assert_clean(summary, games):
+    assert summary['errors'] == 0
+    assert sum(summary['games'].values()) >= games and 'aborted' not in summary['games']
+    assert list(summary['endpoints']) == list(ENDPOINTS)
+    for result in summary['endpoints'].values():
+        assert 0 < result['p50_ms'] <= result['p95_ms'] <= result['p99_ms'] <= result['max_ms']
+    shuffles = summary['endpoints']['/shuffle']['requests']
+    assert shuffles == 2 * summary['endpoints']['/new']['requests']
+    assert summary['endpoints']['/flip-card']['requests'] == summary['endpoints']['/place-card']['requests']
+
+
+def nearest_rank(sorted_values, q):
+    """Percentil exacto de referencia: rango más cercano de una lista ordenada"""
+    return sorted_values[max(1, -(-len(sorted_values) * q // 100)) - 1]
+
+
+def test_latency_histogram_is_bounded_and_within_one_percent():
+    rng = random.Random(4)
+    values = [rng.lognormvariate(-6, 1.5) for _ in range(200_000)]
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for q in (50, 95, 99):
+        assert abs(histogram.percentile(q) - nearest_rank(values, q)) <= 0.01 * nearest_rank(values, q)
+    assert histogram.percentile(100) == histogram.max == values[-1]
+    assert histogram.count == len(values) and len(histogram.counts) < 2500  # No crece con las muestras
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_in_process_players_finish_their_games():
+    transport = InProcessTransport(create_app(), threads=4)
+    try:
+        summary = asyncio.run(run_load(transport, players=10, games=2, shuffles=2, ramp=0.05))
+        assert_clean(summary, 20)
+        assert sum(summary['games'].values()) == 20
+        assert summary['throughput_rps'] > 0
+
+        soak = asyncio.run(run_load(transport, players=5, shuffles=2, duration=0.3, game_rules='alternative'))
+        assert_clean(soak, 5)
+    finally:
+        transport.shutdown()
+
+
+def test_http_players_against_a_real_server():
+    server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        transport = HttpTransport(f'http://127.0.0.1:{server.server_port}')
+        summary = asyncio.run(run_load(transport, players=4, games=1, shuffles=2))
+        assert_clean(summary, 4)
+    finally:
+        server.shutdown()
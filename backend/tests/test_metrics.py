@@ -0,0 +1,102 @@
+import re
+import threading
+
+from app import create_app
+from app.models.game import PokerGame
+from app.utils.metrics import Metrics
+from config.config import Config
+
+
+def sample(text, name, **labels):
+    """Valor de una muestra de /metrics (None si no está)"""
+    for line in text.splitlines():
+        match = re.fullmatch(r'(\w+)(?:\{(.*)\})? (\S+)', line)
+        if match and match[1] == name:
+            found = dict(re.findall(r'(\w+)="([^"]*)"', match[2] or ''))
+            if all(found.get(key) == str(value) for key, value in labels.items()):
+                return float(match[3])
+    return None
+
+
+def test_metrics_count_requests_errors_and_model_timings(monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_MODEL_TIMINGS', True)
+    client = create_app().test_client()
+    client.post('/api/game/new', json={'game_id': 'metrics'})
+    client.post('/api/game/shuffle', json={'game_id': 'metrics', 'cut_point': 30})
+    state = client.post('/api/game/start', json={'game_id': 'metrics'}).get_json()['game_state']
+    card = client.post('/api/game/flip-card', json={'game_id': 'metrics', 'pile': state['next_flip_pile']}).get_json()['card']
+    client.post('/api/game/place-card', json={'game_id': 'metrics', 'pile': card[0]})
+    for _ in range(2):
+        client.get('/api/game/state?game_id=metrics')
+    client.post('/api/game/new', data='no es json', content_type='text/plain')
+
+    response = client.get('/metrics')
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+
+    assert sample(text, 'poker_http_requests_total', route='/api/game/new', method='POST', status=201) == 1
+    assert sample(text, 'poker_http_requests_total', route='/api/game/new', method='POST', status=500) == 1
+    assert sample(text, 'poker_http_request_errors_total', route='/api/game/new') == 1
+    assert sample(text, 'poker_http_requests_total', route='/api/game/state', method='GET', status=200) == 2
+    for route in ('/api/game/shuffle', '/api/game/start', '/api/game/flip-card', '/api/game/place-card'):
+        assert sample(text, 'poker_http_request_duration_seconds_count', route=route) == 1
+        assert sample(text, 'poker_http_request_duration_seconds_bucket', route=route, le='+Inf') == 1
+    assert sample(text, 'poker_http_request_duration_seconds_count', route='/api/game/state') == 2
+
+    assert sample(text, 'poker_model_duration_seconds_count', operation='cut_and_shuffle') == 1
+    assert sample(text, 'poker_model_duration_seconds_count', operation='place_card') == 1
+    assert sample(text, 'poker_games_active') == 1
+
+
+def test_model_timings_are_off_by_default_and_never_patch_the_models():
+    place_card = PokerGame.place_card
+    client = create_app().test_client()
+    assert PokerGame.place_card is place_card  # El predictor y las simulaciones no pagan nada
+    client.post('/api/game/new', json={'game_id': 'untimed'})
+    client.post('/api/game/shuffle', json={'game_id': 'untimed', 'cut_point': 30})
+    text = client.get('/metrics').get_data(as_text=True)
+    assert sample(text, 'poker_http_request_duration_seconds_count', route='/api/game/shuffle') == 1
+    assert sample(text, 'poker_model_duration_seconds_count', operation='cut_and_shuffle') is None
+
+
+def test_model_timings_from_finished_threads_are_kept():
+    metrics = Metrics(model_timings=True)
+    threads = [threading.Thread(target=metrics.observe_model, args=('place_card', 2e-6)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.observe_model('place_card', 1.0)
+    for _ in range(2):  # La segunda vez los hilos terminados ya están acumulados aparte
+        text = metrics.render()
+        assert sample(text, 'poker_model_duration_seconds_count', operation='place_card') == 5
+        assert sample(text, 'poker_model_duration_seconds_bucket', operation='place_card', le='2.5e-06') == 4
+
+
+def test_sampled_profiles_are_kept_behind_the_admin_token(monkeypatch):
+    monkeypatch.setattr(Config, 'PROFILE_SAMPLE_RATE', 2)
+    monkeypatch.setattr(Config, 'PROFILE_BUFFER_SIZE', 1)
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'secreto')
+    client = create_app().test_client()
+    client.post('/api/game/new', json={'game_id': 'profiled'})
+    client.post('/api/game/shuffle', json={'game_id': 'profiled', 'cut_point': 12})
+    client.get('/health')
+    client.get('/api/game/state?game_id=profiled')
+
+    assert client.get('/admin/profiles').status_code == 403
+    body = client.get('/admin/profiles', headers={'X-Admin-Token': 'secreto'}).get_json()
+    assert body['sample_rate'] == 2
+    [profile] = body['profiles']  # Buffer de 1: solo el último perfil (la 4ª petición)
+    assert profile['route'] == '/api/game/state' and profile['status'] == 200
+    assert 0 < len(profile['functions']) <= Config.PROFILE_TOP
+    assert all(entry['calls'] > 0 for entry in profile['functions'])
+    assert client.get('/admin/profiles', headers={'X-Admin-Token': 'otro'}).status_code == 403
+
+
+def test_profiles_are_closed_without_an_admin_token(monkeypatch):
+    monkeypatch.setattr(Config, 'PROFILE_SAMPLE_RATE', 1)
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', None)
+    client = create_app().test_client()
+    client.get('/health')
+    assert client.get('/admin/profiles').status_code == 403
+    assert client.get('/admin/profiles', headers={'X-Admin-Token': ''}).status_code == 403
@@ -0,0 +1,75 @@
+import random
+
+from app.models.cards import PILE_OF, new_pile
+from app.models.deck import DeckShuffle
+from app.models.game import PokerGame
+from app.models.predictor import predict_game, predict_outcome
+
+
+def play_to_end(game):
+    """Jugar en automático siguiendo next_flip_pile, como el frontend"""
+    result = {}
+    while game.status == 'playing':
+        card = game.flip_card_from_pile(game._get_next_flip_pile())
+        result = game.place_card(PILE_OF[card])
+    return result
+
+
+def test_prediction_matches_full_game_on_random_decks():
+    rng = random.Random(2024)
+    for _ in range(300):
+        order = list(range(52))
+        rng.shuffle(order)
+        for rules in ('original', 'alternative'):
+            prediction = predict_outcome(order, rules)
+
+            deck = DeckShuffle()
+            deck.deck = new_pile(order)
+            game = PokerGame(deck, game_rules=rules)
+            game.start_game()
+            result = play_to_end(game)
+
+            assert prediction['status'] == game.status
+            assert prediction['moves_count'] == len(game.moves)
+            assert prediction['card'] == game.moves[-1]
+            assert prediction['kings_revealed'] == game.kings_revealed
+            if game.status == 'lost':
+                expected_reason = 'fourth_king' if '4to Rey' in result['message'] else 'own_pile'
+                assert prediction['reason'] == expected_reason
+
+
+def test_prediction_from_live_game_mid_play():
+    deck = DeckShuffle(initial_seed=987654)
+    for cut in (26, 10, 44):
+        deck.cut_and_shuffle(cut)
+    game = PokerGame(deck, game_rules='alternative')
+
+    expected = predict_game(game)
+    game.start_game()
+    for _ in range(5):
+        if game.status != 'playing':
+            break
+        game.flip_card_from_pile(game._get_next_flip_pile())
+        assert predict_game(game) == expected
+        game.place_card(PILE_OF[game.current_card])
+        assert predict_game(game)['status'] == expected['status']
+
+    play_to_end(game)
+    assert game.status == expected['status']
+    assert len(game.moves) == expected['moves_count']
+
+
+def test_finished_games_report_why_they_were_lost():
+    reasons = set()
+    for seed in range(200):
+        for rules in ('original', 'alternative'):
+            deck = DeckShuffle(initial_seed=seed)
+            deck.cut_and_shuffle(5)
+            game = PokerGame(deck, game_rules=rules)
+            expected = predict_game(game)
+            game.start_game()
+            play_to_end(game)
+            for finished in (game, PokerGame.from_bytes(game.to_bytes())):
+                assert predict_game(finished)['reason'] == expected['reason']
+            reasons.add(expected['reason'])
+    assert reasons == {None, 'own_pile', 'fourth_king'}
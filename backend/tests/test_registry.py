@@ -0,0 +1,119 @@
+from app import create_app
+from app.models.deck import DeckShuffle
+from app.models.game import PokerGame
+from app.routes import game_routes
+from app.services.game_store import GameStore
+from app.services.sqlite_store import SQLiteGameStore
+
+
+def new_game(seed=1, game_rules='original'):
+    deck = DeckShuffle(initial_seed=seed)
+    deck.cut_and_shuffle(26)
+    return PokerGame(deck, game_rules=game_rules)
+
+
+def finish(store, game_id):
+    with store.locked(game_id) as game:
+        while game.status == 'playing':
+            game.play_turn()
+
+
+def by_status(store):
+    return {status: games for status, games in store.counts()['by_status'].items() if games}
+
+
+def test_counters_follow_create_start_finish_and_remove(tmp_path):
+    store = GameStore(max_games=2, ttl=100, spill_path=str(tmp_path / 'games.db'))
+    store['a'] = new_game()
+    store['b'] = new_game(game_rules='alternative')
+    store['c'] = new_game()  # Expulsa 'a' al volcado: sigue contando
+    assert by_status(store) == {'waiting': 3}
+    assert store.counts()['by_rules'] == {'original': 2, 'alternative': 1}
+
+    with store.locked('a') as game:  # Rehidratada
+        game.start_game()
+    finish(store, 'a')
+    status = store.get('a').status
+    assert by_status(store) == {'waiting': 2, status: 1}
+    assert store.counts()['by_status_and_rules'][status]['original'] == 1
+
+    store['a'] = new_game()  # Reemplazar no duplica
+    assert store.discard('b')
+    assert store.counts() == store.registry.counts()
+    assert by_status(store) == {'waiting': 2}
+    assert store.counts()['by_rules'] == {'original': 2, 'alternative': 0}
+
+
+def test_pagination_is_stable_while_games_are_removed():
+    store = GameStore(max_games=100, ttl=100)
+    for index in range(10):
+        store[f'g{index}'] = new_game(index)
+
+    first, cursor = store.list_games(limit=4)
+    assert [game_id for game_id, _, _ in first] == ['g0', 'g1', 'g2', 'g3']
+    store.discard('g1')
+    store.discard('g4')
+    second, cursor = store.list_games(cursor, limit=4)
+    assert [game_id for game_id, _, _ in second] == ['g5', 'g6', 'g7', 'g8']
+    last, cursor = store.list_games(cursor, limit=4)
+    assert [item[0] for item in last] == ['g9'] and cursor is None
+    assert last[0][1:] == ('waiting', 'original')
+
+
+def test_sqlite_counters_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'games.db')
+    worker_a = SQLiteGameStore(path)
+    worker_b = SQLiteGameStore(path)
+    for index in range(5):
+        worker_a[f'g{index}'] = new_game(index, 'alternative' if index % 2 else 'original')
+    with worker_b.locked('g0') as game:
+        game.start_game()
+    worker_b.discard('g3')
+
+    counts = worker_a.counts()
+    assert counts['games'] == len(worker_a) == 4
+    assert counts['by_status'] == {'waiting': 3, 'playing': 1, 'won': 0, 'lost': 0}
+    assert counts['by_rules'] == {'original': 3, 'alternative': 1}
+
+    page, cursor = worker_b.list_games(limit=3)
+    assert [item[0] for item in page] == ['g0', 'g1', 'g2']
+    assert page[0][1:] == ('playing', 'original')
+    page, cursor = worker_b.list_games(cursor, limit=3)
+    assert [item[0] for item in page] == ['g4'] and cursor is None
+    worker_a.close()
+    worker_b.close()
+
+
+def test_admin_listing_endpoint(monkeypatch):
+    app = create_app()
+    app.config['ADMIN_TOKEN'] = 'secreto'
+    monkeypatch.setattr(game_routes, 'active_games', GameStore())
+    client = app.test_client()
+    for index in range(3):
+        client.post('/api/game/new', json={'game_id': f'admin-{index}'})
+
+    assert client.get('/api/game/admin/games').status_code == 403
+    headers = {'X-Admin-Token': 'secreto'}
+    assert client.get('/api/game/admin/games?limit=0', headers=headers).status_code == 400
+    assert client.get('/api/game/admin/games?cursor=x', headers=headers).status_code == 400
+
+    data = client.get('/api/game/admin/games?limit=2', headers=headers).get_json()
+    assert [game['game_id'] for game in data['games']] == ['admin-0', 'admin-1']
+    assert data['counts']['by_status']['waiting'] == 3
+    data = client.get(f'/api/game/admin/games?cursor={data["next_cursor"]}', headers=headers).get_json()
+    assert data['games'] == [{'game_id': 'admin-2', 'status': 'waiting', 'game_rules': 'original'}]
+    assert data['next_cursor'] is None
+
+    missing = client.get('/api/game/debug?game_id=nada').get_json()
+    assert missing['registry']['games'] == 3 and 'active_games' not in missing
+
+
+def test_admin_listing_is_closed_without_a_token(monkeypatch):
+    app = create_app()
+    app.config['ADMIN_TOKEN'] = None
+    monkeypatch.setattr(game_routes, 'active_games', GameStore())
+    client = app.test_client()
+    client.post('/api/game/new', json={'game_id': 'privada'})
+    for headers in ({}, {'X-Admin-Token': ''}):
+        response = client.get('/api/game/admin/games', headers=headers)
+        assert response.status_code == 403 and 'games' not in response.get_json()
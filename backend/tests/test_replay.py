@@ -0,0 +1,112 @@
+import pytest
+
+from app import create_app
+from app.models.cards import PILE_OF
+from app.models.deck import DeckShuffle
+from app.models.game import PokerGame
+from app.models import replay as replay_module
+from app.models import rules as rules_module
+from app.models.replay import decode_log, encode_log, game_from_log, replay
+from app.models.rules import GAME_RULES, RULE_SETS, RULE_TABLES, compile_rules
+
+
+def play(game, turns, pending=False):
+    for _ in range(turns):
+        if game.status != 'playing':
+            return
+        card = game.flip_card_from_pile(game._get_next_flip_pile())
+        game.place_card(PILE_OF[card])
+    if pending and game.status == 'playing':
+        game.flip_card_from_pile(game._get_next_flip_pile())
+
+
+def new_game(seed, cuts, rules):
+    deck = DeckShuffle(initial_seed=seed)
+    for cut_point in cuts:
+        deck.cut_and_shuffle(cut_point)
+    return PokerGame(deck, game_rules=rules)
+
+
+@pytest.mark.parametrize('rules', GAME_RULES)
+def test_log_replays_to_the_same_state(rules):
+    statuses = set()
+    for seed in range(60):
+        cuts = (seed % 51 + 1, 26, (seed * 7) % 51 + 1)[:seed % 3 + 1]
+        game = new_game(seed * 7919, cuts, rules)
+        log = encode_log(game)
+        assert game_from_log(log).get_game_state() == game.get_game_state()
+
+        game.start_game()
+        play(game, seed % 60, pending=seed % 2 == 0)
+        log = encode_log(game)
+        assert len(log) <= 16 + len(cuts) + len(game.moves)
+        restored = game_from_log(log)
+        assert restored.get_game_state() == game.get_game_state()
+        assert list(restored.moves) == list(game.moves)
+        assert encode_log(restored) == log
+        statuses.add(game.status)
+    assert statuses == {'playing', 'lost'}
+
+
+def test_won_game_replays():
+    game = new_game(0, (18,), 'original')
+    game.start_game()
+    play(game, 52)
+    assert game.status == 'won'
+    assert game_from_log(encode_log(game)).get_game_state() == game.get_game_state()
+
+
+def test_invalid_logs_are_rejected():
+    game = new_game(42, (10,), 'original')
+    game.start_game()
+    play(game, 3)
+    log = encode_log(game)
+
+    with pytest.raises(ValueError):
+        decode_log(log[:-1])
+    with pytest.raises(ValueError):
+        game_from_log(b'XX' + log[2:])
+    with pytest.raises(ValueError):
+        replay(42, [10], moves=[game.moves[0], game.moves[0]])
+    with pytest.raises(ValueError, match='reglas'):
+        decode_log(log[:3] + bytes((log[3] | 0xF0,)) + log[4:])  # Índice de reglas sin registrar
+
+
+def test_rules_beyond_the_first_two_survive_a_round_trip(monkeypatch):
+    steps = (rules_module.REVEAL_KING, rules_module._FOURTH_KING_RULE, rules_module._BOARD_CLEAR_RULE)
+    monkeypatch.setitem(RULE_TABLES, 'kings_only', compile_rules(steps))
+    game = new_game(11, (30,), 'kings_only')
+    with pytest.raises(ValueError, match='no registradas'):
+        encode_log(game)  # Nunca como 'original' en silencio
+
+    monkeypatch.setitem(RULE_SETS, 'kings_only', steps)
+    monkeypatch.setattr(replay_module, 'GAME_RULES', (*GAME_RULES, 'kings_only'))
+    game.start_game()
+    play(game, 20)
+    restored = game_from_log(encode_log(game))
+    assert restored.game_rules == 'kings_only'
+    assert restored.get_game_state() == game.get_game_state()
+
+
+def test_version_1_logs_still_decode():
+    game = new_game(5, (17,), 'alternative')
+    log = bytearray(encode_log(game))
+    log[2], log[3] = 1, (log[3] & 0x0F) | 0x02  # Versión 1: bit 1 = 'alternative'
+    assert decode_log(bytes(log))['game_rules'] == 'alternative'
+
+
+def test_log_route_verifies_the_replay():
+    client = create_app().test_client()
+    client.post('/api/game/new', json={'game_id': 'audit'})
+    for cut_point in (12, 40):
+        client.post('/api/game/shuffle', json={'game_id': 'audit', 'cut_point': cut_point})
+    state = client.post('/api/game/start', json={'game_id': 'audit'}).get_json()['game_state']
+    response = client.post('/api/game/flip-card', json={'game_id': 'audit', 'pile': state['next_flip_pile']})
+    card = response.get_json()['card']
+    client.post('/api/game/place-card', json={'game_id': 'audit', 'pile': card[0]})
+
+    body = client.get('/api/game/log?game_id=audit').get_json()
+    assert body['verified'] is True
+    assert body['cuts'] == [12, 40]
+    assert body['moves'] == [{'card': card, 'from': state['next_flip_pile']}]
+    assert body['log_size'] == len(bytes.fromhex(body['log']))
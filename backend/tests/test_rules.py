@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from app import create_app
+from app.models import rules
+from app.models.cards import PILE_OF, new_pile
+from app.models.deck import DeckShuffle
+from app.models.game import PokerGame
+from app.models.predictor import predict_outcome
+from app.models.rules import (
+    FILLS, IS_KING, NO_FACE_DOWN, OWN_SOURCE, RULE_TABLES, SOURCE_EMPTY, Rule, compile_rules, rule_table
+)
+
+
+def test_variants_only_differ_when_the_own_pile_still_has_cards():
+    original, alternative = RULE_TABLES['original'], RULE_TABLES['alternative']
+    for mask, (a, b) in enumerate(zip(original, alternative)):
+        if mask & (FILLS | OWN_SOURCE) == FILLS | OWN_SOURCE and not mask & SOURCE_EMPTY:
+            assert b.status is not None and b.reason in (None, 'own_pile')
+        elif a.message != '🎉 ¡GANASTE! Completaste todas las pilas':
+            assert (a.kings, a.status, a.reason, a.message) == (b.kings, b.status, b.reason, b.message)
+    assert original.quiet and alternative.quiet
+    with pytest.raises(ValueError, match='Reglas desconocidas'):
+        rule_table('ninguna')
+
+
+def test_a_new_variant_is_just_another_table(monkeypatch):
+    # Sin regla de montón propio: solo el 4to Rey o el tablero completo terminan la partida
+    steps = (rules.REVEAL_KING, rules._FOURTH_KING_RULE, Rule('board_clear', when=rules.BOARD_FULL | NO_FACE_DOWN))
+    monkeypatch.setitem(RULE_TABLES, 'kings_only', compile_rules(steps))
+    assert RULE_TABLES['kings_only'].quiet and RULE_TABLES['kings_only'][IS_KING].kings == 1
+
+    rng = random.Random(7)
+    for _ in range(100):
+        order = list(range(52))
+        rng.shuffle(order)
+        deck = DeckShuffle()
+        deck.deck = new_pile(order)
+        game = PokerGame(deck, game_rules='kings_only')
+        game.start_game()
+        while game.status == 'playing':
+            result = game.place_card(PILE_OF[game.flip_card_from_pile(game._get_next_flip_pile())])
+
+        prediction = predict_outcome(order, 'kings_only')
+        assert prediction['status'] == game.status and prediction['moves_count'] == len(game.moves)
+        assert game.status == 'won' or '4to Rey' in result['message']
+
+
+def test_unknown_rules_are_rejected_when_creating_a_game():
+    client = create_app().test_client()
+    response = client.post('/api/game/new', json={'game_id': 'reglas', 'game_rules': 'inventadas'})
+    assert response.status_code == 400
+    assert 'inventadas' in response.get_json()['error']
+    assert client.get('/api/game/state?game_id=reglas').status_code == 404
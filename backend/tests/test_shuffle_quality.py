@@ -0,0 +1,66 @@
+import json
+import math
+
+import numpy as np
+
+from app.models.deck import DeckShuffle
+from app.services.shuffle_quality import (
+    analyze_model, count_distinct, eulerian_row, gsr_total_variation, main, position_counts,
+    rising_sequences, sample_cuts
+)
+
+
+def direct_rising(deck):
+    position = {card: index for index, card in enumerate(deck)}
+    return 1 + sum(position[card + 1] < position[card] for card in range(51))
+
+
+def test_batch_metrics_match_a_deck_by_deck_loop():
+    rng = np.random.default_rng(3)
+    seeds = rng.integers(0, 2 ** 32, size=300)
+    cuts = sample_cuts(rng, 'human', 300, 3)
+    decks = [DeckShuffle(initial_seed=int(seed)) for seed in seeds]
+
+    for k, batch in enumerate(DeckShuffle.iter_shuffle_many(seeds, cuts)):
+        for deck, cut_point in zip(decks, cuts[:, k]):
+            deck.cut_and_shuffle(int(cut_point))
+        expected = np.zeros((52, 52), dtype=np.int64)
+        for deck in decks:
+            expected[list(deck.deck), np.arange(52)] += 1
+
+        assert (position_counts(batch) == expected).all()
+        assert rising_sequences(batch).tolist() == [direct_rising(deck.deck) for deck in decks]
+        assert count_distinct(batch) == len({bytes(deck.deck) for deck in decks})
+        assert rising_sequences(batch).max() <= 2 ** (k + 1)  # Un riffle a lo sumo duplica las secuencias
+
+
+def test_reference_distributions():
+    assert eulerian_row(4) == (1, 11, 11, 1)
+    assert sum(eulerian_row()) == math.factorial(52)
+    # Tabla de Bayer y Diaconis para 52 cartas
+    assert [round(gsr_total_variation(k), 3) for k in range(4, 11)] == [
+        1.0, 0.924, 0.614, 0.334, 0.167, 0.085, 0.043
+    ]
+
+
+def test_more_shuffles_mix_better():
+    rows = analyze_model('uniform', decks=20_000, shuffles=4, seed=1)['results']
+    assert [row['shuffles'] for row in rows] == [1, 2, 3, 4]
+    assert rows[0]['distinct_decks'] <= rows[0]['max_distinct'] == 51_000
+    assert set(rows[0]['rising_sequences']) <= {'1', '2'}
+    for before, after in zip(rows, rows[1:]):
+        assert after['position_tvd_mean'] < before['position_tvd_mean']
+        assert after['rising_sequences_mean'] > before['rising_sequences_mean']
+    assert all(abs(sum(map(sum, row['position_matrix'])) - 52) < 1e-3 for row in rows)
+
+    fixed = analyze_model('26', decks=5_000, shuffles=1, include_matrix=False)['results'][0]
+    assert fixed['distinct_decks'] <= fixed['max_distinct'] == 1000 and 'position_matrix' not in fixed
+
+
+def test_cli_writes_a_json_report(tmp_path):
+    output = tmp_path / 'quality.json'
+    assert main(['--decks', '2000', '--shuffles', '2', '--cuts', 'uniform', '--cuts', '13',
+                 '--no-matrix', '--output', str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert [configuration['cuts'] for configuration in report['configurations']] == ['uniform', '13']
+    assert all(len(configuration['results']) == 2 for configuration in report['configurations'])
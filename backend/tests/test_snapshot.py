@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from app import create_app
+from app.models.cards import PILE_OF, new_pile
+from app.models.deck import MAX_CUTS, DeckShuffle
+from app.models.game import PokerGame
+from app.models.replay import encode_log
+from app.routes import game_routes
+
+
+def assert_round_trip(game):
+    data = game.to_bytes()
+    assert len(data) < 200
+    restored = PokerGame.from_bytes(data)
+    assert restored.get_game_state() == game.get_game_state()
+    assert list(restored.moves) == list(game.moves)
+    assert list(restored.deck.deck) == list(game.deck.deck)
+    assert restored.deck.initial_seed == game.deck.initial_seed
+    assert restored.to_bytes() == data
+    assert restored.state_token == game.state_token
+    return restored
+
+
+def test_round_trip_waiting_and_playing_games():
+    deck = DeckShuffle(initial_seed=2659313593)
+    game = PokerGame(deck, game_rules='alternative')
+    assert_round_trip(game)
+
+    deck.cut_and_shuffle(17)
+    deck.cut_and_shuffle(40)
+    assert_round_trip(game)
+
+    game.start_game()
+    assert_round_trip(game)
+    for _ in range(5):
+        card = game.flip_card_from_pile(game._get_next_flip_pile())
+        restored = assert_round_trip(game)  # Con carta pendiente
+        game.place_card(PILE_OF[card])
+        restored.place_card(PILE_OF[card])
+        assert restored.get_game_state() == game.get_game_state()
+
+
+def test_round_trip_finished_games_of_every_status_and_rules():
+    rng = random.Random(7)
+    seen = set()
+    while len(seen) < 4:
+        order = list(range(52))
+        rng.shuffle(order)
+        for rules in ('original', 'alternative'):
+            deck = DeckShuffle()
+            deck.deck = new_pile(order)
+            game = PokerGame(deck, game_rules=rules)
+            game.start_game()
+            while game.status == 'playing':
+                card = game.flip_card_from_pile(game._get_next_flip_pile())
+                game.place_card(PILE_OF[card])
+            assert_round_trip(game)
+            seen.add((game.status, rules))
+
+
+def test_invalid_snapshots_are_rejected():
+    data = PokerGame(DeckShuffle(initial_seed=None)).to_bytes()
+    with pytest.raises(ValueError):
+        PokerGame.from_bytes(b'XX' + data[2:])
+    with pytest.raises(ValueError):
+        PokerGame.from_bytes(data[:-3])
+    with pytest.raises(ValueError):
+        DeckShuffle.from_bytes(b'')
+
+
+def test_too_many_cuts_is_a_value_error_and_shuffle_stops_before():
+    deck = DeckShuffle(initial_seed=3)
+    deck.cuts = new_pile([26] * (MAX_CUTS + 1))
+    deck.shuffle_count = MAX_CUTS + 1
+    game = PokerGame(deck)
+    with pytest.raises(ValueError, match='cortes'):
+        game.to_bytes()
+    with pytest.raises(ValueError):
+        encode_log(game)
+
+    client = create_app().test_client()
+    client.post('/api/game/new', json={'game_id': 'cortes'})
+    game = game_routes.active_games.get('cortes')
+    game.deck.cuts = new_pile([26] * MAX_CUTS)
+    game.deck.shuffle_count = MAX_CUTS
+    response = client.post('/api/game/shuffle', json={'game_id': 'cortes', 'cut_point': 10})
+    assert response.status_code == 400 and str(MAX_CUTS) in response.get_json()['error']
+    assert len(PokerGame.from_bytes(game.to_bytes()).deck.cuts) == MAX_CUTS
@@ -0,0 +1,89 @@
+import multiprocessing
+
+import pytest
+
+from app import create_app
+from app.models.deck import DeckShuffle
+from app.models.game import PokerGame
+from app.routes import game_routes
+from app.services.game_store import VersionConflict, create_game_store
+from app.services.sqlite_store import SQLiteGameStore
+
+
+def new_game(seed=1):
+    deck = DeckShuffle(initial_seed=seed)
+    deck.cut_and_shuffle(26)
+    game = PokerGame(deck)
+    game.start_game()
+    return game
+
+
+def test_changes_inside_locked_are_visible_to_other_workers(tmp_path):
+    path = str(tmp_path / 'games.db')
+    worker_a = SQLiteGameStore(path)
+    worker_b = SQLiteGameStore(path)
+
+    worker_a['g'] = new_game()
+    with worker_b.locked('g') as game:
+        game.flip_card_from_pile(game._get_next_flip_pile())
+        expected = game.get_game_state()
+
+    assert worker_a.get('g').get_game_state() == expected
+    assert worker_a.version('g') == 2
+    with worker_a.locked('g'):
+        pass
+    assert worker_a.version('g') == 2  # Sin cambios no se escribe
+
+    assert worker_a.discard('g')
+    assert 'g' not in worker_b
+    with worker_b.locked('g') as game:
+        assert game is None
+    worker_a.close()
+    worker_b.close()
+
+
+def test_concurrent_write_from_another_worker_is_a_conflict(tmp_path):
+    path = str(tmp_path / 'games.db')
+    worker_a = SQLiteGameStore(path)
+    worker_b = SQLiteGameStore(path)
+    worker_a['g'] = new_game()
+
+    with pytest.raises(VersionConflict):
+        with worker_a.locked('g') as game:
+            with worker_b.locked('g') as other:
+                other.flip_card_from_pile(other._get_next_flip_pile())
+            game.flip_card_from_pile(game._get_next_flip_pile())
+
+    assert worker_a.stats()['conflicts'] == 1
+    assert worker_a.get('g').current_card_source is not None
+    worker_a.close()
+    worker_b.close()
+
+
+def _flip_in_child(app, pile, queue):
+    client = app.test_client()
+    response = client.post('/api/game/flip-card', json={'game_id': 'shared', 'pile': pile})
+    queue.put(response.status_code)
+
+
+def test_game_created_in_one_process_is_playable_in_another(tmp_path, monkeypatch):
+    app = create_app()
+    store = create_game_store({'GAME_BACKEND': 'sqlite', 'GAME_DB_PATH': str(tmp_path / 'games.db')})
+    monkeypatch.setattr(game_routes, 'active_games', store)
+    client = app.test_client()
+    client.post('/api/game/new', json={'game_id': 'shared'})
+    client.post('/api/game/shuffle', json={'game_id': 'shared', 'cut_point': 30})
+    state = client.post('/api/game/start', json={'game_id': 'shared'}).get_json()['game_state']
+
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    # Con fork el hijo hereda la app: otro worker con su propia conexión a SQLite
+    child = context.Process(target=_flip_in_child, args=(app, state['next_flip_pile'], queue))
+    child.start()
+    child.join(30)
+
+    assert queue.get(timeout=5) == 200
+    state = client.get('/api/game/state?game_id=shared').get_json()['game_state']
+    assert state['current_card'] is not None
+    assert store.version('shared') == 4
+    store.close()
@@ -0,0 +1,50 @@
+from app import create_app
+from app.models.cards import PILE_OF
+from app.models.deck import DeckShuffle
+from app.models.game import PokerGame
+
+
+def test_game_state_is_rebuilt_only_after_changes(monkeypatch):
+    deck = DeckShuffle(initial_seed=5)
+    deck.cut_and_shuffle(20)
+    game = PokerGame(deck)
+    game.start_game()
+
+    builds = []
+    original = PokerGame._build_state
+    monkeypatch.setattr(PokerGame, '_build_state', lambda self, piles: builds.append(1) or original(self, piles))
+
+    state = game.get_game_state()
+    assert game.get_game_state() is state
+    assert not builds  # start_game ya lo calculó
+
+    card = game.flip_card_from_pile(game._get_next_flip_pile())
+    flipped = game.get_game_state()
+    assert flipped is not state and flipped['current_card'] == card
+    game.place_card(PILE_OF[card])
+    assert game.get_game_state()['moves_count'] == 1
+    assert len(builds) == 2
+
+    # Cambios directos en los montones: _sync_counters invalida la caché
+    game.piles['A'].append(0)
+    game._sync_counters()
+    assert game.get_game_state()['piles']['A'][-1] == 0
+
+
+def test_state_and_debug_serve_cached_bodies_until_the_game_changes():
+    client = create_app().test_client()
+    client.post('/api/game/new', json={'game_id': 'cache'})
+    client.post('/api/game/shuffle', json={'game_id': 'cache', 'cut_point': 44})
+    state = client.post('/api/game/start', json={'game_id': 'cache'}).get_json()['game_state']
+
+    first = client.get('/api/game/state?game_id=cache')
+    second = client.get('/api/game/state?game_id=cache')
+    assert first.data == second.data
+    assert first.get_json()['game_state']['version'] == state['version']
+    assert client.get('/api/game/debug?game_id=cache').get_json()['moves_count'] == 0
+
+    client.post('/api/game/play-turn', json={'game_id': 'cache'})
+    third = client.get('/api/game/state?game_id=cache').get_json()['game_state']
+    assert third['moves_count'] == 1
+    assert third['version'] != state['version']
+    assert client.get('/api/game/debug?game_id=cache').get_json()['moves_count'] == 1
@@ -0,0 +1,66 @@
+from app import create_app
+from app.models.cards import PILE_OF
+from app.models.deck import DeckShuffle
+from app.models.game import PokerGame
+
+
+def apply_delta(state, delta):
+    return {
+        **state, **delta,
+        'piles': {**state['piles'], **delta['piles']},
+        'face_down_cards': {**state['face_down_cards'], **delta['face_down_cards']}
+    }
+
+
+def test_deltas_rebuild_the_full_state():
+    deck = DeckShuffle(initial_seed=99)
+    deck.cut_and_shuffle(33)
+    game = PokerGame(deck, game_rules='alternative')
+    token = game.state_token
+    state = game.get_game_state()
+    game.start_game()
+
+    while True:
+        delta = game.get_state_delta(token)
+        assert not delta.pop('full')
+        state = apply_delta(state, delta)
+        assert state == game.get_game_state()
+        if game.status != 'playing':
+            break
+        token = game.state_token
+        if game.current_card is None:
+            game.flip_card_from_pile(game._get_next_flip_pile())
+            assert len(game.get_state_delta(token)['piles']) == 1
+        else:
+            game.place_card(PILE_OF[game.current_card])
+
+    assert game.get_state_delta('otra-partida-3')['full']
+    assert game.get_state_delta(f'{game.state_id:08x}-{game.version + 1}')['full']
+
+
+def test_state_supports_etag_and_deltas_over_http():
+    client = create_app().test_client()
+    client.post('/api/game/new', json={'game_id': 'etag'})
+    client.post('/api/game/shuffle', json={'game_id': 'etag', 'cut_point': 8})
+    state = client.post('/api/game/start', json={'game_id': 'etag'}).get_json()['game_state']
+
+    response = client.get('/api/game/state?game_id=etag')
+    etag = response.headers['ETag']
+    assert etag == f'"{state["version"]}"'
+    assert client.get('/api/game/state?game_id=etag', headers={'If-None-Match': etag}).status_code == 304
+
+    pile = state['next_flip_pile']
+    body = client.post('/api/game/flip-card', json={'game_id': 'etag', 'pile': pile, 'since': state['version']}).get_json()
+    delta = body['game_state']
+    assert delta['full'] is False
+    assert list(delta['piles']) == [pile]
+    assert delta['face_down_cards'] == {pile: 3}
+    assert delta['current_card'] == body['card']
+
+    response = client.get('/api/game/state?game_id=etag', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == f'"{delta["version"]}"'
+
+    client.post('/api/game/new', json={'game_id': 'etag'})
+    response = client.get(f'/api/game/state?game_id=etag&since={delta["version"]}')
+    assert response.get_json()['game_state']['full'] is True
@@ -0,0 +1,150 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app
+from app.routes import game_routes
+from app.services.game_events import RESYNC, GameEventHub
+from app.streaming import create_asgi_app
+
+
+def scope(method, path, query=b'', headers=()):
+    return {'type': 'http', 'method': method, 'path': path, 'root_path': '', 'query_string': query,
+            'headers': list(headers), 'http_version': '1.1', 'scheme': 'http'}
+
+
+async def call(app, method, path, data=None, query=b''):
+    body = json.dumps(data).encode() if data is not None else b''
+    headers = [(b'content-type', b'application/json')] if data is not None else []
+    requests = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return requests.pop(0) if requests else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope(method, path, query, headers), receive, send)
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+class Stream:
+    def __init__(self, app, game_id, last_event_id=None):
+        headers = [(b'last-event-id', last_event_id.encode())] if last_event_id else []
+        self.incoming = asyncio.Queue()
+        self.sent = asyncio.Queue()
+        self.task = asyncio.ensure_future(app(
+            scope('GET', '/api/game/stream', f'game_id={game_id}'.encode(), headers),
+            self.incoming.get, self.sent.put))
+
+    async def start(self):
+        return (await asyncio.wait_for(self.sent.get(), 5))['status']
+
+    async def event(self):
+        while True:
+            message = await asyncio.wait_for(self.sent.get(), 5)
+            fields = dict(line.split(': ', 1) for line in message['body'].decode().splitlines() if line)
+            if 'event' in fields:
+                return fields['event'], fields.get('id'), json.loads(fields['data'])
+
+    async def close(self):
+        await self.incoming.put({'type': 'http.disconnect'})
+        await asyncio.wait_for(self.task, 5)
+
+
+async def started_game(app, game_id):
+    await call(app, 'POST', '/api/game/new', {'game_id': game_id})
+    await call(app, 'POST', '/api/game/shuffle', {'game_id': game_id, 'cut_point': 21})
+    await call(app, 'POST', '/api/game/start', {'game_id': game_id})
+
+
+def test_stream_pushes_the_state_and_then_deltas():
+    async def scenario():
+        app = create_asgi_app(create_app())
+        await started_game(app, 'live')
+        stream = Stream(app, 'live')
+        assert await stream.start() == 200
+        event, event_id, data = await stream.event()
+        assert event == 'state' and data['game_id'] == 'live'
+        state = data['game_state']
+        assert state['status'] == 'playing' and event_id == state['version']
+
+        for _ in range(3):
+            status, body = await call(app, 'POST', '/api/game/play-turn', {'game_id': 'live'})
+            assert status == 200
+            event, event_id, data = await stream.event()
+            delta = data['game_state']
+            assert event == 'delta' and not delta['full'] and len(delta['piles']) <= 2
+            state = {**state, **delta, 'piles': {**state['piles'], **delta['piles']},
+                     'face_down_cards': {**state['face_down_cards'], **delta['face_down_cards']}}
+            assert event_id == body['game_state']['version']
+
+        _, current = await call(app, 'GET', '/api/game/state', query=b'game_id=live')
+        assert state['piles'] == current['game_state']['piles']
+        assert state['version'] == current['game_state']['version']
+
+        assert game_routes.event_hub.has_subscribers('live')
+        await stream.close()
+        assert not game_routes.event_hub.has_subscribers('live')
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_resumes_and_lost_events_resync():
+    async def scenario():
+        app = create_asgi_app(create_app())
+        await started_game(app, 'resume')
+        _, body = await call(app, 'GET', '/api/game/state', query=b'game_id=resume')
+        await call(app, 'POST', '/api/game/play-turn', {'game_id': 'resume'})
+
+        stream = Stream(app, 'resume', last_event_id=body['game_state']['version'])
+        await stream.start()
+        event, _, data = await stream.event()
+        assert event == 'delta' and not data['game_state']['full']
+
+        game_routes.event_hub.publish('resume', RESYNC)
+        event, _, data = await stream.event()
+        assert event == 'state' and data['game_state']['status'] == 'playing'
+
+        # Partida reemplazada: llega su estado completo
+        await call(app, 'POST', '/api/game/new', {'game_id': 'resume'})
+        event, _, data = await stream.event()
+        assert event == 'state' and data['game_state']['status'] == 'waiting'
+        await stream.close()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_games_and_plain_routes():
+    async def scenario():
+        app = create_asgi_app(create_app())
+        assert await call(app, 'GET', '/health') == (200, {'status': 'healthy'})
+        stream = Stream(app, 'nadie')
+        assert await stream.start() == 404
+        await asyncio.wait_for(stream.task, 5)
+        assert not game_routes.event_hub.has_subscribers('nadie')
+
+    asyncio.run(scenario())
+
+
+def test_full_queues_collapse_into_a_resync():
+    async def scenario():
+        hub = GameEventHub(queue_size=2)
+        subscriber = hub.subscribe('g')
+        for version in range(4):
+            hub.publish('g', version)
+        await asyncio.sleep(0)
+        assert subscriber.queue.qsize() == 2 and subscriber.dropped == 1
+        assert [subscriber.queue.get_nowait() for _ in range(2)] == [RESYNC, 3]
+        hub.unsubscribe(subscriber)
+        assert hub.stats()['subscribers'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_published_counter_is_exact_across_threads():
+    hub = GameEventHub()
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda index: hub.publish(f'g{index % 4}', (0, index, b'')), range(4000)))
+    assert hub.stats()['published'] == 4000
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from app import create_app
+from app.models.cards import cards_from_packed, cards_to_packed, cards_to_str, new_pile
+
+COMPACT = {'Accept': 'application/vnd.poker.compact+json'}
+
+
+def new_client(game_id):
+    client = create_app().test_client()
+    client.post('/api/game/new', json={'game_id': game_id})
+    return client
+
+
+def test_packed_cards_round_trip():
+    cards = new_pile(range(52))
+    packed = cards_to_packed(cards)
+    assert len(packed) == 104 and packed.startswith('AH2H')
+    assert cards_from_packed(packed) == cards
+    with pytest.raises(ValueError):
+        cards_from_packed('AH2')
+    with pytest.raises(ValueError):
+        cards_from_packed('XX')
+
+
+def test_compact_shuffle_is_much_smaller():
+    client = new_client('wire')
+    plain = client.post('/api/game/shuffle', json={'game_id': 'wire', 'cut_point': 20})
+    compact = client.post('/api/game/shuffle', json={'game_id': 'wire', 'cut_point': 20}, headers=COMPACT)
+    minimal = client.post('/api/game/shuffle', json={'game_id': 'wire', 'cut_point': 20, 'deck_before': False},
+                          headers=COMPACT)
+
+    assert compact.mimetype == 'application/vnd.poker.compact+json'
+    assert 'Accept' in compact.vary
+    body = json.loads(compact.data)
+    assert 'message' not in body and body['shuffle_count'] == 2
+    assert cards_to_str(cards_from_packed(body['deck_before'])) == plain.get_json()['deck_after']
+
+    body = json.loads(minimal.data)
+    assert 'deck_before' not in body and len(body['deck_after']) == 104
+    assert len(minimal.data) * 3 < len(plain.data)
+
+    no_before = client.post('/api/game/shuffle', json={'game_id': 'wire', 'cut_point': 7, 'deck_before': False})
+    assert 'deck_before' not in no_before.get_json()
+
+
+def test_compact_game_state_and_turns():
+    client = new_client('packed')
+    client.post('/api/game/shuffle', json={'game_id': 'packed', 'cut_point': 33})
+    client.post('/api/game/start', json={'game_id': 'packed'})
+    client.post('/api/game/play-turn', json={'game_id': 'packed'})
+
+    plain = client.get('/api/game/state?game_id=packed')
+    compact = client.get('/api/game/state?game_id=packed', headers=COMPACT)
+    assert plain.headers['ETag'] == compact.headers['ETag']
+    plain_state = plain.get_json()['game_state']
+    compact_state = json.loads(compact.data)['game_state']
+    assert {pile: cards_to_str(cards_from_packed(cards)) for pile, cards in compact_state['piles'].items()} \
+        == plain_state['piles']
+    assert {**compact_state, 'piles': plain_state['piles']} == plain_state
+
+    body = json.loads(client.post('/api/game/autoplay', json={'game_id': 'packed'}, headers=COMPACT).data)
+    assert len(body['turns']) == 3 * body['turns_count']
+
+
+def test_msgpack_uses_index_bytes():
+    msgpack = pytest.importorskip('msgpack')
+    client = new_client('binary')
+    response = client.post('/api/game/shuffle', json={'game_id': 'binary', 'cut_point': 20, 'deck_before': False},
+                           headers={'Accept': 'application/msgpack'})
+    assert response.mimetype == 'application/msgpack'
+    body = msgpack.unpackb(response.data)
+    assert len(body['deck_after']) == 52 and set(body['deck_after']) == set(range(52))
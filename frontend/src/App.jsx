@@ -35,9 +35,14 @@ function App() {
   const shuffleCompleteResolveRef = useRef(null);
   const gameInitializedRef = useRef(false);
   const autoPlayActiveRef = useRef(false);
+  const gameStateRef = useRef(null);  // Último estado recibido (evita pedir /state antes de cada jugada)
   
   const { playShuffle, playFlip, playPlace } = useCardSounds();
 
+  useEffect(() => {
+    gameStateRef.current = gameState;
+  }, [gameState]);
+
   const showAlert = useCallback((type, message, duration = 3000) => {
     setAlert({ type, message });
     if (duration > 0) {
@@ -401,7 +406,8 @@ function App() {
 
   const executeAutoMove = useCallback(async () => {
     try {
-      const currentState = await fetchGameState(true);
+      // flip-card / place-card ya devuelven el estado: solo se consulta /state si aún no hay ninguno
+      const currentState = gameStateRef.current || await fetchGameState(true);
       
       if (!currentState || currentState.status !== 'playing') {
         console.log('🤖 Juego terminado');
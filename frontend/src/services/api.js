@@ -37,12 +37,37 @@ export const gameAPI = {
     });
   },
 
+  // Voltear y colocar en una sola petición (pile opcional: por defecto next_flip_pile)
+  playTurn: (gameId, pile = null) => {
+    return axios.post(`${API_URL}/play-turn`, {
+      game_id: gameId,
+      pile: pile
+    });
+  },
+
+  // Jugar en el servidor hasta terminar; devuelve turns = [[carta, montón de origen], ...]
+  autoplay: (gameId, maxTurns = null) => {
+    return axios.post(`${API_URL}/autoplay`, {
+      game_id: gameId,
+      max_turns: maxTurns
+    });
+  },
+
   getGameState: (gameId) => {
     return axios.get(`${API_URL}/state`, {
       params: { game_id: gameId }
     });
   },
 
+  // Cambios en vivo (solo con el servidor ASGI: uvicorn asgi:app); onEvent(tipo, datos) con 'state' o 'delta'
+  streamGame: (gameId, onEvent) => {
+    const source = new EventSource(`${API_URL}/stream?game_id=${encodeURIComponent(gameId)}`);
+    ['state', 'delta'].forEach((type) => {
+      source.addEventListener(type, (event) => onEvent(type, JSON.parse(event.data)));
+    });
+    return source;  // source.close() para dejar de escuchar
+  },
+
   resetGame: (gameId) => {
     return axios.post(`${API_URL}/reset`, { 
       game_id: gameId 